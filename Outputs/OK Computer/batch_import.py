@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Batch Import v1.0 - backfill a folder of chat exports
+Exports are streamed here and handed to a process pool BATCH_CHUNK
+conversations at a time, so memory is bounded by the chunks in flight rather
+than by file size. Analysis (topics, format, fingerprints) runs in the
+workers; dedupe, the index and the classification logs are written by this
+process only, in input order.
+"""
+import os, sys, glob, json, time, argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any
+import chat_processor_v2 as cp
+
+BATCH_CHECKPOINT = "batch_checkpoint.jsonl"  # one line per finished file
+BATCH_PATTERN = "*.txt"
+BATCH_CHUNK = 64  # conversations per work unit
+BATCH_CHUNK_BYTES = 4 << 20  # ...or this much raw text, whichever comes first
+
+
+# ──────────────────────────────────────────────────────────────
+# INPUT DISCOVERY + CHECKPOINT
+# ──────────────────────────────────────────────────────────────
+def collect_files(sources: List[str], pattern: str = BATCH_PATTERN) -> List[str]:
+    """Directories are walked recursively for `pattern`; anything else is a glob"""
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            matches = glob.glob(os.path.join(source, "**", pattern), recursive=True)
+        else:
+            matches = glob.glob(source, recursive=True)
+        files.extend(sorted(os.path.abspath(m) for m in matches if os.path.isfile(m)))
+    return list(dict.fromkeys(files))  # de-duplicate, keep order
+
+
+def _file_stamp(path: str) -> List | None:
+    """[size, mtime_ns], or None if the file has gone away"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def load_checkpoint(path: str = BATCH_CHECKPOINT) -> Dict[str, List]:
+    """path → stamp for files already imported (changed files are redone)"""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break  # torn final line from an interrupted run
+            if record.get("status") == "done":
+                done[record["path"]] = record["stamp"]
+    return done
+
+
+def append_checkpoint(path: str, record: Dict) -> None:
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# ──────────────────────────────────────────────────────────────
+# WORKER SIDE (no shared files touched)
+# ──────────────────────────────────────────────────────────────
+def _init_worker(dedupe_mode: str) -> None:
+    if dedupe_mode == "near":
+        cp.near_duplicate_index()  # load MinHash parameters once per process
+
+
+def analyze_chunk(texts: List[str], user_review_mode: bool, dedupe_mode: str) -> Dict[str, Any]:
+    """Analyse one chunk of conversations; results come back in the same order"""
+    started = time.perf_counter()
+    items = []
+    for raw_text in texts:
+        if len(raw_text) < 500:
+            items.append({"error": "Content too short"})
+            continue
+        items.append({
+            "result": cp.analyze_conversation(raw_text, user_review_mode),
+            "fingerprint": cp.conversation_fingerprint(raw_text, dedupe_mode)
+        })
+    return {"items": items, "seconds": time.perf_counter() - started}
+
+
+# ──────────────────────────────────────────────────────────────
+# WRITER SIDE (single process, input order)
+# ──────────────────────────────────────────────────────────────
+def iter_chunks(files: List[str]):
+    """
+    (path, texts, last, error) work units, read lazily: a file's
+    conversations are only pulled from disk when the next unit is submitted
+    """
+    for path in files:
+        texts, size = [], 0
+        try:
+            for raw_text in cp.iter_conversations(path):
+                texts.append(raw_text)
+                size += len(raw_text)
+                if len(texts) >= BATCH_CHUNK or size >= BATCH_CHUNK_BYTES:
+                    yield path, texts, False, None
+                    texts, size = [], 0
+        except (OSError, UnicodeDecodeError) as e:
+            yield path, texts, True, f"{type(e).__name__}: {e}"
+            continue
+        yield path, texts, True, None
+
+
+def record_items(items: List[Dict[str, Any]], dedupe_mode: str, counts: Dict[str, int]) -> None:
+    """Dedupe + index + log one chunk of analysed conversations; adds to counts"""
+    pending = []
+    for item in items:
+        if "error" in item:
+            status = "error"
+        else:
+            duplicate = cp.skip_if_duplicate("", dedupe_mode, fingerprint=item["fingerprint"],
+                                             pending=pending)
+            if duplicate:
+                status = duplicate["status"]
+            else:
+                cp.record_result(item["result"], "", dedupe_mode,
+                                 fingerprint=item["fingerprint"], index_entries=pending)
+                status = item["result"]["status"]
+        counts[status] = counts.get(status, 0) + 1
+    cp.add_index_entries(pending)
+    if dedupe_mode == "near" and pending:
+        cp.near_duplicate_index().save()
+
+
+def run_batch(files: List[str], jobs: int = None, user_review_mode: bool = False,
+              dedupe_mode: str = "strict", checkpoint: str = BATCH_CHECKPOINT,
+              resume: bool = True, report=print) -> Dict[str, Any]:
+    """
+    Import `files` with `jobs` worker processes. At most 2 * jobs chunks are
+    read ahead of the writer at any time. A file is checkpointed only after
+    all of its writes, so an interrupted run picks up at the first unfinished
+    file. Files that vanish before they are read are reported and skipped.
+    """
+    done = load_checkpoint(checkpoint) if resume else {}
+    todo, missing = [], []
+    for path in files:
+        stamp = _file_stamp(path)
+        if stamp is None:
+            missing.append(path)
+        elif done.get(path) != stamp:
+            todo.append(path)
+    skipped = len(files) - len(todo) - len(missing)
+    jobs = jobs or os.cpu_count() or 1
+
+    totals = {"files": 0, "skipped": skipped, "missing": len(missing),
+              "conversations": 0, "bytes": 0, "statuses": {}}
+    started = time.perf_counter()
+    if skipped:
+        report(f"Resuming: {skipped} file(s) already imported")
+    for path in missing:
+        append_checkpoint(checkpoint, {"path": path, "stamp": None, "status": "missing",
+                                       "counts": {}, "error": "File not found", "finished": time.time()})
+        report(f"missing {path}")
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(dedupe_mode,)) as pool:
+        units = iter_chunks(todo)
+        in_flight = deque()  # (path, last, error, future), in input order
+
+        def submit_next() -> bool:
+            unit = next(units, None)
+            if unit is None:
+                return False
+            path, texts, last, error = unit
+            in_flight.append((path, last, error, pool.submit(analyze_chunk, texts,
+                                                             user_review_mode, dedupe_mode)))
+            return True
+
+        while len(in_flight) < jobs * 2 and submit_next():
+            pass
+
+        counts, seconds = {}, 0.0  # for the file being written
+        while in_flight:
+            path, last, error, future = in_flight.popleft()
+            analysis = future.result()
+            submit_next()
+
+            record_items(analysis["items"], dedupe_mode, counts)
+            seconds += analysis["seconds"]
+            if not last:
+                continue
+
+            stamp = _file_stamp(path)
+            size = stamp[0] if stamp else 0
+            status = "error" if error else "done"
+            append_checkpoint(checkpoint, {
+                "path": path, "stamp": stamp, "status": status, "counts": counts, "error": error,
+                "seconds": round(seconds, 3), "finished": time.time()
+            })
+
+            totals["files"] += 1
+            totals["bytes"] += size
+            totals["conversations"] += sum(counts.values())
+            for key, value in counts.items():
+                totals["statuses"][key] = totals["statuses"].get(key, 0) + value
+            detail = ", ".join(f"{k} {v}" for k, v in sorted(counts.items())) or "no conversations"
+            report(f"[{totals['files']}/{len(todo)}] {status:5} {os.path.basename(path)}: "
+                   f"{detail} ({seconds:.2f}s)" + (f" - {error}" if error else ""))
+            counts, seconds = {}, 0.0
+
+    cp.close_decision_logs()  # fsync whatever the last files logged
+    elapsed = time.perf_counter() - started
+    totals["seconds"] = round(elapsed, 3)
+    totals["conversations_per_sec"] = round(totals["conversations"] / elapsed, 1) if elapsed else 0.0
+    totals["mb_per_sec"] = round(totals["bytes"] / 1e6 / elapsed, 2) if elapsed else 0.0
+    return totals
+
+
+# ──────────────────────────────────────────────────────────────
+# COMMAND-LINE INTERFACE
+# ──────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch import chat exports")
+    parser.add_argument("sources", nargs="+", help="directories and/or glob patterns")
+    parser.add_argument("--pattern", default=BATCH_PATTERN, help="file pattern inside directories")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--review", action="store_true", help="flag uncertain classifications")
+    parser.add_argument("--dedupe", choices=["strict", "near"], default="strict")
+    parser.add_argument("--checkpoint", default=BATCH_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and redo every file")
+    args = parser.parse_args()
+
+    files = collect_files(args.sources, args.pattern)
+    if not files:
+        print("No files matched")
+        sys.exit(1)
+
+    totals = run_batch(files, args.jobs, args.review, args.dedupe, args.checkpoint,
+                       resume=not args.restart)
+    print(json.dumps(totals, indent=2))
@@ -3,7 +3,7 @@
 Chat History Reconstructor v3.0 - Memory Reconstruction Core
 Handles: duplicate detection, topic extraction, keyword generation, uncertainty flagging
 """
-import os, re, json, csv, uuid, hashlib
+import os, io, re, json, csv, uuid, hashlib, mmap, struct, bisect, random, zlib, time, atexit
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Tuple, Any
@@ -14,8 +14,21 @@ from typing import Dict, List, Tuple, Any
 MANIFEST_CSV = "manifest_export_wide.csv"
 PENDING_JSON = "pending_manifest.json"
 INDEX_JSON = "conversations_index.json"
-DISCARDED_LOG = "discarded_turns_log.json"
-UNCERTAIN_LOG = "uncertain_classifications.json"
+INDEX_TAIL = "conversations_index.tail.jsonl"  # index entries added since the last merge
+INDEX_TAIL_LIMIT = 256                         # merge the tail into INDEX_JSON past this
+DISCARDED_LOG = "discarded_turns_log.jsonl"        # keep/discard decisions, one per line
+UNCERTAIN_LOG = "uncertain_classifications.jsonl"  # flag decisions, one per line
+DECISION_FSYNC_EVERY = 32                      # records between fsyncs of a decision log
+DECISION_FSYNC_INTERVAL = 2.0                  # ...or seconds, whichever comes first
+SIGNATURE_INDEX = "signature_index.bin"        # sorted (signature, ordinal) records
+SIGNATURE_IDS = "signature_index.ids.json"     # ordinal → conv_id + source stamp
+SIGNATURE_TAIL = "signature_index.tail.jsonl"  # incremental adds since last rebuild
+SIGNATURE_TAIL_LIMIT = 256                     # merge tail into .bin past this
+NEAR_DUP_INDEX = "minhash_index.json"          # MinHash signatures + LSH bands
+NEAR_DUP_THRESHOLD = 0.8                       # Jaccard similarity for "near" mode
+NEAR_DUP_PERMUTATIONS = 128
+NEAR_DUP_SHINGLE = 5                           # words per shingle
+STREAM_CHUNK_SIZE = 1 << 20                    # bytes of text read per chunk by iter_conversations
 
 # Ensure files exist
 for f in [PENDING_JSON, INDEX_JSON, DISCARDED_LOG, UNCERTAIN_LOG]:
@@ -59,6 +72,100 @@ def split_conversations(raw_text: str) -> List[str]:
     # MS_003: If no patterns found, return single conversation (don't crash)
     return [raw_text]
 
+# ──────────────────────────────────────────────────────────────
+# STREAMING PARSER (bounded memory for full exports)
+# ──────────────────────────────────────────────────────────────
+_TURN_START = re.compile(r'(User|Kimi|Assistant):')
+_TURN_ROLES = {"User": "user", "Kimi": "assistant", "Assistant": "assistant"}
+
+
+def _open_source(source):
+    """Paths are opened here (and closed by the caller); file objects pass through"""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'r', encoding='utf-8'), True
+    return source, False
+
+
+def detect_delimiter(sample_text: str) -> str | None:
+    """Same format rules as split_conversations(), applied to the first 1000 chars"""
+    sample_text = sample_text[:1000]
+    if re.search(r'User:\s.*\nKimi:\s', sample_text):
+        return '\n\n'
+    if '###CHATGPT###' in sample_text:
+        return '###CHATGPT###'
+    if re.search(r'\n---\n', sample_text):
+        return '\n---\n'
+    return None
+
+
+def iter_conversations(source, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Yield conversations from a path or text file object one at a time.
+    Reads chunk_size characters at a time and carries any partial
+    conversation (or a delimiter split across chunks) into the next chunk,
+    so memory is bounded by the largest conversation, not the export.
+    Yields exactly what split_conversations() would return for the whole text.
+    """
+    stream, owned = _open_source(source)
+    try:
+        buffer = ""
+        while len(buffer) < 1000:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            buffer += chunk
+        
+        delimiter = detect_delimiter(buffer)
+        if delimiter is None:
+            # Single conversation: nothing to split on
+            yield buffer + stream.read()
+            return
+        
+        scan_from = 0
+        while True:
+            # Only re-split once the newly read text completes a delimiter
+            if buffer.find(delimiter, scan_from) != -1:
+                parts = buffer.split(delimiter)
+                buffer = parts.pop()
+                for conv in parts:
+                    if conv.strip():
+                        yield conv
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            scan_from = max(len(buffer) - len(delimiter) + 1, 0)
+            buffer += chunk
+        if buffer.strip():
+            yield buffer
+    finally:
+        if owned:
+            stream.close()
+
+
+def iter_turns(conversation):
+    """
+    Yield {"role", "content"} turns from conversation text or a file object.
+    A turn starts at a User:/Kimi:/Assistant: line and runs until the next
+    one; text before the first role line is ignored. Works line by line.
+    """
+    lines_in = io.StringIO(conversation) if isinstance(conversation, str) else conversation
+    role, lines = None, []
+    for line in lines_in:
+        match = _TURN_START.match(line)
+        if match:
+            if role:
+                yield {"role": role, "content": "".join(lines).strip()}
+            role, lines = _TURN_ROLES[match.group(1)], [line[match.end():]]
+        elif role:
+            lines.append(line)
+    if role:
+        yield {"role": role, "content": "".join(lines).strip()}
+
+
+def first_conversation(raw_text: str) -> str:
+    """split_conversations(raw_text)[0] without splitting the rest of the text"""
+    return next(iter_conversations(io.StringIO(raw_text)), "")
+
 # ──────────────────────────────────────────────────────────────
 # MANIFEST ENTRY GENERATION (MS_002)
 # ──────────────────────────────────────────────────────────────
@@ -72,13 +179,12 @@ def generate_manifest_entry(raw_text: str) -> Tuple[dict, str, dict]:
     - Extract code blocks with metadata
     - Return tuple: (entry, formatted_text, code_blocks_dict)
     """
-    # Split conversations and use first one
-    conversations = split_conversations(raw_text)
-    first_conversation = conversations[0] if conversations else ""
+    # Use the first conversation only; the rest of the export is never split
+    conversation = first_conversation(raw_text)
     
     # Extract User:/Kimi: pairs using regex
     # MS_004: If regex fails to extract any pairs, return empty structures
-    message_pairs = re.findall(r'User:\s*(.+?)\nKimi:\s*(.+?)(?:\n|$)', first_conversation, re.DOTALL)
+    message_pairs = re.findall(r'User:\s*(.+?)\nKimi:\s*(.+?)(?:\n|$)', conversation, re.DOTALL)
     
     # MS_004: Handle regex failure case
     if not message_pairs:
@@ -118,7 +224,7 @@ def generate_manifest_entry(raw_text: str) -> Tuple[dict, str, dict]:
         })
     
     # Generate signatures
-    signatures = generate_conversation_signature(first_conversation)
+    signatures = generate_conversation_signature(conversation)
     
     # Create entry dict
     entry = {
@@ -131,7 +237,7 @@ def generate_manifest_entry(raw_text: str) -> Tuple[dict, str, dict]:
     
     # Extract code blocks via regex
     code_blocks = {}
-    code_matches = re.findall(r'```(\w+)?\n(.*?)```', first_conversation, re.DOTALL)
+    code_matches = re.findall(r'```(\w+)?\n(.*?)```', conversation, re.DOTALL)
     
     for idx, (language, code) in enumerate(code_matches):
         if code.strip():  # Only process non-empty code blocks
@@ -171,101 +277,724 @@ def generate_conversation_signature(text: str) -> List[str]:
     
     return signatures[:10]  # Exactly 10 signatures
 
-def check_strict_duplicate(raw_text: str, threshold: int = 3) -> Tuple[bool, str, int]:
+class SignatureIndex:
+    """
+    Persistent inverted index: signature hash → conversation ordinals.
+    The .bin file is a sorted array of (u64 signature, u32 ordinal) records,
+    memory-mapped and binary-searched; entries added since the last rebuild
+    live in a small JSONL tail. Rebuilt from INDEX_JSON (+ INDEX_TAIL) when
+    those change behind our back.
+    """
+    RECORD = struct.Struct("<QI")
+
+    def __init__(self, index_path=None, bin_path=None, ids_path=None, tail_path=None,
+                 index_tail_path=None):
+        self.index_path = index_path or INDEX_JSON
+        self.index_tail_path = index_tail_path or INDEX_TAIL
+        self.bin_path = bin_path or SIGNATURE_INDEX
+        self.ids_path = ids_path or SIGNATURE_IDS
+        self.tail_path = tail_path or SIGNATURE_TAIL
+        self.ids = []
+        self.tail = {}  # signature key → [ordinals]
+        self.tail_count = 0
+        self._mm = None
+        self._count = 0
+        self._load()
+
+    @staticmethod
+    def key(signature: str) -> int:
+        try:
+            return int(signature, 16) & 0xFFFFFFFFFFFFFFFF
+        except ValueError:
+            return int(hashlib.md5(signature.encode()).hexdigest()[:16], 16)
+
+    def _source_stamp(self) -> list:
+        stamp = [0, 0]
+        if os.path.exists(self.index_path):
+            st = os.stat(self.index_path)
+            stamp = [st.st_size, st.st_mtime_ns]
+        tail_size = os.path.getsize(self.index_tail_path) if os.path.exists(self.index_tail_path) else 0
+        return stamp + [tail_size]
+
+    def _load(self) -> None:
+        stamp = None
+        if os.path.exists(self.ids_path) and os.path.exists(self.bin_path):
+            try:
+                with open(self.ids_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                self.ids = meta["ids"]
+                stamp = meta["source"]
+            except (json.JSONDecodeError, KeyError):
+                return self.rebuild()
+            self._map()
+            if os.path.exists(self.tail_path):
+                with open(self.tail_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            break
+                        self._add_tail(record["id"], record["signatures"])
+                        stamp = record["source"]
+        if stamp != self._source_stamp():
+            self.rebuild()
+
+    def _map(self) -> None:
+        self.close()
+        size = os.path.getsize(self.bin_path)
+        self._count = size // self.RECORD.size
+        if self._count:
+            with open(self.bin_path, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _add_tail(self, conv_id: str, signatures: List[str]) -> None:
+        ordinal = len(self.ids)
+        self.ids.append(conv_id)
+        for sig in set(signatures):
+            self.tail.setdefault(self.key(sig), []).append(ordinal)
+        self.tail_count += 1
+
+    def rebuild(self) -> None:
+        """Full rebuild from INDEX_JSON (cold start or external change)"""
+        index = load_index(self.index_path, self.index_tail_path)
+        self.ids = []
+        records = []
+        for conv_id, meta in index.items():
+            ordinal = len(self.ids)
+            self.ids.append(conv_id)
+            records.extend((self.key(sig), ordinal) for sig in set(meta.get('signatures', [])))
+        self._write(records)
+
+    def _write(self, records: List[Tuple[int, int]]) -> None:
+        records.sort()
+        self.close()
+        with open(self.bin_path + '.tmp', 'wb') as f:
+            for sig, ordinal in records:
+                f.write(self.RECORD.pack(sig, ordinal))
+        os.replace(self.bin_path + '.tmp', self.bin_path)
+        with open(self.ids_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({"source": self._source_stamp(), "ids": self.ids}, f)
+        os.replace(self.ids_path + '.tmp', self.ids_path)
+        if os.path.exists(self.tail_path):
+            os.remove(self.tail_path)
+        self.tail = {}
+        self.tail_count = 0
+        self._map()
+
+    def add(self, conv_id: str, signatures: List[str]) -> None:
+        """Record a conversation just written to the index"""
+        self._add_tail(conv_id, signatures)
+        with open(self.tail_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"id": conv_id, "signatures": signatures,
+                                "source": self._source_stamp()}) + "\n")
+        if self.tail_count > SIGNATURE_TAIL_LIMIT:
+            self.merge_tail()
+
+    def merge_tail(self) -> None:
+        """Fold the tail into the .bin (also re-stamps it against the current index files)"""
+        records = [self._record(i) for i in range(self._count)]
+        records.extend((sig, ordinal) for sig, ordinals in self.tail.items() for ordinal in ordinals)
+        self._write(records)
+
+    def _record(self, i: int) -> Tuple[int, int]:
+        return self.RECORD.unpack_from(self._mm, i * self.RECORD.size)
+
+    def lookup(self, signature: str) -> List[int]:
+        key = self.key(signature)
+        ordinals = list(self.tail.get(key, []))
+        if self._count:
+            lo = bisect.bisect_left(range(self._count), key, key=lambda i: self._record(i)[0])
+            while lo < self._count:
+                sig, ordinal = self._record(lo)
+                if sig != key:
+                    break
+                ordinals.append(ordinal)
+                lo += 1
+        return ordinals
+
+    def find_duplicate(self, signatures: List[str], threshold: int) -> Tuple[bool, str, int]:
+        """Earliest-indexed conversation sharing >= threshold signatures"""
+        counts = {}
+        for sig in set(signatures):
+            for ordinal in set(self.lookup(sig)):
+                counts[ordinal] = counts.get(ordinal, 0) + 1
+        hits = [ordinal for ordinal, count in counts.items() if count >= threshold]
+        if not hits:
+            return False, "", 0
+        best = min(hits)
+        return True, self.ids[best], counts[best]
+
+
+_signature_index = None
+
+
+def signature_index() -> SignatureIndex:
+    global _signature_index
+    if _signature_index is None:
+        _signature_index = SignatureIndex()
+    return _signature_index
+
+
+def _index_meta(entry: Dict) -> Dict:
+    return {
+        "title": entry.get('title', ''),
+        "timestamp": entry.get('timestamp'),
+        "topics": entry.get('topics', []),
+        "keywords": entry.get('keywords', []),
+        "signatures": entry.get('signatures', [])
+    }
+
+
+def load_index(index_path: str = None, tail_path: str = None) -> Dict[str, Dict]:
+    """conv_id → meta: INDEX_JSON with INDEX_TAIL applied on top (later entries win)"""
+    index_path = index_path or INDEX_JSON
+    tail_path = tail_path or INDEX_TAIL
+    index = {}
+    if os.path.exists(index_path) and os.path.getsize(index_path) > 0:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    if os.path.exists(tail_path):
+        with open(tail_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn final line from an interrupted import
+                index[record["id"]] = record["meta"]
+    return index
+
+
+_index_tail_count = None  # lines in INDEX_TAIL, counted on first use
+
+
+def add_index_entry(entry: Dict) -> None:
+    """Add a processed conversation to the index and the signature index"""
+    add_index_entries([entry])
+
+
+def add_index_entries(entries: List[Dict]) -> None:
+    """
+    Batch form of add_index_entry. Entries are appended to INDEX_TAIL, so an
+    import costs O(entries); merge_index() folds the tail into INDEX_JSON
+    once it holds INDEX_TAIL_LIMIT entries.
+    """
+    global _index_tail_count
+    if not entries:
+        return
+    if _index_tail_count is None:
+        _index_tail_count = 0
+        if os.path.exists(INDEX_TAIL):
+            with open(INDEX_TAIL, 'r', encoding='utf-8') as f:
+                _index_tail_count = sum(1 for _ in f)
+    with open(INDEX_TAIL, 'a', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps({"id": entry['id'], "meta": _index_meta(entry)}) + "\n")
+    _index_tail_count += len(entries)
+    for entry in entries:
+        signature_index().add(entry['id'], entry.get('signatures', []))
+    if _index_tail_count >= INDEX_TAIL_LIMIT:
+        merge_index()
+
+
+def merge_index() -> None:
+    """Rewrite INDEX_JSON with the tail applied (atomically), then drop the tail"""
+    global _index_tail_count
+    if not os.path.exists(INDEX_TAIL):
+        return
+    index = load_index()
+    with open(INDEX_JSON + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    os.replace(INDEX_JSON + '.tmp', INDEX_JSON)
+    os.remove(INDEX_TAIL)
+    _index_tail_count = 0
+    if _signature_index is not None:
+        _signature_index.merge_tail()  # same entries, new source stamp: no rebuild on next load
+
+
+def _index_empty() -> bool:
+    return os.path.getsize(INDEX_JSON) == 0 and not os.path.exists(INDEX_TAIL)
+
+
+def check_strict_duplicate(raw_text: str, threshold: int = 3,
+                           signatures: List[str] = None,
+                           pending: List[Dict] = None) -> Tuple[bool, str, int]:
     """
     Check if conversation is duplicate using multi-signature matching
+    signatures: precomputed generate_conversation_signature(raw_text)
+    pending: entries accepted but not yet written by add_index_entries()
     Returns: (is_duplicate, existing_id, match_count)
     """
-    signatures = generate_conversation_signature(raw_text)
+    if signatures is None:
+        signatures = generate_conversation_signature(raw_text)
     if not signatures:
         return False, "", 0
     
-    if os.path.getsize(INDEX_JSON) == 0:
-        return False, "", 0
+    if not _index_empty():
+        found = signature_index().find_duplicate(signatures, threshold)
+        if found[0]:
+            return found
     
-    with open(INDEX_JSON, 'r', encoding='utf-8') as f:
-        index = json.load(f)
+    wanted = set(signatures)
+    for entry in pending or []:
+        shared = len(wanted & set(entry.get('signatures', [])))
+        if shared >= threshold:
+            return True, entry['id'], shared
+    return False, "", 0
+
+# ──────────────────────────────────────────────────────────────
+# NEAR-DUPLICATE DETECTION ENGINE (MinHash + LSH)
+# ──────────────────────────────────────────────────────────────
+_MERSENNE = (1 << 61) - 1
+_ROLE_PREFIX = re.compile(r'^(?:User|Kimi|Assistant):\s*', re.MULTILINE)
+
+
+def shingle_text(text: str, size: int = NEAR_DUP_SHINGLE) -> set:
+    """Word shingles, ignoring role prefixes, case, punctuation and whitespace"""
+    words = re.findall(r'\w+', _ROLE_PREFIX.sub('', text).lower())
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode())} if words else set()
+    return {zlib.crc32(' '.join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+
+
+def lsh_parameters(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) minimising false positives + false negatives around threshold"""
+    def area(f, lo, hi, steps=200):
+        width = (hi - lo) / steps
+        return sum(f(lo + (i + 0.5) * width) for i in range(steps)) * width
     
-    for conv_id, meta in index.items():
-        if 'signatures' in meta:
-            existing_sigs = meta['signatures']
-            match_count = len(set(signatures) & set(existing_sigs))
-            if match_count >= threshold:
-                return True, conv_id, match_count
+    best, best_error = (1, num_perm), float('inf')
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        if rows == 0:
+            break
+        fp = area(lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold)
+        fn = area(lambda s: (1 - s ** rows) ** bands, threshold, 1.0)
+        if fp + fn < best_error:
+            best, best_error = (bands, rows), fp + fn
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures with LSH banding, persisted to NEAR_DUP_INDEX.
+    Candidates share at least one band bucket; they are confirmed by the
+    estimated Jaccard similarity, so neither query nor clustering compares
+    every pair of conversations.
     
-    return False, "", 0
+    Arguments left as None come from the saved index (or the defaults). An
+    explicit threshold re-bands the stored signatures; num_perm and
+    shingle_size must match the saved ones, since signatures depend on them.
+    """
+    
+    def __init__(self, path: str = None, threshold: float = None,
+                 num_perm: int = None, shingle_size: int = None):
+        self.path = path or NEAR_DUP_INDEX
+        self.threshold = NEAR_DUP_THRESHOLD
+        self.num_perm = NEAR_DUP_PERMUTATIONS if num_perm is None else num_perm
+        self.shingle_size = NEAR_DUP_SHINGLE if shingle_size is None else shingle_size
+        self.signatures = {}  # conv_id → minhash list
+        self.buckets = {}     # band key → [conv_ids]
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            for name, requested in (("num_perm", num_perm), ("shingle_size", shingle_size)):
+                if requested is not None and requested != saved[name]:
+                    raise ValueError(f"{self.path} was built with {name}={saved[name]}, not {requested}; "
+                                     f"rebuild the index to change it")
+            self.threshold = saved["threshold"]
+            self.num_perm = saved["num_perm"]
+            self.shingle_size = saved["shingle_size"]
+            self.signatures = saved["signatures"]
+        # Fixed seed: permutations must match the ones stored signatures were built with
+        rng = random.Random(1)
+        self._perms = [(rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE))
+                       for _ in range(self.num_perm)]
+        self.bands, self.rows = lsh_parameters(self.threshold, self.num_perm)
+        self._rebucket()
+        if threshold is not None:
+            self.set_threshold(threshold)
+    
+    def _rebucket(self) -> None:
+        self.buckets = {}
+        for conv_id, signature in self.signatures.items():
+            self._bucket(conv_id, signature)
+    
+    def set_threshold(self, threshold: float) -> None:
+        """Change the similarity threshold; bands are re-tuned and every signature re-bucketed"""
+        if threshold == self.threshold:
+            return
+        self.threshold = threshold
+        bands = lsh_parameters(threshold, self.num_perm)
+        if bands != (self.bands, self.rows):
+            self.bands, self.rows = bands
+            self._rebucket()
+    
+    def minhash(self, text: str) -> List[int]:
+        shingles = shingle_text(text, self.shingle_size)
+        if not shingles:
+            return []
+        return [min([(a * x + b) % _MERSENNE for x in shingles]) for a, b in self._perms]
+    
+    def _band_keys(self, signature: List[int]) -> List[str]:
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            keys.append(f"{band}:{hashlib.md5(str(rows).encode()).hexdigest()[:16]}")
+        return keys
+    
+    def _bucket(self, conv_id: str, signature: List[int]) -> None:
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(conv_id)
+    
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        if not sig_a or not sig_b:
+            return 0.0
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+    
+    def add(self, conv_id: str, text: str, signature: List[int] = None) -> None:
+        if signature is None:
+            signature = self.minhash(text)
+        if not signature:
+            return
+        self.signatures[conv_id] = signature
+        self._bucket(conv_id, signature)
+    
+    def query(self, text: str, threshold: float = None,
+              signature: List[int] = None) -> List[Tuple[str, float]]:
+        """[(conv_id, estimated Jaccard)] at or above threshold, most similar first"""
+        threshold = self.threshold if threshold is None else threshold
+        if signature is None:
+            signature = self.minhash(text)
+        if not signature:
+            return []
+        candidates = {cid for key in self._band_keys(signature) for cid in self.buckets.get(key, [])}
+        scored = [(cid, self.similarity(signature, self.signatures[cid])) for cid in candidates]
+        return sorted([hit for hit in scored if hit[1] >= threshold], key=lambda hit: -hit[1])
+    
+    def clusters(self, threshold: float = None) -> List[List[str]]:
+        """Groups of near-duplicate conversations (union-find over bucket pairs)"""
+        threshold = self.threshold if threshold is None else threshold
+        parent = {}
+        
+        def find(x):
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+        
+        checked = set()
+        for members in self.buckets.values():
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair in checked:
+                        continue
+                    checked.add(pair)
+                    if self.similarity(self.signatures[a], self.signatures[b]) >= threshold:
+                        parent[find(a)] = find(b)
+        
+        groups = {}
+        for conv_id in parent:
+            groups.setdefault(find(conv_id), []).append(conv_id)
+        return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=lambda g: (-len(g), g))
+    
+    def save(self) -> None:
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({"threshold": self.threshold, "num_perm": self.num_perm,
+                       "shingle_size": self.shingle_size, "signatures": self.signatures}, f)
+        os.replace(self.path + '.tmp', self.path)
+
+
+_near_duplicate_index = None
+
+
+def near_duplicate_index() -> NearDuplicateIndex:
+    global _near_duplicate_index
+    if _near_duplicate_index is None:
+        _near_duplicate_index = NearDuplicateIndex()
+    return _near_duplicate_index
+
+
+def check_near_duplicate(raw_text: str, threshold: float = None,
+                         minhash: List[int] = None) -> Tuple[bool, str, float]:
+    """
+    Near-duplicate mode: MinHash similarity instead of exact snippet hashes
+    Returns: (is_duplicate, existing_id, estimated_jaccard)
+    """
+    hits = near_duplicate_index().query(raw_text, threshold, signature=minhash)
+    if not hits:
+        return False, "", 0.0
+    return True, hits[0][0], hits[0][1]
+
+
+def _archive_text(path: str) -> Tuple[str, str]:
+    """(conv_id, text) from a raw transcript or an archived JSON entry"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if path.endswith('.json'):
+        try:
+            entry = json.loads(content)
+        except json.JSONDecodeError:
+            return Path(path).stem, content
+        if isinstance(entry, dict):
+            text = entry.get('raw') or "\n".join(m.get('content', '') for m in entry.get('messages', []))
+            return entry.get('id', Path(path).stem), text
+    return Path(path).stem, content
+
+
+def find_duplicate_clusters(paths: List[str] = None, threshold: float = None) -> List[List[str]]:
+    """
+    Batch mode: index every file under `paths` (dirs are walked) into the
+    near-duplicate index, then return all duplicate clusters in the archive
+    """
+    index = near_duplicate_index()
+    for root in paths or []:
+        files = [root] if os.path.isfile(root) else [
+            os.path.join(d, name) for d, _, names in os.walk(root) for name in sorted(names)
+            if name.endswith(('.txt', '.json'))]
+        for path in files:
+            conv_id, text = _archive_text(path)
+            if conv_id not in index.signatures:
+                index.add(conv_id, text)
+    if threshold is not None:
+        index.set_threshold(threshold)
+    if paths:
+        index.save()
+    return index.clusters()
 
 # ──────────────────────────────────────────────────────────────
 # TOPIC & KEYWORD EXTRACTION (LM-Driven)
 # ──────────────────────────────────────────────────────────────
-def extract_topics_and_keywords(text: str, user_intervention: bool = False) -> Dict[str, Any]:
+# Technical patterns (high confidence)
+TECH_PATTERNS = {
+    'canvas': r'\b(Canvas|CANVAS)\b',
+    'workflow': r'\b(Workflow|workflow|process|routine)\b',
+    'startup': r'\b(Startup|startup|boot|initialize)\b',
+    'shutdown': r'\b(Shutdown|shutdown|finalize|archive)\b',
+    'core': r'\b(Core|CORE|system_architecture)\b',
+    'schema': r'\b(schema|pydantic|yaml|json)\b',
+    'automation': r'\b(automation|script|batch|powershell)\b',
+    'logging': r'\b(logging|log|Operational Log|chatlog)\b'
+}
+
+# Conceptual patterns (medium confidence)
+CONCEPT_PATTERNS = {
+    'learning': r'\b(learning|reference|L[1-5]|Level [1-5])\b',
+    'priority': r'\b(priority|P[0-3]|high|low|normal)\b',
+    'integration': r'\b(integration|sync|bridge|API)\b',
+    'memory': r'\b(memory|reconstruction|archive|index)\b'
+}
+
+# Optional override: {"tech": {topic: regex}, "concept": {topic: regex}}
+TOPIC_PATTERNS_JSON = "topic_patterns.json"
+
+
+class TopicExtractor:
     """
-    Extract topics and keywords with uncertainty flags
-    Uses pattern matching + LM-style heuristics
+    Single-pass topic scanner. Every pattern is compiled once and folded into
+    one zero-width alternation, so the text is walked once; at each hit
+    position the individual patterns are re-tried to reproduce exactly what
+    a separate re.findall per pattern would have returned.
+    For ASCII text the walk runs case-sensitively over text.lower() (much
+    cheaper than IGNORECASE); hits are still confirmed with the originals.
     """
-    # Technical patterns (high confidence)
-    tech_patterns = {
-        'canvas': r'\b(Canvas|CANVAS)\b',
-        'workflow': r'\b(Workflow|workflow|process|routine)\b',
-        'startup': r'\b(Startup|startup|boot|initialize)\b',
-        'shutdown': r'\b(Shutdown|shutdown|finalize|archive)\b',
-        'core': r'\b(Core|CORE|system_architecture)\b',
-        'schema': r'\b(schema|pydantic|yaml|json)\b',
-        'automation': r'\b(automation|script|batch|powershell)\b',
-        'logging': r'\b(logging|log|Operational Log|chatlog)\b'
-    }
-    
-    # Conceptual patterns (medium confidence)
-    concept_patterns = {
-        'learning': r'\b(learning|reference|L[1-5]|Level [1-5])\b',
-        'priority': r'\b(priority|P[0-3]|high|low|normal)\b',
-        'integration': r'\b(integration|sync|bridge|API)\b',
-        'memory': r'\b(memory|reconstruction|archive|index)\b'
-    }
     
-    topics = []
-    keywords = []
-    uncertain_flags = []
+    def __init__(self, tech_patterns: Dict[str, str] = None, concept_patterns: Dict[str, str] = None):
+        self.tech_patterns = dict(TECH_PATTERNS if tech_patterns is None else tech_patterns)
+        self.concept_patterns = dict(CONCEPT_PATTERNS if concept_patterns is None else concept_patterns)
+        self.names = list(self.tech_patterns) + list(self.concept_patterns)
+        sources = list(self.tech_patterns.values()) + list(self.concept_patterns.values())
+        self.compiled = [re.compile(p, re.IGNORECASE) for p in sources]
+        try:
+            self.combined = re.compile("(?=" + "|".join(f"(?:{p})" for p in sources) + ")", re.IGNORECASE)
+        except re.error:
+            self.combined = None  # e.g. inline global flags: fall back to one pass per pattern
+        # Lower-cased walk is only a superset of IGNORECASE hits when lowering
+        # the source cannot change its meaning (\W, \S, [A-z] ...)
+        self.lowered = None
+        if self.combined is not None and all(self._lowercase_safe(p) for p in sources):
+            self.lowered = re.compile("(?=" + "|".join(f"(?:{p.lower()})" for p in sources) + ")")
     
-    # High confidence extraction
-    for topic, pattern in tech_patterns.items():
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            topics.append(topic)
-            keywords.extend([m.lower() for m in matches])
+    @staticmethod
+    def _lowercase_safe(source: str) -> bool:
+        return (source.isascii() and not re.search(r'\\[A-Z]', source)
+                and not re.search(r'[A-Z]-[a-z]|[a-z]-[A-Z]', source))
     
-    # Medium confidence (flag for review if found)
-    for concept, pattern in concept_patterns.items():
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            topics.append(concept)
-            keywords.extend([m.lower() for m in matches])
-            uncertain_flags.append(concept)
+    @classmethod
+    def from_config(cls, path: str = None) -> "TopicExtractor":
+        path = path or TOPIC_PATTERNS_JSON
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(config.get("tech", TECH_PATTERNS), config.get("concept", CONCEPT_PATTERNS))
     
-    # Remove duplicates
-    topics = list(set(topics))
-    keywords = list(set(keywords))
+    @staticmethod
+    def _found(match: re.Match) -> str:
+        # What re.findall reports: the single group if there is one, else the match
+        return (match.group(1) or '') if match.re.groups == 1 else match.group(0)
     
-    # If uncertainty threshold exceeded, flag for user
-    needs_intervention = len(uncertain_flags) >= 3 and user_intervention
+    def scan(self, text: str) -> List[List[str]]:
+        """Matches per pattern, in pattern order, as re.findall would list them"""
+        if self.combined is None:
+            return [[self._found(m) for m in pattern.finditer(text)] for pattern in self.compiled]
+        
+        if self.lowered is not None and text.isascii():
+            candidates = self.lowered.finditer(text.lower())
+        else:
+            candidates = self.combined.finditer(text)
+        
+        hits = [[] for _ in self.compiled]
+        resume = [0] * len(self.compiled)  # findall never re-enters a consumed span
+        for candidate in candidates:
+            pos = candidate.start()
+            for i, pattern in enumerate(self.compiled):
+                if pos < resume[i]:
+                    continue
+                match = pattern.match(text, pos)
+                if match:
+                    hits[i].append(self._found(match))
+                    resume[i] = match.end() if match.end() > pos else pos + 1
+        return hits
     
-    return {
-        "topics": topics,
-        "keywords": keywords,
-        "uncertain_flags": uncertain_flags,
-        "needs_intervention": needs_intervention,
-        "confidence_score": len([t for t in topics if t in tech_patterns]) / max(len(topics), 1)
-    }
+    def extract(self, text: str, user_intervention: bool = False) -> Dict[str, Any]:
+        topics = []
+        keywords = []
+        uncertain_flags = []
+        
+        for name, matches in zip(self.names, self.scan(text)):
+            if matches:
+                topics.append(name)
+                keywords.extend([m.lower() for m in matches])
+                # Medium confidence (flag for review if found)
+                if name not in self.tech_patterns:
+                    uncertain_flags.append(name)
+        
+        # Remove duplicates
+        topics = list(set(topics))
+        keywords = list(set(keywords))
+        
+        # If uncertainty threshold exceeded, flag for user
+        needs_intervention = len(uncertain_flags) >= 3 and user_intervention
+        
+        return {
+            "topics": topics,
+            "keywords": keywords,
+            "uncertain_flags": uncertain_flags,
+            "needs_intervention": needs_intervention,
+            "confidence_score": len([t for t in topics if t in self.tech_patterns]) / max(len(topics), 1)
+        }
+
+
+_topic_extractor = None
+
+
+def topic_extractor() -> TopicExtractor:
+    global _topic_extractor
+    if _topic_extractor is None:
+        _topic_extractor = TopicExtractor.from_config()
+    return _topic_extractor
+
+
+def extract_topics_and_keywords(text: str, user_intervention: bool = False) -> Dict[str, Any]:
+    """
+    Extract topics and keywords with uncertainty flags
+    Uses pattern matching + LM-style heuristics
+    """
+    return topic_extractor().extract(text, user_intervention)
 
 # ──────────────────────────────────────────────────────────────
 # DISCARD & UNCERTAINTY LOGGING
 # ──────────────────────────────────────────────────────────────
+class DecisionLog:
+    """
+    Append-only JSONL audit trail. Each decision is one line written straight
+    to the OS; fsync runs every DECISION_FSYNC_EVERY records or
+    DECISION_FSYNC_INTERVAL seconds (and at exit), so a crash can lose at
+    most the last unsynced lines and never the earlier history. A torn
+    final line is skipped by the reader.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        # First open after upgrading: carry the old JSON-array log over
+        legacy = os.path.splitext(path)[0] + ".json"
+        if legacy != path and os.path.exists(legacy) and (
+                not os.path.exists(path) or os.path.getsize(path) == 0):
+            convert_decision_log(legacy, path)
+    
+    def append(self, record: Dict) -> None:
+        if self._file is None:
+            torn = False
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                with open(self.path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    torn = f.read(1) != b"\n"
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if torn:
+                self._file.write("\n")  # never glue a new record onto a torn one
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if (self._unsynced >= DECISION_FSYNC_EVERY
+                or time.monotonic() - self._last_sync >= DECISION_FSYNC_INTERVAL):
+            self.sync()
+    
+    def sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+    
+    def close(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+    
+    def __iter__(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn line from a crash mid-append
+
+
+_decision_logs = {}
+
+
+def decision_log(path: str) -> DecisionLog:
+    if path not in _decision_logs:
+        _decision_logs[path] = DecisionLog(path)
+    return _decision_logs[path]
+
+
+@atexit.register
+def close_decision_logs() -> None:
+    for log in _decision_logs.values():
+        log.close()
+
+
 def log_classification_decision(
     conv_id: str, 
     decision: str,  # "keep", "flag", "discard"
     reason: str,
     topics: List[str],
-    confidence: float
+    confidence: float,
+    user_overridden: bool = False
 ):
     """Log every classification decision for audit trail"""
     log_file = UNCERTAIN_LOG if decision == "flag" else DISCARDED_LOG
@@ -277,17 +1006,75 @@ def log_classification_decision(
         "reason": reason,
         "topics": topics,
         "confidence": confidence,
-        "user_overridden": False  # Set to True if user changes decision
+        "user_overridden": user_overridden  # True when a user changed the decision
     }
-    
-    existing = []
-    if os.path.getsize(log_file) > 0:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            existing = json.load(f)
-    
-    existing.append(entry)
-    with open(log_file, 'w', encoding='utf-8') as f:
-        json.dump(existing, f, indent=2)
+    decision_log(log_file).append(entry)
+
+
+def override_decision(conv_id: str, decision: str, reason: str = "User override") -> None:
+    """Record a user's correction; the latest record for a conv_id wins"""
+    previous = next(read_decisions(conv_id=conv_id, latest=True), None)
+    log_classification_decision(conv_id, decision, reason,
+                                previous["topics"] if previous else [],
+                                confidence=1.0, user_overridden=True)
+
+
+def read_decisions(since=None, decision: str = None, overridden: bool = None,
+                   conv_id: str = None, latest: bool = False):
+    """
+    Query both decision logs, oldest first.
+    since: datetime or ISO timestamp; decision: "keep"/"flag"/"discard";
+    overridden: only user-overridden (True) or original (False) records;
+    latest: newest record per conv_id only, newest first.
+    """
+    if isinstance(since, str):
+        since = datetime.fromisoformat(since)
+    records = []
+    for path in (DISCARDED_LOG, UNCERTAIN_LOG):
+        for record in decision_log(path):
+            if since and datetime.fromisoformat(record["timestamp"]) < since:
+                continue
+            if conv_id and record.get("conv_id") != conv_id:
+                continue
+            records.append(record)
+    records.sort(key=lambda r: r["timestamp"])
+    if latest:
+        newest = {}
+        for record in records:
+            newest[record.get("conv_id")] = record
+        records = sorted(newest.values(), key=lambda r: r["timestamp"], reverse=True)
+    for record in records:
+        if decision and record.get("decision") != decision:
+            continue
+        if overridden is not None and bool(record.get("user_overridden")) != overridden:
+            continue
+        yield record
+
+
+def convert_decision_log(json_path: str, jsonl_path: str = None) -> int:
+    """
+    One-shot migration of a legacy JSON-array decision log to JSONL; any
+    records already in the JSONL file are kept after the converted ones.
+    The array file is kept as <name>.json.bak. Returns records converted.
+    """
+    jsonl_path = jsonl_path or os.path.splitext(json_path)[0] + ".jsonl"
+    records = []
+    if os.path.getsize(json_path) > 0:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    with open(jsonl_path + '.tmp', 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        if os.path.exists(jsonl_path):
+            # Decisions already appended to the JSONL log come after the old history
+            with open(jsonl_path, 'r', encoding='utf-8') as existing:
+                for line in existing:
+                    f.write(line if line.endswith("\n") else line + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(jsonl_path + '.tmp', jsonl_path)
+    os.replace(json_path, json_path + '.bak')
+    return len(records)
 
 # ──────────────────────────────────────────────────────────────
 # STRICT FORMATTING ENGINE
@@ -323,9 +1110,11 @@ def format_strict_human_readable(entry: Dict) -> str:
 # ──────────────────────────────────────────────────────────────
 # MAIN PROCESSING PIPELINE
 # ──────────────────────────────────────────────────────────────
-def process_chat_file(filepath: str, user_review_mode: bool = False) -> Dict[str, Any]:
+def process_chat_file(filepath: str, user_review_mode: bool = False,
+                      dedupe_mode: str = "strict") -> Dict[str, Any]:
     """
     Full pipeline: load → dedupe → extract topics → classify → format → log
+    dedupe_mode: "strict" (signature matches) or "near" (MinHash/LSH similarity)
     Returns result dict with classification decision
     """
     if not os.path.exists(filepath):
@@ -334,22 +1123,75 @@ def process_chat_file(filepath: str, user_review_mode: bool = False) -> Dict[str
     with open(filepath, 'r', encoding='utf-8') as f:
         raw_text = f.read()
     
+    return process_conversation(raw_text, user_review_mode, dedupe_mode)
+
+
+def process_export_file(filepath: str, user_review_mode: bool = False,
+                        dedupe_mode: str = "strict", chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Streaming variant for full ChatGPT/Kimi exports: the file is read in
+    chunks and each conversation runs through the pipeline as soon as it is
+    complete. Yields (index, result) per conversation.
+    """
+    if not os.path.exists(filepath):
+        yield 0, {"error": "File not found"}
+        return
+    for index, conversation in enumerate(iter_conversations(filepath, chunk_size)):
+        yield index, process_conversation(conversation, user_review_mode, dedupe_mode)
+
+
+def process_conversation(raw_text: str, user_review_mode: bool = False,
+                         dedupe_mode: str = "strict") -> Dict[str, Any]:
+    """dedupe → extract topics → classify → format → log, for one conversation"""
     # Skip if too short
     if len(raw_text) < 500:
         return {"error": "Content too short"}
     
-    # Check for duplicates
-    is_dup, dup_id, match_count = check_strict_duplicate(raw_text)
-    if is_dup:
-        log_classification_decision(
-            conv_id=str(uuid.uuid4()),
-            decision="discard",
-            reason=f"Duplicate of {dup_id} ({match_count} signature matches)",
-            topics=[],
-            confidence=1.0
-        )
-        return {"status": "duplicate_skipped", "duplicate_id": dup_id}
+    duplicate = skip_if_duplicate(raw_text, dedupe_mode)
+    if duplicate:
+        return duplicate
     
+    result = analyze_conversation(raw_text, user_review_mode)
+    record_result(result, raw_text, dedupe_mode)
+    if dedupe_mode == "near" and result["status"] != "discard":
+        near_duplicate_index().save()
+    return result
+
+
+def conversation_fingerprint(raw_text: str, dedupe_mode: str = "strict") -> List:
+    """What skip_if_duplicate() compares: snippet signatures or a MinHash"""
+    if dedupe_mode == "near":
+        return near_duplicate_index().minhash(raw_text)
+    return generate_conversation_signature(raw_text)
+
+
+def skip_if_duplicate(raw_text: str, dedupe_mode: str = "strict", fingerprint: List = None,
+                      pending: List[Dict] = None) -> Dict[str, Any] | None:
+    """Log and return a duplicate_skipped result, or None if the conversation is new"""
+    if dedupe_mode == "near":
+        is_dup, dup_id, similarity = check_near_duplicate(raw_text, minhash=fingerprint)
+        match_detail = f"{similarity:.0%} estimated similarity"
+    else:
+        is_dup, dup_id, match_count = check_strict_duplicate(raw_text, signatures=fingerprint,
+                                                             pending=pending)
+        match_detail = f"{match_count} signature matches"
+    if not is_dup:
+        return None
+    log_classification_decision(
+        conv_id=str(uuid.uuid4()),
+        decision="discard",
+        reason=f"Duplicate of {dup_id} ({match_detail})",
+        topics=[],
+        confidence=1.0
+    )
+    return {"status": "duplicate_skipped", "duplicate_id": dup_id}
+
+
+def analyze_conversation(raw_text: str, user_review_mode: bool = False) -> Dict[str, Any]:
+    """
+    Extract topics → classify → build entry → format.
+    Pure CPU work with no file writes, so it is safe to run in worker processes.
+    """
     # Extract topics and keywords
     extraction = extract_topics_and_keywords(raw_text, user_intervention=user_review_mode)
     
@@ -387,15 +1229,6 @@ def process_chat_file(filepath: str, user_review_mode: bool = False) -> Dict[str
     })
     entry['code_blocks'] = code_blocks
     
-    # Log decision
-    log_classification_decision(
-        conv_id=entry['id'],
-        decision=decision,
-        reason=reason,
-        topics=extraction['topics'],
-        confidence=relevance_score
-    )
-    
     return {
         "status": decision,
         "entry": entry,
@@ -403,19 +1236,90 @@ def process_chat_file(filepath: str, user_review_mode: bool = False) -> Dict[str
         "duplicate_check": {"is_duplicate": False}
     }
 
+
+def record_result(result: Dict[str, Any], raw_text: str, dedupe_mode: str = "strict",
+                  fingerprint: List = None, index_entries: List[Dict] = None) -> None:
+    """
+    Index kept/flagged conversations and log the decision.
+    index_entries: collect entries here for one add_index_entries() call
+    instead of appending to the index per conversation.
+    """
+    entry = result["entry"]
+    decision = result["status"]
+    
+    # Index kept/flagged conversations so later imports dedupe against them
+    if decision != "discard":
+        if index_entries is None:
+            add_index_entry(entry)
+        else:
+            index_entries.append(entry)
+        if dedupe_mode == "near":
+            near_duplicate_index().add(entry['id'], raw_text, signature=fingerprint)
+    
+    # Log decision
+    log_classification_decision(
+        conv_id=entry['id'],
+        decision=decision,
+        reason=entry['classification']['reason'],
+        topics=entry['topics'],
+        confidence=entry['relevance_score']
+    )
+
 # ──────────────────────────────────────────────────────────────
 # COMMAND-LINE INTERFACE
 # ──────────────────────────────────────────────────────────────
 if __name__ == "__main__":
-    import sys
+    import sys, argparse
     
-    if len(sys.argv) < 2:
-        print("Usage: python chat_processor.py <chat_file.txt> [--review]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Chat History Reconstructor")
+    parser.add_argument("chat_file", nargs="?", help="transcript to process")
+    parser.add_argument("--review", action="store_true", help="flag uncertain classifications")
+    parser.add_argument("--dedupe", choices=["strict", "near"], default="strict")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Jaccard threshold for --dedupe near / --clusters")
+    parser.add_argument("--clusters", nargs="*", metavar="PATH",
+                        help="report near-duplicate clusters (indexing any PATHs first)")
+    parser.add_argument("--export", action="store_true",
+                        help="stream a full export, one JSON summary line per conversation")
+    parser.add_argument("--convert-logs", action="store_true",
+                        help="migrate legacy JSON-array decision logs to JSONL")
+    parser.add_argument("--decisions", choices=["keep", "flag", "discard", "all"],
+                        help="list logged decisions (latest per conversation)")
+    parser.add_argument("--since", help="ISO timestamp filter for --decisions")
+    parser.add_argument("--overridden", action="store_true", help="only user-overridden decisions")
+    args = parser.parse_args()
+    
+    if args.convert_logs:
+        for jsonl_path in (DISCARDED_LOG, UNCERTAIN_LOG):
+            legacy = os.path.splitext(jsonl_path)[0] + ".json"
+            if os.path.exists(legacy):
+                print(f"{legacy} → {jsonl_path}: {convert_decision_log(legacy, jsonl_path)} records")
+        sys.exit(0)
+    
+    if args.decisions:
+        for record in read_decisions(since=args.since,
+                                     decision=None if args.decisions == "all" else args.decisions,
+                                     overridden=True if args.overridden else None, latest=True):
+            print(json.dumps(record))
+        sys.exit(0)
     
-    filepath = sys.argv[1]
-    review_mode = "--review" in sys.argv
+    if args.clusters is not None:
+        clusters = find_duplicate_clusters(args.clusters, args.threshold)
+        print(json.dumps({"clusters": clusters, "count": len(clusters)}, indent=2))
+        sys.exit(0)
+    
+    if not args.chat_file:
+        print("Usage: python chat_processor.py <chat_file.txt> [--review] [--dedupe strict|near] [--export]")
+        sys.exit(1)
     
-    result = process_chat_file(filepath, user_review_mode=review_mode)
+    if args.threshold is not None:
+        near_duplicate_index().set_threshold(args.threshold)
+    if args.export:
+        for index, result in process_export_file(args.chat_file, args.review, args.dedupe):
+            print(json.dumps({"index": index, "status": result.get("status", "error"),
+                              "id": result.get("entry", {}).get("id"),
+                              "error": result.get("error")}), flush=True)
+        sys.exit(0)
+    result = process_chat_file(args.chat_file, user_review_mode=args.review, dedupe_mode=args.dedupe)
     
-    print(json.dumps(result, indent=2, default=str))
\ No newline at end of file
+    print(json.dumps(result, indent=2, default=str))
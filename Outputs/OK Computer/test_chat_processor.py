@@ -7,8 +7,12 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import chat_processor_v2
 from chat_processor_v2 import split_conversations, generate_manifest_entry
+import re
 import json
+import tempfile
+import contextlib
 
 def test_split_conversations():
     """Test MS_001: Conversation splitting functionality"""
@@ -179,6 +183,318 @@ This is a generic separator conversation"""
     
     print("✓ Complex scenario test passed\n")
 
+STORE_FILES = ["INDEX_JSON", "INDEX_TAIL", "DISCARDED_LOG", "UNCERTAIN_LOG",
+               "SIGNATURE_INDEX", "SIGNATURE_IDS", "SIGNATURE_TAIL", "NEAR_DUP_INDEX"]
+
+@contextlib.contextmanager
+def temp_store(tmp_dir):
+    """Point chat_processor_v2's index/log files at a scratch directory, restored on exit"""
+    saved = {name: getattr(chat_processor_v2, name) for name in STORE_FILES}
+    
+    def reset():
+        if chat_processor_v2._signature_index is not None:
+            chat_processor_v2._signature_index.close()
+        chat_processor_v2._signature_index = None
+        chat_processor_v2._index_tail_count = None
+        chat_processor_v2._near_duplicate_index = None
+        chat_processor_v2.close_decision_logs()
+    
+    reset()
+    try:
+        for name in STORE_FILES:
+            setattr(chat_processor_v2, name, os.path.join(tmp_dir, os.path.basename(saved[name])))
+        for name in ["INDEX_JSON", "DISCARDED_LOG", "UNCERTAIN_LOG"]:
+            open(getattr(chat_processor_v2, name), 'a').close()
+        yield
+    finally:
+        reset()
+        for name, value in saved.items():
+            setattr(chat_processor_v2, name, value)
+
+def test_signature_index():
+    """Inverted signature index agrees with a linear scan of the index"""
+    print("=== Testing SignatureIndex ===")
+    
+    def conversation(n):
+        return "\n".join(f"User: topic {n} question {i} here\nAssistant: answer {n} part {i} there"
+                         for i in range(6))
+    
+    with tempfile.TemporaryDirectory() as tmp_dir, temp_store(tmp_dir):
+        index = {f"conv_{n}": {"title": f"Conversation {n}",
+                               "signatures": chat_processor_v2.generate_conversation_signature(conversation(n))}
+                 for n in range(50)}
+        with open(chat_processor_v2.INDEX_JSON, 'w') as f:
+            json.dump(index, f)
+        
+        is_dup, dup_id, matches = chat_processor_v2.check_strict_duplicate(conversation(7))
+        print(f"Cold start lookup: {is_dup}, {dup_id}, {matches}")
+        assert (is_dup, dup_id, matches) == (True, "conv_7", 6)
+        
+        is_dup, _, _ = chat_processor_v2.check_strict_duplicate(conversation(500))
+        assert not is_dup, "Unseen conversation flagged as duplicate"
+        
+        # Incremental add is visible immediately and after a reload
+        chat_processor_v2.add_index_entry({
+            "id": "conv_new", "title": "New",
+            "signatures": chat_processor_v2.generate_conversation_signature(conversation(500))})
+        assert chat_processor_v2.check_strict_duplicate(conversation(500))[1] == "conv_new"
+        chat_processor_v2.signature_index().close()
+        chat_processor_v2._signature_index = None
+        assert chat_processor_v2.check_strict_duplicate(conversation(500))[1] == "conv_new"
+        
+        # The add went to the index tail; merging folds it into INDEX_JSON
+        assert os.path.exists(chat_processor_v2.INDEX_TAIL)
+        before = chat_processor_v2.load_index()
+        assert len(before) == 51 and "conv_new" in before
+        chat_processor_v2.merge_index()
+        assert not os.path.exists(chat_processor_v2.INDEX_TAIL)
+        with open(chat_processor_v2.INDEX_JSON, 'r', encoding='utf-8') as f:
+            assert json.load(f) == before
+        
+        # ...and re-stamps the signature index, so a reload does not rebuild it
+        chat_processor_v2.signature_index().close()
+        chat_processor_v2._signature_index = None
+        rebuilt = []
+        original_rebuild = chat_processor_v2.SignatureIndex.rebuild
+        chat_processor_v2.SignatureIndex.rebuild = lambda self: rebuilt.append(True)
+        try:
+            assert chat_processor_v2.check_strict_duplicate(conversation(500))[1] == "conv_new"
+        finally:
+            chat_processor_v2.SignatureIndex.rebuild = original_rebuild
+        assert not rebuilt
+    
+    print("✓ All SignatureIndex tests passed\n")
+
+def test_near_duplicate_index():
+    """MinHash/LSH catches edited re-exports that strict signatures miss"""
+    print("=== Testing NearDuplicateIndex ===")
+    
+    turns = [f"User: how should step {i} of the startup workflow archive the canvas state\n"
+             f"Assistant: step {i} writes the canvas snapshot then logs the archive path for review"
+             for i in range(12)]
+    original = "\n".join(turns)
+    reordered = turns[:]
+    reordered[3], reordered[4] = reordered[4], reordered[3]
+    edited = "\n".join(reordered).replace(" the ", "  the ") + "\nUser: thanks"
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = chat_processor_v2.NearDuplicateIndex(path=os.path.join(tmp_dir, "minhash.json"))
+        index.add("conv_original", original)
+        index.add("conv_other", "User: what is for dinner tonight\nAssistant: pasta with a green salad " * 3)
+        
+        hits = index.query(edited)
+        print(f"Edited re-export hits: {hits}")
+        assert hits and hits[0][0] == "conv_original", "Edited copy not detected"
+        assert all(cid != "conv_other" for cid, _ in hits), "Unrelated conversation matched"
+        
+        index.add("conv_edited", edited)
+        index.save()
+        reloaded = chat_processor_v2.NearDuplicateIndex(path=os.path.join(tmp_dir, "minhash.json"))
+        clusters = reloaded.clusters()
+        print(f"Clusters: {clusters}")
+        assert clusters == [["conv_edited", "conv_original"]], f"Unexpected clusters: {clusters}"
+        
+        # A lower threshold on a saved 0.8 index re-bands it, so a ~0.65 pair is found
+        words = [f"word{i}" for i in range(100)]
+        path = os.path.join(tmp_dir, "loose.json")
+        index = chat_processor_v2.NearDuplicateIndex(path=path)
+        index.add("conv_a", " ".join(words))
+        index.add("conv_b", " ".join(words[:80] + [f"other{i}" for i in range(20)]))
+        index.save()
+        similarity = index.similarity(index.signatures["conv_a"], index.signatures["conv_b"])
+        print(f"Loose pair similarity: {similarity:.2f}")
+        assert 0.55 <= similarity < 0.8
+        
+        reloaded = chat_processor_v2.NearDuplicateIndex(path=path)
+        reloaded.set_threshold(0.5)
+        assert reloaded.clusters() == [["conv_a", "conv_b"]]
+        assert (reloaded.bands, reloaded.rows) == chat_processor_v2.lsh_parameters(0.5, reloaded.num_perm)
+        assert chat_processor_v2.NearDuplicateIndex(path=path, threshold=0.5).clusters() == [["conv_a", "conv_b"]]
+        try:
+            chat_processor_v2.NearDuplicateIndex(path=path, num_perm=64)
+            assert False, "Mismatched num_perm accepted"
+        except ValueError:
+            pass
+    
+    print("✓ All NearDuplicateIndex tests passed\n")
+
+def test_topic_extractor():
+    """Single-pass scan reports exactly what one re.findall per pattern would"""
+    print("=== Testing TopicExtractor ===")
+    
+    def findall_reference(extractor, text):
+        return [re.findall(p, text, re.IGNORECASE)
+                for p in list(extractor.tech_patterns.values()) + list(extractor.concept_patterns.values())]
+    
+    samples = [
+        "",
+        "Startup workflow: boot the CANVAS, archive the Operational Log, then sync the API index",
+        "L1 l2 LEVEL 3 level 9 P0 p3 high-priority Core core_memory json/yaml schema",
+        "Übersicht: the canvas archive log — überprüft, Level 2 reference (P1)",
+    ]
+    packet = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "test agent summarisation packet_.txt")
+    if os.path.exists(packet):
+        with open(packet, 'r', encoding='utf-8') as f:
+            samples.append(f.read())
+    
+    extractor = chat_processor_v2.TopicExtractor()
+    for text in samples:
+        assert extractor.scan(text) == findall_reference(extractor, text), f"Scan mismatch on {text[:40]!r}"
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config = os.path.join(tmp_dir, "topic_patterns.json")
+        with open(config, 'w', encoding='utf-8') as f:
+            json.dump({"tech": {"vtt": r"\b(whisperx?|vtt)\b"}, "concept": {}}, f)
+        custom = chat_processor_v2.TopicExtractor.from_config(config)
+        result = custom.extract("Run WhisperX on the VTT, then whisper again")
+        print(f"Custom topics: {result['topics']}, keywords: {result['keywords']}")
+        assert result["topics"] == ["vtt"], f"Unexpected topics: {result['topics']}"
+        assert set(result["keywords"]) == {"whisperx", "vtt", "whisper"}
+    
+    print("✓ All TopicExtractor tests passed\n")
+
+def test_streaming_parser():
+    """Chunked parser yields what split_conversations does, in bounded memory"""
+    print("=== Testing iter_conversations()/iter_turns() ===")
+    import io
+    import tracemalloc
+    
+    samples = [
+        "User: hello\nKimi: hi there\n\nUser: second\nKimi: reply\n\n\n",
+        "###CHATGPT###first chat###CHATGPT###\n\nsecond chat###CHATGPT###",
+        "intro\n---\nbody one\n---\n\n---\nbody two",
+        "no delimiters at all",
+        "",
+    ]
+    for text in samples:
+        for chunk_size in (1, 3, 13, 4096):
+            streamed = list(chat_processor_v2.iter_conversations(io.StringIO(text), chunk_size))
+            assert streamed == split_conversations(text), f"Mismatch for {text!r} at chunk {chunk_size}"
+    
+    turns = list(chat_processor_v2.iter_turns("preface\nUser: how?\ncontinued\nKimi: like this\nAssistant: or this\n"))
+    print(f"Turns: {turns}")
+    assert turns == [
+        {"role": "user", "content": "how?\ncontinued"},
+        {"role": "assistant", "content": "like this"},
+        {"role": "assistant", "content": "or this"},
+    ]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        export = os.path.join(tmp_dir, "export.txt")
+        conversation = "User: archive the canvas\nKimi: " + "snapshot written " * 200
+        with open(export, 'w', encoding='utf-8') as f:
+            for _ in range(2000):
+                f.write(conversation + "\n\n")
+        size = os.path.getsize(export)
+        
+        tracemalloc.start()
+        count = sum(1 for _ in chat_processor_v2.iter_conversations(export, chunk_size=1 << 16))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{count} conversations from {size} bytes, peak {peak} bytes")
+        assert count == 2000
+        assert peak < size / 10, "Streaming parser held too much of the export in memory"
+    
+    print("✓ All streaming parser tests passed\n")
+
+def test_batch_import():
+    """Process-pool batch import: single writer, in-order dedupe, resumable checkpoint"""
+    print("=== Testing batch_import ===")
+    import batch_import
+    
+    def conversation(topic):
+        turns = [f"User: step {i} of the {topic} workflow for the canvas core\n"
+                 f"Assistant: the {topic} startup schema step {i} archives the canvas state"
+                 for i in range(6)]
+        return "User: start\nKimi: ready\n" + "\n".join(turns)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir, temp_store(tmp_dir):
+        exports = os.path.join(tmp_dir, "exports")
+        os.makedirs(os.path.join(exports, "nested"))
+        with open(os.path.join(exports, "a.txt"), 'w', encoding='utf-8') as f:
+            f.write(conversation("backup") + "\n\n" + conversation("deploy"))
+        with open(os.path.join(exports, "nested", "b.txt"), 'w', encoding='utf-8') as f:
+            f.write(conversation("deploy"))  # duplicate of a.txt's second conversation
+        with open(os.path.join(exports, "c.txt"), 'w', encoding='utf-8') as f:
+            f.write("User: hi\nKimi: hello")
+        
+        checkpoint = os.path.join(tmp_dir, "checkpoint.jsonl")
+        files = batch_import.collect_files([exports])
+        assert [os.path.basename(f) for f in files] == ["a.txt", "c.txt", "b.txt"], files
+        
+        lines = []
+        totals = batch_import.run_batch(files, jobs=2, checkpoint=checkpoint, report=lines.append)
+        print("\n".join(lines))
+        print(f"Totals: {totals}")
+        assert totals["files"] == 3 and totals["conversations"] == 4
+        assert totals["statuses"].get("duplicate_skipped") == 1, "Cross-file duplicate not caught"
+        assert totals["statuses"].get("error") == 1
+        assert len(chat_processor_v2.load_index()) == 2
+        
+        # Second run resumes from the checkpoint; a touched file is redone
+        totals = batch_import.run_batch(files, jobs=2, checkpoint=checkpoint, report=lambda _: None)
+        assert totals["files"] == 0 and totals["skipped"] == 3, totals
+        with open(files[1], 'a', encoding='utf-8') as f:
+            f.write("\nUser: more\n")
+        totals = batch_import.run_batch(files, jobs=2, checkpoint=checkpoint, report=lambda _: None)
+        assert totals["files"] == 1 and totals["skipped"] == 2, totals
+        
+        # A listed file that disappeared is recorded, not fatal
+        os.remove(files[1])
+        totals = batch_import.run_batch(files, jobs=2, checkpoint=checkpoint, report=lambda _: None)
+        assert totals["missing"] == 1 and totals["files"] == 0 and totals["skipped"] == 2, totals
+        
+        # Conversations are shipped to the workers in chunks, not a whole file at a time
+        sizes = [len(texts) for _, texts, _, _ in batch_import.iter_chunks([files[0]] * 3)]
+        chunk, batch_import.BATCH_CHUNK = batch_import.BATCH_CHUNK, 1
+        try:
+            units = list(batch_import.iter_chunks([files[0]]))
+        finally:
+            batch_import.BATCH_CHUNK = chunk
+        assert sizes == [2, 2, 2] and [len(texts) for _, texts, _, _ in units] == [1, 1, 0]
+        assert [last for _, _, last, _ in units] == [False, False, True]
+    
+    print("✓ All batch_import tests passed\n")
+
+def test_decision_log():
+    """Append-only decision logs: legacy conversion, queries, overrides, torn lines"""
+    print("=== Testing DecisionLog ===")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy = [{"conv_id": "old-1", "timestamp": "2024-01-01T10:00:00", "decision": "flag",
+                   "reason": "Borderline relevance", "topics": ["canvas"], "confidence": 0.5,
+                   "user_overridden": False}]
+        with open(os.path.join(tmp_dir, "uncertain_classifications.json"), 'w', encoding='utf-8') as f:
+            json.dump(legacy, f, indent=2)
+        with temp_store(tmp_dir):
+            chat_processor_v2.log_classification_decision("new-1", "keep", "High CORE relevance", ["core"], 0.9)
+            chat_processor_v2.log_classification_decision("new-2", "flag", "Borderline relevance", ["memory"], 0.4)
+            
+            flags = list(chat_processor_v2.read_decisions(decision="flag"))
+            print(f"Flags: {[r['conv_id'] for r in flags]}")
+            assert [r["conv_id"] for r in flags] == ["old-1", "new-2"], "Legacy log not converted"
+            assert os.path.exists(os.path.join(tmp_dir, "uncertain_classifications.json.bak"))
+            
+            recent = list(chat_processor_v2.read_decisions(since="2025-01-01T00:00:00"))
+            assert [r["conv_id"] for r in recent] == ["new-1", "new-2"]
+            
+            chat_processor_v2.override_decision("new-2", "keep", "Reviewed: relevant")
+            overridden = list(chat_processor_v2.read_decisions(overridden=True))
+            assert [(r["conv_id"], r["decision"], r["topics"]) for r in overridden] == [("new-2", "keep", ["memory"])]
+            current = {r["conv_id"]: r["decision"] for r in chat_processor_v2.read_decisions(latest=True)}
+            assert current == {"old-1": "flag", "new-1": "keep", "new-2": "keep"}, current
+            
+            # A crash mid-append leaves a torn line: it is skipped, history survives
+            chat_processor_v2.close_decision_logs()
+            with open(chat_processor_v2.DISCARDED_LOG, 'a', encoding='utf-8') as f:
+                f.write('{"conv_id": "torn", "timest')
+            assert len(list(chat_processor_v2.read_decisions())) == 4
+            chat_processor_v2.log_classification_decision("new-3", "discard", "Low CORE relevance", [], 0.0)
+            assert len(list(chat_processor_v2.read_decisions())) == 5, "Record after a torn line was lost"
+            chat_processor_v2.close_decision_logs()
+    
+    print("✓ All DecisionLog tests passed\n")
+
 def main():
     """Run all tests"""
     print("Running Chat Processor Tests\n")
@@ -188,6 +504,12 @@ def main():
         test_split_conversations()
         test_generate_manifest_entry()
         test_complex_scenario()
+        test_signature_index()
+        test_near_duplicate_index()
+        test_topic_extractor()
+        test_streaming_parser()
+        test_batch_import()
+        test_decision_log()
         
         print("🎉 All tests passed successfully!")
         print("\nImplementation Status:")
@@ -1,8 +1,23 @@
 import os
+import sys
+import io
+import csv
 import json
+import uuid
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from hashlib import sha256
+from manifest_store import ManifestStore
+import corelog
+from archive_store import archive_store, file_lock, STORE_DIR
+from dirmap import DirSnapshot
+
+STORAGE_BACKEND = os.environ.get("CORELINK_STORAGE", "json")  # "json" | "sqlite"
+if STORAGE_BACKEND == "sqlite":
+    import archive_db
 
 # -------- Task 1-3: Safe_Write (archive → .tmp → verify → rename → log) --------
 
@@ -12,13 +27,8 @@ def safe_write(target_path: str, content: dict | str, category: str) -> bool:
     Corelink-compliant atomic write with archival
     Steps: archive → .tmp → verify → rename → log
     """
-    # Archive existing file
-    if os.path.exists(target_path):
-        archive_dir = Path("Archive") / category
-        archive_dir.mkdir(parents=True, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        archive_name = f"{Path(target_path).stem}_{timestamp}{Path(target_path).suffix}"
-        os.replace(target_path, archive_dir / archive_name)
+    # Archive existing content (content-addressed: unchanged content costs nothing)
+    archived = archive_store().archive(target_path, category)
 
     # Atomic write to .tmp → verify → rename
     tmp_path = Path(target_path).with_suffix('.tmp')
@@ -43,6 +53,7 @@ def safe_write(target_path: str, content: dict | str, category: str) -> bool:
         "target": target_path,
         "category": category,
         "size": Path(target_path).stat().st_size,
+        "archived_version": archived["version"] if archived else None,
         "status": "success"
     })
 
@@ -51,46 +62,227 @@ def safe_write(target_path: str, content: dict | str, category: str) -> bool:
 # -------- Task 4: Log Event Function --------
 
 
+QUEUE_LOG = "Archive/Logs/queue_log.jsonl"
+
+
 def log_event(action: str, context: dict) -> None:
-    log_entry = {
+    """Buffered: corelog batches the writes and flushes them in the background"""
+    corelog.get_log(QUEUE_LOG).write({
         "timestamp": datetime.now().isoformat(),
         "action": action,
         "context": context
-    }
-    log_file = Path("Archive/Logs/queue_log.jsonl")
-    log_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(log_file, 'a', encoding='utf-8') as f:
-        f.write(json.dumps(log_entry) + '\n')
+    })
+
+# -------- Transactional Writes: WriteBatch + write-ahead journal --------
+
+JOURNAL_DIR = "Archive/Journal"
+
+
+class WriteBatch:
+    """
+    Group commit for many safe_writes.
+    stage()   verify + serialize in memory (zero-byte check before anything moves)
+    commit()  archive originals → ONE fsynced journal holding every write
+              (the commit point) → .tmp + rename each target in order →
+              flush → drop the journal → one log event
+    If applying fails part-way, the replaced targets are rolled back from the
+    archive. If the process dies after the journal is durable, the next start
+    rolls the batch forward (recover_write_journal).
+    """
+
+    def __init__(self, journal_dir: str = JOURNAL_DIR):
+        self.journal_dir = Path(journal_dir)
+        self.writes = []
+
+    def stage(self, target_path: str, content: dict | str, category: str = "Other") -> None:
+        text = json.dumps(content, indent=2) if isinstance(content, dict) else content
+        if not text:
+            raise IOError(f"Zero-byte write detected: {target_path}")
+        self.writes.append({"target": str(target_path), "content": text, "category": category})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
+
+    def commit(self) -> dict:
+        if not self.writes:
+            return {"files": 0}
+        for write in self.writes:
+            archived = archive_store().archive(write["target"], write["category"])
+            write["archived_version"] = archived["version"] if archived else None
+
+        journal = self.journal_dir / f"batch_{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}.json"
+        _write_journal(journal, {"created": datetime.now().isoformat(), "writes": self.writes})
+
+        applied = []
+        try:
+            for write in self.writes:
+                _apply_write(write)
+                applied.append(write)
+            _flush_targets(applied)
+        except Exception:
+            _rollback_writes(applied)
+            journal.unlink()
+            log_event("write_batch", {"files": len(self.writes), "status": "rolled_back",
+                                      "applied_before_failure": len(applied)})
+            raise
+        journal.unlink()
+
+        targets = [write["target"] for write in self.writes]
+        log_event("write_batch", {
+            "files": len(targets),
+            "targets": targets,
+            "bytes": sum(len(write["content"]) for write in self.writes),
+            "status": "success"
+        })
+        return {"files": len(targets), "targets": targets}
+
+
+def _fsync_dir(path: Path) -> None:
+    if os.name == "nt":
+        return  # directories cannot be opened for fsync on Windows; rename is journaled by NTFS
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_journal(journal: Path, data: dict) -> None:
+    journal.parent.mkdir(parents=True, exist_ok=True)
+    tmp = journal.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, journal)
+    _fsync_dir(journal.parent)
+
+
+def _apply_write(write: dict) -> None:
+    """.tmp → rename for one journaled write; safe to repeat"""
+    target = Path(write["target"])
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_suffix('.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(write["content"])
+        os.replace(tmp_path, target)
+    except Exception:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+
+def _flush_targets(writes: list) -> None:
+    """Make applied writes durable before the journal goes: each target, then each parent dir once"""
+    for write in writes:
+        with open(write["target"], 'rb+') as f:
+            os.fsync(f.fileno())
+    for parent in dict.fromkeys(Path(write["target"]).parent for write in writes):
+        _fsync_dir(parent)  # the renames themselves
+
+
+def _rollback_writes(applied: list) -> None:
+    """Put back what the archive recorded for each replaced target, newest first"""
+    for write in reversed(applied):
+        if write["archived_version"] is None:
+            Path(write["target"]).unlink(missing_ok=True)
+        else:
+            data = archive_store().read(write["target"], write["archived_version"])
+            with open(write["target"], 'wb') as f:
+                f.write(data)
+
+
+def recover_write_journal(journal_dir: str = JOURNAL_DIR) -> int:
+    """
+    Run at startup. A journal that never finished writing (.tmp) means
+    nothing was applied: discard it. A complete journal was committed:
+    roll it forward (re-applying writes that already landed is harmless).
+    Returns the number of batches rolled forward.
+    """
+    journal_dir = Path(journal_dir)
+    if not journal_dir.exists():
+        return 0
+    for stale in journal_dir.glob("batch_*.tmp"):
+        stale.unlink()
+        log_event("write_batch_recovery", {"journal": stale.name, "status": "rolled_back"})
+    recovered = 0
+    for journal in sorted(journal_dir.glob("batch_*.json")):
+        with open(journal, 'r', encoding='utf-8') as f:
+            writes = json.load(f)["writes"]
+        for write in writes:
+            _apply_write(write)
+        _flush_targets(writes)
+        journal.unlink()
+        log_event("write_batch_recovery", {"journal": journal.name, "files": len(writes),
+                                           "status": "rolled_forward"})
+        recovered += 1
+    return recovered
 
 # -------- Task 5-6: Save Conversation + Update Manifest --------
 
 
 def save_conversation(entry: dict) -> str:
+    if STORAGE_BACKEND == "sqlite":
+        path = archive_db.save_conversation(entry)
+        log_event("save_conversation", {"conv_id": entry["id"], "backend": "sqlite"})
+        return path
     conv_id = entry["id"]
     file_path = Path("Archive/ChatLogs") / f"conv_{conv_id}.json"
+    file_path.parent.mkdir(parents=True, exist_ok=True)
     safe_write(str(file_path), entry, "ChatLogs")
     return str(file_path)
 
 
+_manifest = None
+
+
+def manifest_store() -> ManifestStore:
+    """Lazily open the append-only manifest (relative to the current ROOT cwd)"""
+    global _manifest
+    if _manifest is None:
+        _manifest = ManifestStore("CoreLink-Manifest",
+                                  snapshot_writer=lambda path, data: safe_write(path, data, "CoreLink"))
+        atexit.register(_manifest.flush)
+    return _manifest
+
+
 def update_manifest(conv_id: str, metadata: dict) -> None:
-    path = "CoreLink-Manifest.json"
-    if os.path.exists(path):
-        with open(path, 'r', encoding='utf-8') as f:
-            manifest = json.load(f)
+    if STORAGE_BACKEND == "sqlite":
+        archive_db.update_manifest(conv_id, metadata)
     else:
-        manifest = {}
-    manifest[conv_id] = metadata
-    safe_write(path, manifest, "CoreLink")
+        manifest_store().put(conv_id, metadata)
+    log_event("update_manifest", {"conv_id": conv_id})
 
 # -------- Task 7-9: Process Chat File --------
 
 
+def iter_turn_lines(raw_text: str):
+    """Yield (speaker, text) for each User:/Kimi: line without splitting the whole text"""
+    for line in io.StringIO(raw_text):
+        if line.startswith("User:"):
+            yield "User", line[5:].strip()
+        elif line.startswith("Kimi:"):
+            yield "Kimi", line[5:].strip()
+
+
 def process_chat_file(raw_text: str, user_review_mode: bool = False) -> dict:
-    lines = raw_text.strip().splitlines()
-    user_turns = [line for line in lines if line.startswith("User:")]
-    kimi_turns = [line for line in lines if line.startswith("Kimi:")]
+    first_user = None
+    has_kimi = False
+    for speaker, text in iter_turn_lines(raw_text):
+        if speaker == "User" and first_user is None:
+            first_user = text
+        elif speaker == "Kimi":
+            has_kimi = True
+        if first_user is not None and has_kimi:
+            break
 
-    if not user_turns or not kimi_turns:
+    if first_user is None or not has_kimi:
         return {"status": "format_error", "error": "No valid turns found"}
 
     conv_id = sha256(raw_text.encode()).hexdigest()[:12]
@@ -98,7 +290,7 @@ def process_chat_file(raw_text: str, user_review_mode: bool = False) -> dict:
 
     entry = {
         "id": conv_id,
-        "title": user_turns[0][5:].strip()[:40],
+        "title": first_user[:40],
         "timestamp": timestamp,
         "raw": raw_text,
         "relevance_score": 1.0,
@@ -124,24 +316,270 @@ def process_chat_file(raw_text: str, user_review_mode: bool = False) -> dict:
 
 
 def extract_from_manifest(conv_id: str) -> str | None:
-    path = "CoreLink-Manifest.json"
-    if not os.path.exists(path):
+    if STORAGE_BACKEND == "sqlite":
+        entry = archive_db.load_conversation(conv_id)
+        return format_strict_human_readable(entry) if entry else None
+    meta = manifest_store().get(conv_id)
+    if meta is None:
         return None
-    with open(path, 'r') as f:
-        manifest = json.load(f)
-    if conv_id not in manifest:
-        return None
-    with open(manifest[conv_id]['file_path'], 'r') as f:
+    with open(meta['file_path'], 'r') as f:
         return format_strict_human_readable(json.load(f))
 
 # -------- Formatter --------
 
 
 def format_strict_human_readable(entry: dict) -> str:
-    lines = []
-    for line in entry.get("raw", "").splitlines():
-        if line.startswith("User:"):
-            lines.append(f"👤 {line[5:].strip()}")
-        elif line.startswith("Kimi:"):
-            lines.append(f"🤖 {line[5:].strip()}")
-    return "\n".join(lines)
+    icons = {"User": "👤", "Kimi": "🤖"}
+    return "\n".join(f"{icons[speaker]} {text}" for speaker, text in iter_turn_lines(entry.get("raw", "")))
+
+# -------- Action Handlers (dispatched from Corelink queue) --------
+
+
+def _action_target(params: dict) -> str:
+    """Resolve the file a write action points at (target_path/path/filename)"""
+    target = params.get("target_path") or params.get("path") or params.get("filename")
+    if not target:
+        raise ValueError("Missing target_path/path/filename")
+    return target
+
+
+def handle_safe_write(params: dict) -> dict:
+    target = _action_target(params)
+    safe_write(target, params.get("content", ""), params.get("category", "Other"))
+    return {"target": target}
+
+
+def handle_make_file(params: dict) -> dict:
+    target = _action_target(params)
+    Path(target).parent.mkdir(parents=True, exist_ok=True)
+    safe_write(target, params.get("content", ""), params.get("category", "Other"))
+    return {"target": target}
+
+
+def handle_rename(params: dict) -> dict:
+    source = params.get("source_path")
+    dest = params.get("dest_path")
+    if not source or not dest:
+        raise ValueError("rename needs source_path and dest_path")
+    if os.path.exists(dest):
+        raise FileExistsError(f"Destination exists: {dest}")
+    Path(dest).parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, dest)
+    log_event("rename", {"source": source, "dest": dest, "status": "success"})
+    return {"source": source, "dest": dest}
+
+
+def read_index(index_path: str) -> dict:
+    """WATCH_INDEX.csv as {file_path: description}, in file order"""
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, 'r', encoding='utf-8', newline='') as f:
+        return {row["file_path"]: row["description"] for row in csv.DictReader(f)}
+
+
+def write_index(index_path: str, rows) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(["file_path", "description"])
+    writer.writerows(rows)
+    safe_write(index_path, buffer.getvalue(), "Other")
+
+
+def index_lock(index_path: str):
+    """
+    Held around every read-modify-write of the index and its snapshot:
+    the watcher and the dirmapper action (CoreCompile worker) both update them
+    """
+    return file_lock(Path(index_path).with_suffix(".lock"))
+
+
+def set_index_status(index_path: str, updates: dict) -> int:
+    """Set the description of listed rows ({file_path: status}); returns rows changed"""
+    with index_lock(index_path):
+        rows = read_index(index_path)
+        changed = 0
+        for rel, status in updates.items():
+            if rel in rows and rows[rel] != status:
+                rows[rel] = status
+                changed += 1
+        if changed:
+            write_index(index_path, rows.items())
+    return changed
+
+
+def dirmapper_snapshot(target, index_path: str) -> DirSnapshot:
+    """Snapshot beside the index; the index, the snapshot and Archive internals are not mapped"""
+    snapshot_path = Path(index_path).with_suffix(".snapshot.json")
+    return DirSnapshot(target, snapshot_path, exclude=[
+        index_path, snapshot_path, Path(index_path).with_suffix(".lock"),
+        STORE_DIR, JOURNAL_DIR, os.path.dirname(QUEUE_LOG)])
+
+
+def handle_dirmapper(params: dict) -> dict:
+    """
+    Map every file under target into WATCH_INDEX.csv, keeping known statuses.
+    Only directories whose mtime moved since <index>.snapshot.json are listed
+    again; the CSV is rewritten only when the file set changed.
+    """
+    target = Path(params.get("target", "."))
+    index_path = params.get("index", "WATCH_INDEX.csv")
+    with index_lock(index_path):
+        snapshot = dirmapper_snapshot(target, index_path)
+        diff = snapshot.scan(verify=params.get("verify", False))
+        changed = diff["added"] or diff["removed"]
+
+        index_stamp = None
+        if os.path.exists(index_path):
+            st = os.stat(index_path)
+            index_stamp = [st.st_size, st.st_mtime_ns]
+        rewritten = False
+        if changed or index_stamp is None or index_stamp != snapshot.index_stamp:
+            known = read_index(index_path)
+
+            # Existing rows keep their order; new files are appended in walk order
+            present = [rel.replace("/", "\\") for rel in snapshot.files()]
+            present_set = set(present)
+            rows = [(rel, desc) for rel, desc in known.items() if rel in present_set]
+            rows += [(rel, "pending") for rel in present if rel not in known]
+
+            if index_stamp is None or rows != list(known.items()):
+                write_index(index_path, rows)
+                rewritten = True
+                st = os.stat(index_path)
+                index_stamp = [st.st_size, st.st_mtime_ns]
+
+        snapshot.index_stamp = index_stamp
+        snapshot.save()
+
+    result = {
+        "index": index_path,
+        "files": sum(len(d["files"]) for d in snapshot.dirs.values()),
+        "added": diff["added"],
+        "removed": diff["removed"],
+        "modified": diff["modified"],
+        "dirs_scanned": diff["dirs_scanned"],
+        "dirs_total": diff["dirs_total"],
+        "rewritten": rewritten,
+        "initial": not snapshot.loaded
+    }
+    log_event("dirmapper", {key: len(value) if isinstance(value, list) else value
+                            for key, value in result.items()})
+    return result
+
+
+def handle_write_batch(params: dict) -> dict:
+    """safe_write/make_file actions committed together (see WriteBatch)"""
+    batch = WriteBatch()
+    for item in params.get("writes", []):
+        if item.get("action") not in ("safe_write", "make_file"):
+            raise ValueError(f"write_batch only takes safe_write/make_file, got {item.get('action')}")
+        item_params = item.get("params", {})
+        batch.stage(_action_target(item_params), item_params.get("content", ""),
+                    item_params.get("category", "Other"))
+    return batch.commit()
+
+
+def handle_import_chat(params: dict) -> dict:
+    raw_text = params.get("raw_text")
+    if raw_text is None:
+        # Large transcripts can be passed by path instead of over the worker pipe
+        with open(_action_target(params), 'r', encoding='utf-8') as f:
+            raw_text = f.read()
+    result = process_chat_file(raw_text, params.get("user_review_mode", False))
+    return {"status": result["status"], "id": result.get("entry", {}).get("id")}
+
+
+ACTIONS = {
+    "safe_write": handle_safe_write,
+    "make_file": handle_make_file,
+    "rename": handle_rename,
+    "dirmapper": handle_dirmapper,
+    "import_chat": handle_import_chat,
+    "write_batch": handle_write_batch,
+}
+
+
+def dispatch(payload: dict) -> dict:
+    name = payload.get("action")
+    if name not in ACTIONS:
+        raise ValueError(f"Unknown action: {name}")
+    return ACTIONS[name](payload.get("params", {}))
+
+# -------- Worker Mode: JSON-lines over stdin/stdout --------
+
+
+def serve_worker(stdin=sys.stdin, stdout=sys.stdout, jobs: int = 1) -> None:
+    """
+    Long-lived worker loop used by Corelink.
+    Request:  {"id": ..., "action": ..., "params": {...}}
+    Response: {"id": ..., "status": "ok"|"error", "result"|"error": ...}
+    Up to `jobs` actions run concurrently; responses may arrive out of order.
+    "ping" answers health checks, "shutdown" drains in-flight work and exits.
+    """
+    # Keep the protocol channel clean: stray prints go to stderr
+    sys.stdout = sys.stderr
+    write_lock = threading.Lock()
+    stats = {"handled": 0}
+
+    def reply(response: dict) -> None:
+        with write_lock:
+            stdout.write(json.dumps(response) + "\n")
+            stdout.flush()
+
+    def run(request: dict) -> None:
+        req_id = request.get("id")
+        try:
+            reply({"id": req_id, "status": "ok", "result": dispatch(request)})
+        except Exception as e:
+            log_event("worker_error", {"id": req_id, "action": request.get("action"), "error": str(e)})
+            reply({"id": req_id, "status": "error", "error": f"{type(e).__name__}: {e}"})
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        for line in stdin:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                reply({"id": None, "status": "error", "error": f"Bad request: {e}"})
+                continue
+
+            req_id = request.get("id")
+            action = request.get("action")
+            if action == "ping":
+                reply({"id": req_id, "status": "ok", "result": {"pid": os.getpid(), **stats}})
+                continue
+            if action == "shutdown":
+                pool.shutdown(wait=True)
+                corelog.close_all()
+                reply({"id": req_id, "status": "ok", "result": stats})
+                break
+
+            stats["handled"] += 1
+            pool.submit(run, request)
+
+
+def _arg_value(flag: str, default: str) -> str:
+    if flag in sys.argv[:-1]:
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+
+def main() -> int:
+    recover_write_journal()
+    if "--worker" in sys.argv:
+        serve_worker(jobs=int(_arg_value("--jobs", "1")))
+        return 0
+
+    # One-shot mode: single JSON payload on stdin
+    try:
+        result = dispatch(json.loads(sys.stdin.read()))
+    except Exception as e:
+        print(f"{type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
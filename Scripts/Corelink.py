@@ -4,32 +4,50 @@
 import os
 import sys
 import json
+import queue
+import socket
+import time
+import atexit
+import itertools
+import threading
 import subprocess
 import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import tkinter as tk
-from tkinter import messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog
 from pathlib import Path
 import pyperclip
-import shutil
+import corelog
+from archive_store import archive_store
 
 # ─── CONFIG ──────────────────────────────────────────────────────────────────
 ROOT_DIR = Path(r"C:\Soul_Algorithm")
 BASE_DIR = ROOT_DIR / "Scripts"
-ARCHIVE_DIR = ROOT_DIR / "Archive" / "Backups"
+ARCHIVE_STORE = ROOT_DIR / "Archive" / "Store"
 LOG_DIR = BASE_DIR / "logs"
 LOG_FILE = LOG_DIR / "corelink.log"
 COMPILE_PATH = BASE_DIR / "CoreCompile.py"
 VTT_SCRIPT = BASE_DIR / "vtt_processor.py"
 __version__ = "6.3.15"
 
+WORKER_TIMEOUT = 120  # seconds per queued action
+PING_TIMEOUT = 5
+POLL_MS = 100  # UI refresh interval while a queue or dictation runs
+MAX_PARALLEL = 4  # independent queue actions in flight at once
+VTT_PORT = 47821  # vtt_processor.SERVER_PORT
+VTT_LOAD_TIMEOUT = 120  # seconds for a cold server to load its model
+VTT_TIMEOUT = 90  # seconds per dictation once warm (capture stops on silence, 60 s at most)
+
 VALID_ACTIONS = ["safe_write", "make_file", "rename", "dirmapper", "run_queue"]
 WRITE_ACTIONS = ["safe_write", "make_file", "rename", "dirmapper"]
+BATCHABLE_ACTIONS = ["safe_write", "make_file"]  # grouped into write_batch by "transaction": true
 
 # ─── LOGGER ───────────────────────────────────────────────────────────────────
 
 
 def log(msg, data=None):
-    """Thread-safe JSON logging"""
+    """Thread-safe JSON logging (buffered; flushed in the background by corelog)"""
     entry = {
         "timestamp": datetime.datetime.now().isoformat(),
         "version": __version__,
@@ -38,9 +56,39 @@ def log(msg, data=None):
     }
     if data:
         entry["data"] = data
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry) + "\n")
+    corelog.get_log(LOG_FILE).write(entry)
+
+
+def show_log_tail(limit=200):
+    """Live view of recent log entries straight from the in-memory ring"""
+    win = tk.Toplevel()
+    win.title("📜 Corelink Log")
+    win.geometry("760x420")
+    text = tk.Text(win, wrap="none", font=("Consolas", 9))
+    text.pack(fill="both", expand=True, padx=5, pady=5)
+    btn_frame = tk.Frame(win)
+    btn_frame.pack(pady=5)
+    tk.Button(btn_frame, text="📂 Open File", width=12,
+              command=lambda: (corelog.get_log(LOG_FILE).flush(),
+                               subprocess.Popen(["notepad.exe", LOG_FILE]))).pack(side="left", padx=3)
+    tk.Button(btn_frame, text="Close", width=10, command=win.destroy).pack(side="left", padx=3)
+    shown = {"count": None}
+
+    def refresh():
+        if not win.winfo_exists():
+            return
+        entries = corelog.get_log(LOG_FILE).tail(limit)
+        if len(entries) != shown["count"] or (entries and entries[-1] is not shown.get("last")):
+            lines = [f"{e['timestamp'][11:19]}  {e['message']}"
+                     + (f"  {json.dumps(e['data'])[:200]}" if "data" in e else "") for e in entries]
+            text.config(state="normal")
+            text.delete("1.0", "end")
+            text.insert("end", "\n".join(lines))
+            text.see("end")
+            text.config(state="disabled")
+            shown.update(count=len(entries), last=entries[-1] if entries else None)
+        win.after(500, refresh)
+    refresh()
 
 # ─── DIALOGS ────────────────────────────────────────────────────────────────
 
@@ -203,15 +251,11 @@ def self_update_from_clipboard():
         # Replicate safe_write behavior (avoid circular imports)
         target_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Archive existing
-        if target_path.exists():
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            archive_name = f"{target_path.stem}_{timestamp}{target_path.suffix}"
-            archive_path = ARCHIVE_DIR / archive_name
-            archive_path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(target_path, archive_path)
-            log("ARCHIVE_CREATED", {"from": str(
-                target_path), "to": str(archive_path)})
+        # Archive existing (stored once per distinct content)
+        archived = archive_store(ARCHIVE_STORE, base=ROOT_DIR).archive(target_path, "Backups")
+        if archived:
+            log("ARCHIVE_CREATED", {"from": str(target_path), "version": archived["version"],
+                                    "hash": archived["hash"][:12]})
 
         # Atomic write
         temp_path = target_path.with_suffix('.tmp')
@@ -224,6 +268,9 @@ def self_update_from_clipboard():
         # Step 4: Ask to restart
         if messagebox.askyesno("Update Complete", "✅ Corelink.py updated successfully!\n\nRestart now to apply changes?"):
             log("RESTART_REQUESTED")
+            # execl replaces the process without running atexit handlers
+            compile_worker.stop()
+            corelog.close_all()
             os.execl(sys.executable, sys.executable, str(target_path))
 
     except Exception as e:
@@ -231,9 +278,256 @@ def self_update_from_clipboard():
         error_dbox("Update Failed", f"Error during self-update:\n\n{e}")
 
 
+# ─── COMPILE WORKER ──────────────────────────────────────────────────────────
+
+
+class WorkerError(Exception):
+    """CoreCompile worker died, timed out or rejected an action"""
+
+
+class CompileWorker:
+    """
+    Long-lived CoreCompile process speaking JSON lines over stdin/stdout.
+    Started lazily, health-checked with "ping", restarted after a crash.
+    A timed-out action retires its process: new calls go to a fresh one and
+    the old one is killed once the other actions running on it are done.
+    """
+
+    def __init__(self, script=COMPILE_PATH, cwd=ROOT_DIR):
+        self.script = script
+        self.cwd = cwd
+        self.proc = None
+        self.restarts = 0
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._retiring = set()  # processes that timed out, left to drain
+        self._lock = threading.Lock()
+        self._stderr = deque(maxlen=50)
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        with self._lock:
+            if self.alive() and self.proc not in self._retiring:
+                return
+            if self.proc is not None:
+                self.restarts += 1
+            self.proc = subprocess.Popen(
+                [sys.executable, "-u", str(self.script), "--worker",
+                 "--jobs", str(MAX_PARALLEL)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+                cwd=self.cwd
+            )
+            threading.Thread(target=self._read_stdout, args=(self.proc,), daemon=True).start()
+            threading.Thread(target=self._read_stderr, args=(self.proc,), daemon=True).start()
+            log("WORKER_STARTED", {"pid": self.proc.pid, "restarts": self.restarts})
+
+    def _read_stdout(self, proc):
+        for line in proc.stdout:
+            try:
+                response = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            waiting = self._pending.pop(response.get("id"), None)
+            if waiting:
+                waiting[1].put(response)
+        # EOF: fail everything still waiting on this process
+        code = proc.wait()
+        tail = "".join(self._stderr)[-500:]
+        for req_id, (owner, slot) in list(self._pending.items()):
+            if owner is proc and self._pending.pop(req_id, None):
+                slot.put({"id": req_id, "status": "error",
+                          "error": f"CoreCompile worker exited ({code})\n{tail}"})
+
+    def _read_stderr(self, proc):
+        for line in proc.stderr:
+            self._stderr.append(line)
+
+    def call(self, action, params=None, timeout=WORKER_TIMEOUT):
+        """Send one action, block until its response arrives"""
+        req_id = f"{os.getpid()}-{next(self._ids)}"
+        request = json.dumps({"id": req_id, "action": action, "params": params or {}})
+        slot = queue.Queue(maxsize=1)
+
+        for attempt in (1, 2):
+            self.start()
+            with self._lock:
+                proc = self.proc
+                self._pending[req_id] = (proc, slot)
+            try:
+                with self._lock:
+                    proc.stdin.write(request + "\n")
+                    proc.stdin.flush()
+                break
+            except (BrokenPipeError, OSError, ValueError):
+                # Never delivered - safe to retry once on a fresh worker
+                self._pending.pop(req_id, None)
+                self.kill()
+                if attempt == 2:
+                    raise WorkerError("Could not reach CoreCompile worker")
+
+        try:
+            response = slot.get(timeout=timeout)
+        except queue.Empty:
+            self._pending.pop(req_id, None)
+            log("WORKER_TIMEOUT", {"action": action, "timeout": timeout})
+            self._retire(proc)
+            raise WorkerError(f"{action} timed out after {timeout}s")
+
+        if response.get("status") != "ok":
+            raise WorkerError(response.get("error", "Unknown worker error"))
+        return response.get("result")
+
+    def _retire(self, proc):
+        """
+        Stop sending work to proc; kill it once no other request is waiting on it.
+        Blocks the timed-out caller until then, so its action is really gone
+        before the queue planner releases what it was writing.
+        """
+        with self._lock:
+            self._retiring.add(proc)
+        deadline = time.monotonic() + WORKER_TIMEOUT
+        while time.monotonic() < deadline and proc.poll() is None:
+            if not any(owner is proc for owner, _ in list(self._pending.values())):
+                break
+            time.sleep(0.1)
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+            log("WORKER_RETIRED", {"pid": proc.pid})
+        with self._lock:
+            self._retiring.discard(proc)
+
+    def ping(self, timeout=PING_TIMEOUT):
+        try:
+            return self.call("ping", timeout=timeout)
+        except WorkerError:
+            return None
+
+    def ensure_healthy(self):
+        """Ping the worker, restart it if it does not answer"""
+        if self.ping() is None:
+            log("WORKER_UNHEALTHY", {"restarts": self.restarts})
+            self.kill()
+            if self.ping() is None:
+                raise WorkerError("CoreCompile worker failed health check")
+
+    def kill(self):
+        with self._lock:
+            if self.alive():
+                self.proc.kill()
+                self.proc.wait()
+
+    def stop(self):
+        if not self.alive():
+            return
+        try:
+            self.call("shutdown", timeout=PING_TIMEOUT)
+            self.proc.wait(timeout=PING_TIMEOUT)
+        except (WorkerError, subprocess.TimeoutExpired):
+            self.kill()
+
+
+compile_worker = CompileWorker()
+atexit.register(compile_worker.stop)
+
+
+# ─── QUEUE PLANNER ───────────────────────────────────────────────────────────
+BARRIER = "*"  # resource that conflicts with everything
+
+
+def _resource(path):
+    return os.path.normcase(os.path.normpath(ROOT_DIR / path))
+
+
+def action_resources(action):
+    """(reads, writes) an action touches, derived from its params"""
+    name = action.get("action")
+    params = action.get("params", {})
+    reads, writes = set(), set()
+
+    def add_write(target):
+        # safe_write also touches the .tmp sibling; the old version goes to the
+        # content-addressed archive store, which serializes itself (lock file)
+        path = Path(target)
+        writes.update({_resource(path), _resource(path.with_suffix(".tmp"))})
+
+    if name in ("safe_write", "make_file"):
+        target = params.get("target_path") or params.get("path") or params.get("filename")
+        if target:
+            add_write(target)
+    elif name == "rename":
+        for key in ("source_path", "dest_path"):
+            if params.get(key):
+                writes.add(_resource(params[key]))
+    elif name == "dirmapper":
+        reads.add(_resource(params.get("target", ".")))
+        index = params.get("index", "WATCH_INDEX.csv")
+        add_write(index)
+        writes.add(_resource(Path(index).with_suffix(".snapshot.json")))
+    elif name == "write_batch":
+        for item in params.get("writes", []):
+            item_reads, item_writes = action_resources(item)
+            reads |= item_reads
+            writes |= item_writes
+
+    if not writes:
+        writes.add(BARRIER)
+    return reads, writes
+
+
+def _overlaps(paths_a, paths_b):
+    for a in paths_a:
+        for b in paths_b:
+            if BARRIER in (a, b) or a == b:
+                return True
+            if a.startswith(b.rstrip(os.sep) + os.sep) or b.startswith(a.rstrip(os.sep) + os.sep):
+                return True
+    return False
+
+
+def group_transactions(actions):
+    """Fold each run of consecutive safe_write/make_file into one write_batch action"""
+    grouped = []
+    for act in actions:
+        if act.get("action") in BATCHABLE_ACTIONS:
+            last = grouped[-1] if grouped else None
+            if last and last.get("action") == "write_batch":
+                last["params"]["writes"].append(act)
+                continue
+            if last and last.get("action") in BATCHABLE_ACTIONS:
+                grouped[-1] = {"action": "write_batch", "params": {"writes": [last, act]}}
+                continue
+        grouped.append(act)
+    return grouped
+
+
+def plan_queue(actions):
+    """Dependency DAG: deps[i] = earlier actions that must finish before i"""
+    resources = [action_resources(a) for a in actions]
+    deps = []
+    for i, (reads_i, writes_i) in enumerate(resources):
+        deps.append({
+            j for j, (reads_j, writes_j) in enumerate(resources[:i])
+            if _overlaps(writes_i, reads_j | writes_j) or _overlaps(reads_i, writes_j)
+        })
+    return deps
+
+
 # ─── QUEUE SYSTEM ────────────────────────────────────────────────────────────
-action_queue = []
+action_queue = deque()
 is_processing_queue = False
+queue_events = queue.Queue()      # worker thread → Tk thread
+queue_cancel = threading.Event()
+queue_resume = threading.Event()  # cleared while paused
+queue_resume.set()
+ui = {}                           # widgets the poller updates
 
 
 def validate_payload():
@@ -274,6 +568,12 @@ def validate_payload():
             error_dbox("Invalid Payload", "\n\n".join(invalid))
             return None
 
+        steps = actions
+        if payload.get("transaction"):
+            # Commit writes as groups: one journal + fsync per run of writes
+            steps = group_transactions(actions)
+            log("QUEUE_TRANSACTION", {"actions": len(actions), "steps": len(steps)})
+
         has_write = any(a.get("action") in WRITE_ACTIONS for a in actions)
         msg = f"📋 {payload.get('description', 'Execution')}\n\nActions: {len(actions)}\n\n"
         for i, act in enumerate(actions, 1):
@@ -285,7 +585,7 @@ def validate_payload():
                 msg += f"   → {params['target_path']}\n"
         msg += f"\n{'⚠️ WRITE' if has_write else '✅ READ-ONLY'}: Files will be archived" if has_write else ""
 
-        return actions if verify_dbox("Confirm Execution", msg, "write" if has_write else "read") else None
+        return steps if verify_dbox("Confirm Execution", msg, "write" if has_write else "read") else None
 
     except json.JSONDecodeError as e:
         error_dbox("Invalid JSON", str(e))
@@ -295,50 +595,181 @@ def validate_payload():
     return None
 
 
-def process_queue():
-    """Execute queue silently (no per-action DBOX)"""
-    global is_processing_queue, action_queue
+def run_queue_thread(actions):
+    """
+    Background thread: run the batch through the CoreCompile worker.
+    Independent actions run concurrently (MAX_PARALLEL); results are logged
+    in queue order. stop_and_log: after a failure nothing new starts,
+    in-flight actions finish and the rest are logged as skipped.
+    """
+    total = len(actions)
+    try:
+        compile_worker.ensure_healthy()
+    except WorkerError as e:
+        log("QUEUE_FAILED: worker", {"error": str(e)})
+        queue_events.put(("failed", "worker", str(e), 0, total))
+        return
 
-    if not action_queue:
-        is_processing_queue = False
+    deps = plan_queue(actions)
+    log("QUEUE_PLAN", {"actions": total, "independent": sum(1 for d in deps if not d)})
+
+    results = [None] * total  # (ok, result_or_error)
+    succeeded = set()
+    in_flight = {}
+    next_start = 0  # lowest index not yet started
+    next_log = 0
+    done = 0
+    failed = False
+
+    def flush_results():
+        nonlocal next_log, done
+        while next_log < total and results[next_log] is not None:
+            ok, value = results[next_log]
+            name = actions[next_log].get("action", "unknown")
+            if ok:
+                done += 1
+                log(f"QUEUE_SUCCESS: {name}", value)
+                queue_events.put(("progress", name, None, done, total))
+            else:
+                log(f"QUEUE_FAILED: {name}", {"error": value})
+            next_log += 1
+
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL) as pool:
+        while True:
+            if not in_flight:
+                queue_resume.wait()
+            if not failed and not queue_cancel.is_set() and queue_resume.is_set():
+                for i in range(next_start, total):
+                    if len(in_flight) >= MAX_PARALLEL:
+                        break
+                    if results[i] is None and i not in in_flight.values() and deps[i] <= succeeded:
+                        act = actions[i]
+                        future = pool.submit(compile_worker.call, act.get("action", "unknown"),
+                                             act.get("params", {}))
+                        in_flight[future] = i
+                while next_start < total and (results[next_start] is not None
+                                              or next_start in in_flight.values()):
+                    next_start += 1
+
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i = in_flight.pop(future)
+                try:
+                    results[i] = (True, future.result())
+                    succeeded.add(i)
+                except Exception as e:
+                    results[i] = (False, str(e))
+                    failed = True
+            flush_results()
+
+    # Anything after a gap (never started) is logged in order too
+    skipped = []
+    for i in range(next_log, total):
+        if results[i] is None:
+            skipped.append(i)
+            continue
+        ok, value = results[i]
+        name = actions[i].get("action", "unknown")
+        if ok:
+            done += 1
+            log(f"QUEUE_SUCCESS: {name}", value)
+        else:
+            log(f"QUEUE_FAILED: {name}", {"error": value})
+    if skipped:
+        log("QUEUE_SKIPPED", {"items": [i + 1 for i in skipped]})
+
+    failures = [i for i in range(total) if results[i] is not None and not results[i][0]]
+    if failures:
+        first = failures[0]
+        queue_events.put(("failed", actions[first].get("action", "unknown"),
+                          results[first][1], done, total))
+    elif queue_cancel.is_set() and skipped:
+        log("QUEUE_CANCELLED", {"done": done, "skipped": len(skipped)})
+        queue_events.put(("cancelled", None, None, done, total))
+    else:
         log("QUEUE_END")
-        messagebox.showinfo(
-            "Complete", f"✅ Queue finished\n\nLogged to: {LOG_FILE}")
+        queue_events.put(("finished", None, None, done, total))
+
+
+def set_queue_status(text, done=None, total=None):
+    if "status" in ui:
+        ui["status"].config(text=text)
+    if "progress" in ui and total:
+        ui["progress"].config(maximum=total, value=done)
+
+
+def poll_queue():
+    """Apply worker events on the Tk thread, reschedule while running"""
+    global is_processing_queue
+
+    while True:
+        try:
+            kind, name, error, done, total = queue_events.get_nowait()
+        except queue.Empty:
+            break
+
+        if kind == "progress":
+            paused = " (paused)" if not queue_resume.is_set() else ""
+            set_queue_status(f"▶ {done}/{total}: {name}{paused}", done, total)
+            continue
+
+        is_processing_queue = False
+        if kind == "finished":
+            set_queue_status(f"✅ Queue finished ({done}/{total})", done, total)
+        elif kind == "cancelled":
+            set_queue_status(f"⏹ Cancelled after {done}/{total}", done, total)
+        else:
+            set_queue_status(f"❌ Failed at {name} ({done}/{total})", done, total)
+            error_dbox("Execution Failed", f"ACTION: {name}\nERROR: {error}")
+        return
+
+    if is_processing_queue:
+        ui["root"].after(POLL_MS, poll_queue)
+
+
+def process_queue():
+    """Execute queue silently on a worker thread (no per-action DBOX)"""
+    global is_processing_queue
+
+    if is_processing_queue or not action_queue:
         return
 
     is_processing_queue = True
-    action = action_queue.pop(0)
-    name = action.get("action", "unknown")
-    params = action.get("params", {})
+    queue_cancel.clear()
+    queue_resume.set()
+    batch = [action_queue.popleft() for _ in range(len(action_queue))]
+    set_queue_status(f"▶ 0/{len(batch)}", 0, len(batch))
+    threading.Thread(target=run_queue_thread, args=(batch,), daemon=True).start()
+    ui["root"].after(POLL_MS, poll_queue)
 
-    try:
-        log("QUEUE_EXECUTE", {"action": name, "remaining": len(action_queue)})
-
-        payload = {"action": name, "params": params}
-        result = subprocess.run(
-            [sys.executable, COMPILE_PATH],
-            input=json.dumps(payload),
-            text=True,
-            capture_output=True,
-            timeout=120,
-            cwd=ROOT_DIR  # <--- THE ONLY CHANGE: Force CoreCompile to run from ROOT_DIR
-        )
-
-        if result.returncode != 0:
-            raise Exception(result.stderr)
-
-        log(f"QUEUE_SUCCESS: {name}")
-        process_queue()
 
-    except Exception as e:
-        log(f"QUEUE_FAILED: {name}", {"error": str(e)})
-        action_queue.clear()
-        is_processing_queue = False
-        error_dbox("Execution Failed", f"ACTION: {name}\nERROR: {e}")
+def toggle_pause_queue():
+    if not is_processing_queue:
+        return
+    if queue_resume.is_set():
+        queue_resume.clear()
+        log("QUEUE_PAUSED")
+        ui["status"].config(text=ui["status"].cget("text") + " (paused)")
+    else:
+        queue_resume.set()
+        log("QUEUE_RESUMED")
+        ui["status"].config(text=ui["status"].cget("text").replace(" (paused)", ""))
+
+
+def cancel_queue():
+    if is_processing_queue:
+        queue_cancel.set()
+        queue_resume.set()
 
 
 def execute_from_clipboard():
     """Main entry point from UI"""
+    if is_processing_queue:
+        messagebox.showwarning("Busy", "A queue is already running")
+        return
     actions = validate_payload()
     if actions:
         action_queue.clear()
@@ -346,33 +777,113 @@ def execute_from_clipboard():
         process_queue()
 
 
-def launch_vtt():
-    """Launch voice transcription"""
-    log("VTT_LAUNCH")
+def vtt_request(payload, timeout=VTT_TIMEOUT):
+    """One JSON-lines request to the resident vtt_processor --serve"""
+    with socket.create_connection(("127.0.0.1", VTT_PORT), timeout=PING_TIMEOUT) as conn:
+        conn.settimeout(timeout)
+        conn.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with conn.makefile("r", encoding="utf-8") as reply:
+            line = reply.readline()
+    if not line:
+        raise ConnectionError("VTT server closed the connection")
+    return json.loads(line)
+
+
+_vtt_lock = threading.Lock()
+
+
+def ensure_vtt_server():
+    """Ping the warm server; start it (model load) if nobody answers. False if it never came up."""
+    with _vtt_lock:
+        try:
+            vtt_request({"action": "ping"}, PING_TIMEOUT)
+            return True
+        except (OSError, ValueError):
+            pass
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        with open(LOG_DIR / "vtt_server.log", "a", encoding="utf-8") as server_log:
+            proc = subprocess.Popen(
+                [sys.executable, str(VTT_SCRIPT), "--serve", "--port", str(VTT_PORT)],
+                stdin=subprocess.DEVNULL, stdout=server_log, stderr=server_log,
+                cwd=BASE_DIR, creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        log("VTT_SERVER_START", {"pid": proc.pid})
+        deadline = time.monotonic() + VTT_LOAD_TIMEOUT
+        while time.monotonic() < deadline and proc.poll() is None:
+            try:
+                vtt_request({"action": "ping"}, PING_TIMEOUT)
+                return True
+            except (OSError, ValueError):
+                time.sleep(0.5)
+        log("VTT_SERVER_FAILED", {"returncode": proc.poll()})
+        return False
+
+
+vtt_events = queue.Queue()  # VTT worker thread → Tk thread
+vtt_running = False
+
+
+def run_vtt_thread():
+    """Worker: one capture + transcription; the outcome goes to vtt_events"""
     try:
-        result = subprocess.run([
-            sys.executable, VTT_SCRIPT,
-            "--clipboard", "--duration", "8"
-        ], capture_output=True, text=True, timeout=60)
-
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            log("VTT_SUCCESS", {"length": data.get("length", 0)})
-            messagebox.showinfo(
-                "VTT Success", f"✅ Transcribed {data.get('length', 0)} chars")
+        if ensure_vtt_server():
+            data = vtt_request({"action": "stream", "clipboard": True})
+        else:
+            result = subprocess.run([
+                sys.executable, VTT_SCRIPT,
+                "--clipboard", "--stream"
+            ], capture_output=True, text=True, timeout=VTT_LOAD_TIMEOUT + VTT_TIMEOUT)
+            if result.returncode != 0:
+                log("VTT_ERROR", {"stderr": result.stderr})
+                vtt_events.put(("error", "VTT Failed", result.stderr))
+                return
+            data = json.loads(result.stdout.strip().splitlines()[-1])  # progress lines come first
+
+        if data.get("status") == "success":
+            log("VTT_SUCCESS", {"length": data.get("length", 0), "seconds": data.get("seconds")})
+            vtt_events.put(("success", "VTT Success", f"✅ Transcribed {data.get('length', 0)} chars"))
         else:
-            log("VTT_ERROR", {"stderr": result.stderr})
-            error_dbox("VTT Failed", result.stderr)
+            log("VTT_ERROR", {"error": data.get("error")})
+            vtt_events.put(("error", "VTT Failed", data.get("error", "")))
     except Exception as e:
         log("VTT_EXCEPTION", {"error": str(e)})
-        error_dbox("VTT Error", str(e))
+        vtt_events.put(("error", "VTT Error", str(e)))
+
+
+def poll_vtt():
+    """Show the VTT outcome on the Tk thread once the worker posts it"""
+    global vtt_running
+
+    try:
+        kind, title, text = vtt_events.get_nowait()
+    except queue.Empty:
+        ui["root"].after(POLL_MS, poll_vtt)
+        return
+
+    vtt_running = False
+    if kind == "success":
+        messagebox.showinfo(title, text)
+    else:
+        error_dbox(title, text)
+
+
+def launch_vtt():
+    """Launch voice transcription (warm server; one-shot process if it cannot start)"""
+    global vtt_running
+
+    if vtt_running:
+        messagebox.showwarning("Busy", "Transcription already in progress")
+        return
+    log("VTT_LAUNCH")
+    vtt_running = True
+    threading.Thread(target=run_vtt_thread, daemon=True).start()
+    ui["root"].after(POLL_MS, poll_vtt)
 
 
 def build_ui():
     """Build Tkinter UI"""
     root = tk.Tk()
     root.title(f"Corelink v{__version__}")
-    root.geometry("520x420")
+    root.geometry("520x520")
     root.resizable(False, False)
 
     left = tk.Frame(root, padx=20, pady=20)
@@ -395,16 +906,32 @@ def build_ui():
     tk.Button(left, text="🧹 Clear Queue", **btn_style,
               command=lambda: action_queue.clear()).pack(pady=5)
     tk.Button(left, text="📜 Open Log", **btn_style,
-              command=lambda: subprocess.Popen(["notepad.exe", LOG_FILE])).pack(pady=5)
+              command=show_log_tail).pack(pady=5)
     tk.Button(left, text="❌ Exit", **btn_style,
               command=root.destroy).pack(pady=5)
 
+    # Queue progress
+    ui["root"] = root
+    ui["progress"] = ttk.Progressbar(left, length=220, mode="determinate")
+    ui["progress"].pack(pady=(10, 2))
+    ui["status"] = tk.Label(left, text="Idle", font=("Segoe UI", 8))
+    ui["status"].pack()
+    ctl_frame = tk.Frame(left)
+    ctl_frame.pack(pady=5)
+    tk.Button(ctl_frame, text="⏯ Pause", width=12,
+              command=toggle_pause_queue).pack(side="left", padx=3)
+    tk.Button(ctl_frame, text="⏹ Cancel", width=12,
+              command=cancel_queue).pack(side="left", padx=3)
+
     # Status controls
     tk.Button(right, text="📊 Queue Status", width=15, height=2, command=lambda: messagebox.showinfo(
         "Status", f"Queue: {len(action_queue)}\nProcessing: {is_processing_queue}")).pack(pady=5)
     tk.Button(right, text="🎤", **square_style, bg="#9B59A6",
               fg="white", command=launch_vtt).pack(pady=10)
 
+    # Load the speech model in the background so the first 🎤 press is warm
+    threading.Thread(target=ensure_vtt_server, daemon=True).start()
+
     log("UI_INITIALIZED")
     root.mainloop()
 
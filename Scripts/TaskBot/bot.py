@@ -1,47 +1,58 @@
 import discord
 from discord.ext import commands
-import json, base64, os, requests
+import os
+import asyncio
 from datetime import datetime
+from storage import GitHubStorage, GITHUB_API_URL, TASK_JOURNAL
+from task_index import PAGE_SIZE
 
-GITHUB_TOKEN = os.environ['GITHUB_TOKEN']
+FAKE_GITHUB = os.environ.get('FAKE_GITHUB')  # local dir: test mode against fake_github.py
+GITHUB_TOKEN = os.environ['GITHUB_TOKEN'] if not FAKE_GITHUB else os.environ.get('GITHUB_TOKEN', 'fake')
 GITHUB_REPO = os.environ.get('GITHUB_REPO', 'pykmintin/Repo')
 DISCORD_TOKEN = os.environ['DISCORD_TOKEN']
 PREFIX = os.environ.get('PREFIX', '!')
 AUTHORIZED_USER = int(os.environ.get('AUTHORIZED_USER', '0'))
 TASKS_FILE = 'tasks.json'
-GITHUB_API = f'https://api.github.com/repos/{GITHUB_REPO}/contents'
-
-def get_file_sha(path):
-    url = f'{GITHUB_API}/{path}'
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    r = requests.get(url, headers=headers)
-    return r.json()['sha'] if r.status_code == 200 else None
-
-def get_tasks():
-    url = f'{GITHUB_API}/{TASKS_FILE}'
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    r = requests.get(url, headers=headers)
-    if r.status_code == 404:
-        save_tasks([])
-        return []
-    r.raise_for_status()
-    return json.loads(base64.b64decode(r.json()['content']).decode('utf-8'))['tasks']
-
-def save_tasks(tasks):
-    url = f'{GITHUB_API}/{TASKS_FILE}'
-    headers = {'Authorization': f'token {GITHUB_TOKEN}'}
-    sha = get_file_sha(TASKS_FILE)
-    content = json.dumps({'tasks': tasks}, indent=2)
-    encoded = base64.b64encode(content.encode('utf-8')).decode('utf-8')
-    data = {'message': 'Update tasks', 'content': encoded}
-    if sha: data['sha'] = sha
-    r = requests.put(url, headers=headers, json=data)
-    r.raise_for_status()
+LINE_WIDTH = 90  # task text is cut here so a page always fits one message
+
+storage = GitHubStorage(GITHUB_TOKEN, GITHUB_REPO, TASKS_FILE,
+                        os.environ.get('GITHUB_API_URL', GITHUB_API_URL),
+                        os.environ.get('TASK_JOURNAL', TASK_JOURNAL))
+
+added_in = {}  # provisional task id → channel that was told it, until the add is committed
+
+def report_renumbered(ops, remap):
+    """After a commit: tell the channel when an added task got a different id"""
+    for op in ops:
+        if op['op'] != 'add':
+            continue
+        old = op['task']['id']
+        channel = added_in.pop(old, None)
+        if channel and old in remap:
+            asyncio.create_task(channel.send(
+                f'🔢 #{old} was taken by a task added elsewhere - "{op["task"]["text"]}" is now #{remap[old]}'))
+
+storage.on_commit = report_renumbered
+
+class TaskBot(commands.Bot):
+    async def setup_hook(self):
+        if FAKE_GITHUB:
+            import fake_github
+            self.fake_github, url = await fake_github.start(FAKE_GITHUB)
+            storage.url = f'{url}/repos/{GITHUB_REPO}/contents/{TASKS_FILE}'
+            print(f'Test mode: fake GitHub at {url} ({FAKE_GITHUB})')
+        await storage.start()
+
+    async def close(self):
+        await storage.close()
+        if FAKE_GITHUB:
+            await self.fake_github.cleanup()
+        await super().close()
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.reactions = True
-bot = commands.Bot(command_prefix=PREFIX, intents=intents)
+bot = TaskBot(command_prefix=PREFIX, intents=intents)
 
 def is_authorized(ctx):
     return ctx.author.id == AUTHORIZED_USER
@@ -53,54 +64,59 @@ async def add(ctx, prio: str, *, text: str):
     if prio not in ['h', 'n']:
         return await ctx.send('❌ Priority must be h/n')
     prio_full = 'high' if prio == 'h' else 'normal'
-    tasks = get_tasks()
-    task_id = max([t['id'] for t in tasks], default=0) + 1
-    task = {'id': task_id, 'text': text, 'prio': prio_full, 'done': False, 'created': datetime.utcnow().isoformat()}
-    tasks.append(task)
-    save_tasks(tasks)
-    await ctx.send(f'✅ #{task_id} [{prio}] {text}')
+    task = await storage.add_task({'text': text, 'prio': prio_full, 'done': False, 'created': datetime.utcnow().isoformat()})
+    added_in[task['id']] = ctx.channel
+    await ctx.send(f'✅ #{task["id"]} [{prio}] {text}')  # provisional: report_renumbered follows up if it changes
 
 @bot.command()
 @commands.check(is_authorized)
-async def tasks(ctx):
-    tasks = get_tasks()
-    if not tasks: return await ctx.send('📭 No tasks')
-    sorted_tasks = sorted(tasks, key=lambda x: (x['done'], x['prio'] != 'high'))
-    lines = [f"{'🔴' if t['prio']=='high' else '⚪'} #{t['id']} {'✅' if t['done'] else '⏳'} {t['text']}" for t in sorted_tasks]
-    await ctx.send('📋 **Tasks**\n' + '\n'.join(lines) + '\n\n✅ React to complete first undone task')
+async def tasks(ctx, *args):
+    """!tasks [page] [h|n] [done|undone|all] [search words]"""
+    page, prio, done, words = 1, None, None, []
+    for arg in args:
+        key = arg.lower()
+        if key.isdigit() and not words:
+            page = int(key)
+        elif key in ('h', 'n') and not words:
+            prio = 'high' if key == 'h' else 'normal'
+        elif key in ('done', 'undone', 'all') and not words:
+            done = {'done': True, 'undone': False, 'all': None}[key]
+        else:
+            words.append(arg)
+    index = await storage.index()
+    if not len(index): return await ctx.send('📭 No tasks')
+    items, total = index.page(page, PAGE_SIZE, prio, done, ' '.join(words))
+    if not total: return await ctx.send('📭 No matching tasks')
+    pages = -(-total // PAGE_SIZE)
+    if not items: return await ctx.send(f'❌ Page {page} of {pages}')
+    def line(t):
+        text = t['text'] if len(t['text']) <= LINE_WIDTH else t['text'][:LINE_WIDTH - 1] + '…'
+        return f"{'🔴' if t['prio']=='high' else '⚪'} #{t['id']} {'✅' if t['done'] else '⏳'} {text}"
+    footer = f'Page {page}/{pages} · {total} task{"s" if total != 1 else ""}'
+    await ctx.send('📋 **Tasks**\n' + '\n'.join(line(t) for t in items) + f'\n\n{footer}\n✅ React to complete first undone task')
 
 @bot.command()
 @commands.check(is_authorized)
 async def done(ctx, task_id: int):
-    tasks = get_tasks()
-    for t in tasks:
-        if t['id'] == task_id:
-            t['done'] = True
-            save_tasks(tasks)
-            return await ctx.send(f'✅ #{task_id} done')
+    if await storage.update_task(task_id, done=True):
+        return await ctx.send(f'✅ #{task_id} done')
     await ctx.send(f'❌ #{task_id} not found')
 
 @bot.command()
 @commands.check(is_authorized)
 async def delete(ctx, task_id: int):
-    tasks = get_tasks()
-    for i, t in enumerate(tasks):
-        if t['id'] == task_id:
-            removed = tasks.pop(i)
-            save_tasks(tasks)
-            return await ctx.send(f'🗑️ Deleted: #{task_id} "{removed["text"]}"')
+    removed = await storage.delete_task(task_id)
+    if removed:
+        return await ctx.send(f'🗑️ Deleted: #{task_id} "{removed["text"]}"')
     await ctx.send(f'❌ #{task_id} not found')
 
 @bot.event
 async def on_reaction_add(r, user):
     if user.bot or r.emoji != '✅' or user.id != AUTHORIZED_USER: return
     if r.message.author != bot.user or 'Tasks' not in r.message.content: return
-    tasks = get_tasks()
-    undone = [t for t in tasks if not t['done']]
-    if undone:
-        undone[0]['done'] = True
-        save_tasks(tasks)
-        await r.message.channel.send(f'✅ Reacted: #{undone[0]["id"]} done')
+    task = await storage.complete_first_undone()
+    if task:
+        await r.message.channel.send(f'✅ Reacted: #{task["id"]} done')
 
 @bot.event
 async def on_ready():
@@ -0,0 +1,95 @@
+"""
+Local stand-in for the GitHub contents API, for running TaskBot without GitHub.
+
+    python fake_github.py --root ./fake_repo --port 8765
+    GITHUB_API_URL=http://127.0.0.1:8765 python bot.py
+
+or set FAKE_GITHUB=./fake_repo and bot.py starts it in-process.
+Implements GET/PUT /repos/{owner}/{repo}/contents/{path} with GitHub's blob
+shas, ETag headers and status codes (404 missing, 409 stale sha, 422 sha
+required). Files live under root/{owner}/{repo}/.
+"""
+import base64
+import hashlib
+import argparse
+from pathlib import Path
+from aiohttp import web
+
+
+def blob_sha(data: bytes) -> str:
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def create_app(root) -> web.Application:
+    root = Path(root)
+    app = web.Application()
+    app['stats'] = {'GET': 0, 'PUT': 0}
+
+    def locate(request):
+        info = request.match_info
+        path = (root / info['owner'] / info['repo'] / info['path']).resolve()
+        if root.resolve() not in path.parents:
+            raise web.HTTPBadRequest(text='path escapes the fake repo')
+        return path
+
+    def not_found():
+        return web.json_response({'message': 'Not Found'}, status=404)
+
+    async def get_contents(request):
+        app['stats']['GET'] += 1
+        path = locate(request)
+        if not path.is_file():
+            return not_found()
+        data = path.read_bytes()
+        sha = blob_sha(data)
+        etag = f'"{sha}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.json_response({
+            'name': path.name, 'path': request.match_info['path'], 'sha': sha, 'size': len(data),
+            'type': 'file', 'encoding': 'base64', 'content': base64.encodebytes(data).decode('ascii')
+        }, headers={'ETag': etag})
+
+    async def put_contents(request):
+        app['stats']['PUT'] += 1
+        path = locate(request)
+        body = await request.json()
+        current = blob_sha(path.read_bytes()) if path.is_file() else None
+        if current and 'sha' not in body:
+            return web.json_response({'message': '"sha" wasn\'t supplied.'}, status=422)
+        if current and body['sha'] != current:
+            return web.json_response({'message': f'{path.name} does not match {body["sha"]}'}, status=409)
+        data = base64.b64decode(body['content'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        sha = blob_sha(data)
+        return web.json_response({
+            'content': {'name': path.name, 'path': request.match_info['path'], 'sha': sha, 'size': len(data)},
+            'commit': {'message': body.get('message', ''), 'sha': hashlib.sha1(sha.encode()).hexdigest()}
+        }, status=200 if current else 201)
+
+    route = '/repos/{owner}/{repo}/contents/{path:.+}'
+    app.router.add_get(route, get_contents)
+    app.router.add_put(route, put_contents)
+    return app
+
+
+async def start(root, host='127.0.0.1', port=0):
+    """Run inside the current loop; returns (runner, base_url). port=0 picks a free one."""
+    runner = web.AppRunner(create_app(root))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f'http://{host}:{port}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake GitHub contents API')
+    parser.add_argument('--root', default='fake_repo')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    Path(args.root).mkdir(parents=True, exist_ok=True)
+    web.run_app(create_app(args.root), host='127.0.0.1', port=args.port)
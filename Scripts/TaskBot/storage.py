@@ -0,0 +1,279 @@
+"""
+Async GitHub contents-API storage for tasks.json, with a local write journal.
+
+One pooled aiohttp session (keep-alive) per process, created on first use
+inside the bot's event loop. GitHub's copy of the list, its blob sha and the
+response ETag are cached in memory; local edits live in an append-only
+journal until the flusher commits them:
+
+    edit()    diff the caller's changes into ops (add / update / delete),
+              fsync them to the journal and return - no network
+    reads     conditional GET (If-None-Match, a 304 reuses the cache) with
+              the pending ops replayed on top, kept as a TaskIndex that
+              edits update incrementally
+    flusher   FLUSH_DELAY s after the last edit (FLUSH_MAX_DELAY at most),
+              or at close(): replay every pending op onto GitHub's copy and
+              PUT once with the cached sha; on 409 fetch theirs and replay
+              again (up to MAX_CONFLICT_RETRIES)
+    restart   ops still in the journal are replayed and flushed by start()
+
+An add whose id was taken on GitHub in the meantime is renumbered at
+commit time; on_commit(ops, remap) is called after every commit so the
+caller can tell whoever saw the provisional id.
+
+    storage = GitHubStorage(token, repo)
+    await storage.start()
+    index = await storage.index()         # read-only view: page(), first(), get()
+    task = await storage.add_task({...})  # add/update/delete: one op, no list copy
+    async with storage.edit() as tasks:   # arbitrary edits on a copy, diffed into ops
+        tasks.append(task)
+"""
+import copy
+import json
+import base64
+import asyncio
+from contextlib import asynccontextmanager
+import aiohttp
+from task_index import TaskIndex, diff_tasks, apply_ops
+from task_journal import TaskJournal, TASK_JOURNAL
+
+GITHUB_API_URL = 'https://api.github.com'
+TASKS_FILE = 'tasks.json'
+REQUEST_TIMEOUT = 15  # seconds per HTTP call
+POOL_SIZE = 4
+KEEPALIVE = 60  # seconds an idle connection is kept
+MAX_CONFLICT_RETRIES = 3
+FLUSH_DELAY = 10.0  # quiet seconds before pending edits are committed
+FLUSH_MAX_DELAY = 60.0  # commit at least this often while edits keep coming
+FLUSH_RETRY = 30.0  # seconds before retrying a failed commit
+
+
+class GitHubStorage:
+    def __init__(self, token, repo, path=TASKS_FILE, api_url=GITHUB_API_URL, journal=TASK_JOURNAL):
+        self.url = f'{api_url.rstrip("/")}/repos/{repo}/contents/{path}'
+        self.headers = {'Authorization': f'token {token}', 'Accept': 'application/vnd.github+json'}
+        self.tasks = None  # GitHub's copy, None until first read
+        self.sha = None  # blob sha of that copy
+        self.etag = None
+        self._puts = 0  # successful PUTs; a GET that overlapped one is stale
+        self._index = None  # TaskIndex of GitHub's copy + pending ops, built on demand
+        self.journal = TaskJournal(journal)
+        self.pending = self.journal.load()  # ops not yet committed, oldest first
+        self.stats = {'requests': 0, 'not_modified': 0, 'conflicts': 0, 'commits': 0}
+        self._session = None
+        self._lock = asyncio.Lock()  # one edit at a time
+        self._flush_lock = asyncio.Lock()
+        self._dirty = asyncio.Event()
+        self._flusher = None
+        self.on_commit = None  # (committed ops, {provisional id: final id}) -> None
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=POOL_SIZE, keepalive_timeout=KEEPALIVE)
+            self._session = aiohttp.ClientSession(
+                headers=self.headers, connector=connector,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT))
+        return self._session
+
+    async def start(self):
+        """Start the flusher; edits left in the journal by a crash are committed first"""
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        if self.pending:
+            print(f'Recovering {len(self.pending)} journaled task edit(s)')
+            self._dirty.set()
+
+    async def close(self):
+        """Commit whatever is pending, then release the session"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        try:
+            await self.flush()
+        finally:
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+
+    # -------- GitHub --------
+
+    async def refresh(self):
+        """Bring GitHub's copy up to date; a 304 costs no download"""
+        headers = {'If-None-Match': self.etag} if self.etag and self.tasks is not None else {}
+        puts = self._puts
+        self.stats['requests'] += 1
+        async with self.session.get(self.url, headers=headers) as r:
+            if self._puts != puts:
+                return  # our PUT landed while this GET was in flight: its copy is at least as new
+            if r.status == 304:
+                self.stats['not_modified'] += 1
+                return
+            if r.status == 404:
+                body = None
+            else:
+                r.raise_for_status()
+                body = await r.json()
+                etag = r.headers.get('ETag')
+        if self._puts != puts:
+            return
+        if body is None:
+            self.tasks, self.sha, self.etag, self._index = [], None, None, None
+            await self._put([], 'Create tasks')  # create it, as before
+            return
+        if body['sha'] != self.sha or self.tasks is None:  # not just our own last PUT
+            self.tasks = json.loads(base64.b64decode(body['content']).decode('utf-8'))['tasks']
+            self._index = None
+        self.sha, self.etag = body['sha'], etag
+
+    async def _put(self, tasks, message='Update tasks'):
+        """PUT against the cached sha; False on a conflict (409, or 422 for a missing sha)"""
+        content = json.dumps({'tasks': tasks}, indent=2)
+        data = {'message': message,
+                'content': base64.b64encode(content.encode('utf-8')).decode('utf-8')}
+        if self.sha:
+            data['sha'] = self.sha
+        self.stats['requests'] += 1
+        async with self.session.put(self.url, json=data) as r:
+            if r.status in (409, 422):
+                self.stats['conflicts'] += 1
+                return False
+            r.raise_for_status()
+            self.sha = (await r.json())['content']['sha']
+        self._puts += 1
+        self.tasks = tasks
+        self.etag = None  # the next read downloads once and gets a fresh ETag
+        return True
+
+    # -------- Reads / edits --------
+
+    def _current(self):
+        if self._index is None:
+            self._index = TaskIndex(copy.deepcopy(self.tasks or []))
+            self._index.apply(self.pending)
+        return self._index
+
+    async def _loaded(self):
+        if self.tasks is None:
+            await self.refresh()
+        return self._current()
+
+    async def _record(self, ops):
+        """Journal ops (fsync off the loop), then apply them to the live index"""
+        index = self._current()
+        await asyncio.to_thread(self.journal.append, ops)
+        self.pending.extend(ops)
+        index.apply(ops)
+        self._dirty.set()
+
+    async def index(self):
+        """Up-to-date TaskIndex (one conditional GET); treat it as read-only"""
+        await self.refresh()
+        return self._current()
+
+    async def get_tasks(self):
+        return copy.deepcopy((await self.index()).tasks())
+
+    async def add_task(self, fields):
+        """Add a task with the next id; returns it"""
+        async with self._lock:
+            index = await self._loaded()
+            task = {'id': index.next_id, **fields}
+            await self._record([{'op': 'add', 'task': task}])
+            return copy.deepcopy(task)
+
+    async def update_task(self, task_id, **fields):
+        """Change fields of one task; returns it, or None if there is no such id"""
+        async with self._lock:
+            task = (await self._loaded()).get(task_id)
+            if task is None:
+                return None
+            changed = {key: value for key, value in fields.items() if task.get(key) != value}
+            if changed:
+                await self._record([{'op': 'update', 'id': task_id, 'fields': changed}])
+            return copy.deepcopy(task)
+
+    async def delete_task(self, task_id):
+        """Remove one task; returns it, or None if there is no such id"""
+        async with self._lock:
+            task = (await self._loaded()).get(task_id)
+            if task is None:
+                return None
+            removed = copy.deepcopy(task)
+            await self._record([{'op': 'delete', 'id': task_id}])
+            return removed
+
+    async def complete_first_undone(self):
+        """Mark the oldest undone task done; returns it, or None if all are done"""
+        async with self._lock:
+            task = (await self._loaded()).first(done=False)
+            if task is None:
+                return None
+            await self._record([{'op': 'update', 'id': task['id'], 'fields': {'done': True}}])
+            return copy.deepcopy(task)
+
+    @asynccontextmanager
+    async def edit(self):
+        """Mutate a copy of the current list; changes are journaled (no network) and flushed later"""
+        async with self._lock:
+            base = copy.deepcopy((await self._loaded()).tasks())
+            tasks = copy.deepcopy(base)
+            yield tasks
+            ops = diff_tasks(base, tasks)
+            if ops:
+                await self._record(ops)
+
+    # -------- Flushing --------
+
+    async def flush(self):
+        """Commit every pending op in one PUT; returns the number of ops committed"""
+        async with self._flush_lock:
+            batch = list(self.pending)
+            if not batch:
+                return 0
+            for _ in range(MAX_CONFLICT_RETRIES):
+                if self.tasks is None:
+                    await self.refresh()
+                merged, remap = apply_ops(copy.deepcopy(self.tasks), batch)
+                if await self._put(merged, f'Update tasks ({len(batch)} change{"s" if len(batch) != 1 else ""})'):
+                    break
+                self.etag = None
+                await self.refresh()  # full GET: theirs, then replay again
+            else:
+                raise RuntimeError(f'tasks.json kept changing underneath us ({MAX_CONFLICT_RETRIES} conflicts)')
+
+            # Edits made while the PUT was in flight stay pending, following any renumbering
+            remaining = self.pending[len(batch):]
+            for op in remaining:
+                if op.get('id') in remap:
+                    op['id'] = remap[op['id']]
+            self.pending = remaining
+            if remap:
+                self._index = None  # ids moved: rebuild from GitHub's copy + what is left
+                print('Renumbered task(s) whose id was taken on GitHub: '
+                      + ', '.join(f'#{old} → #{new}' for old, new in remap.items()))
+            await asyncio.to_thread(self.journal.compact, len(batch), remap)
+            self.stats['commits'] += 1
+            if self.on_commit:
+                self.on_commit(batch, remap)
+            return len(batch)
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._dirty.wait()
+            first = loop.time()
+            while True:  # debounce: FLUSH_DELAY of quiet, FLUSH_MAX_DELAY at most
+                self._dirty.clear()
+                timeout = min(FLUSH_DELAY, FLUSH_MAX_DELAY - (loop.time() - first))
+                if timeout <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._dirty.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await asyncio.shield(self.flush())  # close() must not cut a commit in half
+            except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError) as e:
+                print(f'Task flush failed ({e}); retrying in {FLUSH_RETRY:.0f}s')
+                await asyncio.sleep(FLUSH_RETRY)
+                self._dirty.set()
@@ -0,0 +1,153 @@
+"""
+In-memory task index.
+
+by_id      id → task dict (insertion order = order in tasks.json)
+order      sorted (done, prio rank, id) keys: undone before done, high before
+           normal, oldest first - the order !tasks lists them in
+next_id    counter for new tasks, never reused within a process
+
+Filters on done / prio map to contiguous slices of `order`, so a page of
+!tasks costs O(log n + page) without a text filter and one pass over the
+matching slices with one.
+
+diff_tasks / apply_ops turn list edits into journal ops and replay them.
+"""
+from bisect import bisect_left, insort
+import copy
+
+PRIO_RANK = {'high': 0, 'normal': 1}
+PAGE_SIZE = 15
+
+
+def sort_key(task):
+    return (bool(task.get('done')), PRIO_RANK.get(task.get('prio'), 1), task['id'])
+
+
+class TaskIndex:
+    def __init__(self, tasks=()):
+        self.by_id = {task['id']: task for task in tasks}
+        self.order = sorted(sort_key(task) for task in self.by_id.values())
+        self.next_id = max(self.by_id, default=0) + 1
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def tasks(self):
+        return list(self.by_id.values())
+
+    def get(self, task_id):
+        return self.by_id.get(task_id)
+
+    # -------- Mutations (dicts are stored as given and changed in place) --------
+
+    def add(self, task):
+        self.by_id[task['id']] = task
+        insort(self.order, sort_key(task))
+        self.next_id = max(self.next_id, task['id'] + 1)
+
+    def remove(self, task_id):
+        task = self.by_id.pop(task_id)
+        del self.order[bisect_left(self.order, sort_key(task))]
+        return task
+
+    def update(self, task_id, fields):
+        task = self.by_id[task_id]
+        del self.order[bisect_left(self.order, sort_key(task))]
+        task.update(fields)
+        insort(self.order, sort_key(task))
+        return task
+
+    def apply(self, ops):
+        """
+        Replay journal ops. Updates and deletes of tasks that no longer exist
+        are dropped. An add whose id is taken by an identical task was already
+        committed (a PUT whose reply was lost) and is skipped; one whose id is
+        taken by another task is renumbered, and later ops on that id follow
+        it. Returns {old id: new id}.
+        """
+        remap = {}
+        for op in ops:
+            if op['op'] == 'add':
+                task = copy.deepcopy(op['task'])
+                existing = self.by_id.get(task['id'])
+                if existing == task:
+                    continue
+                if existing is not None:
+                    remap[task['id']] = self.next_id
+                    task['id'] = self.next_id
+                self.add(task)
+                continue
+            task_id = remap.get(op['id'], op['id'])
+            if task_id not in self.by_id:
+                continue
+            if op['op'] == 'update':
+                self.update(task_id, op['fields'])
+            elif op['op'] == 'delete':
+                self.remove(task_id)
+        return remap
+
+    # -------- Queries --------
+
+    def _slices(self, prio=None, done=None):
+        """(lo, hi) ranges of `order` matching the done / prio filters, in list order"""
+        ranks = sorted(set(PRIO_RANK.values())) if prio is None else [PRIO_RANK.get(prio, 1)]
+        states = [False, True] if done is None else [done]
+        for state in states:
+            for rank in ranks:
+                lo = bisect_left(self.order, (state, rank))
+                hi = bisect_left(self.order, (state, rank + 1))
+                if lo < hi:
+                    yield lo, hi
+
+    def first(self, prio=None, done=None):
+        """Oldest task matching the filters, or None"""
+        heads = [self.order[lo] for lo, _ in self._slices(prio, done)]
+        return self.by_id[min(heads, key=lambda key: key[2])[2]] if heads else None
+
+    def page(self, page=1, per_page=PAGE_SIZE, prio=None, done=None, text=None):
+        """(tasks on the page, total matches) - only the requested page is materialised"""
+        start = (max(page, 1) - 1) * per_page
+        items = []
+        if not text:
+            total = 0
+            for lo, hi in self._slices(prio, done):
+                take_from = max(lo, lo + start - total)
+                take_to = min(hi, take_from + per_page - len(items))
+                for key in self.order[take_from:take_to]:
+                    items.append(self.by_id[key[2]])
+                total += hi - lo
+            return items, total
+
+        needle = text.lower()
+        total = 0
+        for lo, hi in self._slices(prio, done):
+            for key in self.order[lo:hi]:
+                task = self.by_id[key[2]]
+                if needle in task.get('text', '').lower():
+                    if start <= total < start + per_page:
+                        items.append(task)
+                    total += 1
+        return items, total
+
+
+def diff_tasks(base, ours):
+    """Ops turning base into ours, matching tasks by id"""
+    ours_by_id = {t['id']: t for t in ours}
+    base_by_id = {t['id']: t for t in base}
+    ops = [{'op': 'delete', 'id': t['id']} for t in base if t['id'] not in ours_by_id]
+    for task in ours:
+        old = base_by_id.get(task['id'])
+        if old is None:
+            ops.append({'op': 'add', 'task': copy.deepcopy(task)})
+            continue
+        fields = {key: value for key, value in task.items() if old.get(key) != value}
+        if fields:
+            ops.append({'op': 'update', 'id': task['id'], 'fields': copy.deepcopy(fields)})
+    return ops
+
+
+def apply_ops(tasks, ops):
+    """Replay ops onto tasks (see TaskIndex.apply); returns (tasks, {old id: new id})"""
+    index = TaskIndex(tasks)
+    remap = index.apply(ops)
+    return index.tasks(), remap
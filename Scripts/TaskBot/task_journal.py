@@ -0,0 +1,70 @@
+"""
+Local write journal for TaskBot: ops (add / update / delete) that are not yet
+committed to GitHub, one JSON object per line, fsynced on every append.
+"""
+import os
+import json
+import threading
+from pathlib import Path
+
+TASK_JOURNAL = 'task_journal.jsonl'
+
+
+class TaskJournal:
+    """Append-only JSONL of ops not yet committed to GitHub"""
+
+    def __init__(self, path=TASK_JOURNAL):
+        self.path = Path(path)
+        self._lock = threading.Lock()  # append() and compact() run on worker threads
+
+    def load(self):
+        with self._lock:
+            return self._read()
+
+    def _read(self):
+        ops = []
+        if not self.path.exists():
+            return ops
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    ops.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # torn line from a crash mid-append
+        return ops
+
+    def append(self, ops):
+        with self._lock:
+            self._append(ops)
+
+    def _append(self, ops):
+        torn = False
+        if self.path.exists() and self.path.stat().st_size:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(('\n' if torn else '') + ''.join(json.dumps(op) + '\n' for op in ops))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def compact(self, committed, remap=None):
+        """
+        Drop the first `committed` ops (the last commit) and renumber the rest
+        by remap. Works from the file as it is now, so ops appended while
+        the commit was in flight are kept.
+        """
+        with self._lock:
+            remaining = self._read()[committed:]
+            for op in remaining:
+                if op.get('id') in (remap or {}):
+                    op['id'] = remap[op['id']]
+            if not remaining:
+                self.path.unlink(missing_ok=True)
+                return
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(op) + '\n' for op in remaining))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for GitHubStorage's journal handling around a commit. The PUT is
+replaced by a coroutine, so no GitHub (or fake server) is involved.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+import pytest
+pytest.importorskip("aiohttp")
+
+from storage import GitHubStorage
+from task_journal import TaskJournal
+
+def test_edit_during_put_stays_journaled():
+    """An add whose journal append lands while a PUT is in flight survives the compaction"""
+    print("=== Testing journal compaction during a commit ===")
+
+    async def run(journal_path):
+        storage = GitHubStorage('token', 'owner/repo', journal=journal_path)
+        storage.tasks, storage.sha = [], 'sha0'
+        await storage.add_task({'text': 'first', 'prio': 'normal', 'done': False})
+
+        appended, release = threading.Event(), threading.Event()
+        real_append = storage.journal.append
+
+        def slow_append(ops):
+            real_append(ops)  # on disk...
+            appended.set()
+            release.wait(5)   # ...but _record has not added it to pending yet
+
+        storage.journal.append = slow_append
+        added = []
+
+        async def fake_put(tasks, message='Update tasks'):
+            added.append(asyncio.create_task(
+                storage.add_task({'text': 'during put', 'prio': 'high', 'done': False})))
+            await asyncio.to_thread(appended.wait, 5)
+            storage.tasks, storage.sha = tasks, 'sha1'
+            storage._puts += 1
+            return True
+
+        storage._put = fake_put
+        assert await storage.flush() == 1
+        release.set()
+        second = await added[0]
+
+        journaled = TaskJournal(journal_path).load()
+        print(f"Journal after commit: {journaled}")
+        assert journaled == [{'op': 'add', 'task': second}], "Edit made during the PUT was lost"
+        assert storage.pending == journaled
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        asyncio.run(run(Path(tmp_dir) / 'journal.jsonl'))
+    print("✓ Journal compaction test passed\n")
+
+if __name__ == "__main__":
+    test_edit_during_put_stays_journaled()
+    print("🎉 All TaskBot storage tests passed!")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the pure-Python parts of TaskBot storage: TaskIndex (paging,
+replaying ops), diff_tasks and the local TaskJournal. No aiohttp or GitHub.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import copy
+import random
+import tempfile
+from pathlib import Path
+from task_index import TaskIndex, sort_key, diff_tasks, apply_ops
+from task_journal import TaskJournal
+
+def make_tasks(n, seed=0):
+    rng = random.Random(seed)
+    return [{'id': i, 'text': f'task {i} {rng.choice(["milk", "eggs", "bread"])}',
+             'prio': rng.choice(['high', 'normal']), 'done': rng.random() < 0.3}
+            for i in range(1, n + 1)]
+
+def test_page_matches_brute_force():
+    """Every filter / page combination agrees with sort + filter + slice"""
+    print("=== Testing TaskIndex.page() ===")
+    tasks = make_tasks(200)
+    index = TaskIndex(copy.deepcopy(tasks))
+    ordered = sorted(tasks, key=sort_key)
+    for prio in (None, 'high', 'normal'):
+        for done in (None, True, False):
+            for text in (None, 'MILK', 'task 1'):
+                expected = [t for t in ordered
+                            if (prio is None or t['prio'] == prio)
+                            and (done is None or t['done'] == done)
+                            and (not text or text.lower() in t['text'].lower())]
+                for per_page in (1, 7, 15, 500):
+                    for page in (0, 1, 2, 5, 1000):
+                        items, total = index.page(page, per_page, prio, done, text)
+                        start = (max(page, 1) - 1) * per_page
+                        assert total == len(expected), (prio, done, text)
+                        assert items == expected[start:start + per_page], (prio, done, text, per_page, page)
+    assert TaskIndex().page(1) == ([], 0)
+    print("✓ All page() tests passed\n")
+
+def test_first_and_mutations_keep_order():
+    """first() is the oldest match; add/update/remove keep `order` sorted"""
+    index = TaskIndex(make_tasks(50))
+    undone = sorted(t['id'] for t in index.tasks() if not t['done'])
+    assert index.first(done=False)['id'] == undone[0]
+
+    index.update(undone[0], {'done': True})
+    assert index.first(done=False)['id'] == undone[1]
+    index.remove(undone[1])
+    assert index.first(done=False)['id'] == undone[2]
+    index.add({'id': index.next_id, 'text': 'new', 'prio': 'high', 'done': False})
+    assert index.order == sorted(sort_key(t) for t in index.tasks())
+    assert index.next_id == 52
+    assert TaskIndex().first() is None
+
+def test_apply_renumbers_and_skips():
+    """Colliding adds move to next_id (later ops follow); replayed adds are skipped"""
+    print("=== Testing TaskIndex.apply() ===")
+    theirs = {'id': 3, 'text': 'added elsewhere', 'prio': 'normal', 'done': False}
+    index = TaskIndex([{'id': 1, 'text': 'a', 'prio': 'high', 'done': False},
+                       {'id': 2, 'text': 'b', 'prio': 'normal', 'done': False}, theirs])
+    ours = {'id': 3, 'text': 'ours', 'prio': 'high', 'done': False}
+    already_committed = {'id': 1, 'text': 'a', 'prio': 'high', 'done': False}
+    remap = index.apply([
+        {'op': 'add', 'task': ours},
+        {'op': 'update', 'id': 3, 'fields': {'done': True}},  # follows ours to #4
+        {'op': 'add', 'task': already_committed},              # lost PUT reply: skip
+        {'op': 'update', 'id': 99, 'fields': {'done': True}},  # gone: dropped
+        {'op': 'delete', 'id': 98},
+        {'op': 'delete', 'id': 2},
+    ])
+    print(f"Remap: {remap}")
+    assert remap == {3: 4}
+    assert index.get(3) == theirs, "Remote task was changed"
+    assert index.get(4)['text'] == 'ours' and index.get(4)['done'] is True
+    assert ours['id'] == 3, "apply() mutated the op it was given"
+    assert index.get(2) is None
+    assert [t['id'] for t in index.tasks()] == [1, 3, 4]
+    assert index.order == sorted(sort_key(t) for t in index.tasks())
+    print("✓ All apply() tests passed\n")
+
+def test_diff_tasks_round_trip():
+    """diff_tasks(base, ours) replayed onto base gives ours"""
+    base = make_tasks(30)
+    ours = copy.deepcopy(base)
+    del ours[4]
+    ours[0]['done'] = not ours[0]['done']
+    ours[10]['text'] = 'renamed'
+    ours.append({'id': 31, 'text': 'added', 'prio': 'high', 'done': False})
+    ops = diff_tasks(base, ours)
+    assert [op['op'] for op in ops].count('delete') == 1 and ops[0]['op'] == 'delete'
+    assert {op['op'] for op in ops} == {'delete', 'update', 'add'}
+    assert next(op for op in ops if op.get('id') == 1)['fields'] == {'done': ours[0]['done']}
+    merged, remap = apply_ops(copy.deepcopy(base), ops)
+    assert remap == {}
+    assert merged == ours
+    assert diff_tasks(base, copy.deepcopy(base)) == []
+
+def test_task_journal():
+    """Appends survive reloads; a torn last line is skipped and not glued to the next op"""
+    print("=== Testing TaskJournal ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "journal.jsonl"
+        journal = TaskJournal(path)
+        assert journal.load() == []
+        first = [{'op': 'add', 'task': {'id': 1, 'text': 'a'}}, {'op': 'delete', 'id': 7}]
+        journal.append(first)
+        assert TaskJournal(path).load() == first
+
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"op": "upd')  # crash mid-append
+        assert TaskJournal(path).load() == first
+        journal.append([{'op': 'update', 'id': 1, 'fields': {'done': True}}])
+        loaded = TaskJournal(path).load()
+        print(f"After torn line: {loaded}")
+        assert loaded == first + [{'op': 'update', 'id': 1, 'fields': {'done': True}}]
+
+        journal.compact(1, {1: 5})
+        assert TaskJournal(path).load() == [{'op': 'delete', 'id': 7},
+                                            {'op': 'update', 'id': 5, 'fields': {'done': True}}]
+        assert not path.with_suffix('.tmp').exists()
+        journal.compact(2)
+        assert not path.exists()
+    print("✓ All TaskJournal tests passed\n")
+
+if __name__ == "__main__":
+    test_page_matches_brute_force()
+    test_first_and_mutations_keep_order()
+    test_apply_renumbers_and_skips()
+    test_diff_tasks_round_trip()
+    test_task_journal()
+    print("🎉 All TaskBot storage tests passed!")
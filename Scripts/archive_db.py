@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+SQLite conversation archive for the CORE memory store (optional backend).
+
+Enable for CoreCompile with CORELINK_STORAGE=sqlite. Conversations,
+turns, topics, keywords, signatures and code blocks live in normalized
+tables; messages_fts is an FTS5 index over turn content.
+
+Usage:
+    python archive_db.py migrate [--chatlogs DIR] [--index FILE] [--manifest BASE]
+    python archive_db.py search "query terms" [--limit N]
+"""
+import os
+import sys
+import json
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+
+DB_PATH = os.environ.get("CORELINK_DB", "Archive/core_memory.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id              TEXT PRIMARY KEY,
+    title           TEXT,
+    timestamp       TEXT,
+    relevance_score REAL,
+    raw             TEXT,
+    extra           TEXT
+);
+CREATE TABLE IF NOT EXISTS manifest (
+    conv_id TEXT PRIMARY KEY,
+    meta    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id      INTEGER PRIMARY KEY,
+    conv_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    seq     INTEGER NOT NULL,
+    turn_id INTEGER,
+    role    TEXT,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_conv ON messages(conv_id, seq);
+CREATE TABLE IF NOT EXISTS topics (
+    conv_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    topic   TEXT NOT NULL,
+    PRIMARY KEY (conv_id, topic)
+);
+CREATE INDEX IF NOT EXISTS idx_topics_topic ON topics(topic);
+CREATE TABLE IF NOT EXISTS keywords (
+    conv_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    keyword TEXT NOT NULL,
+    PRIMARY KEY (conv_id, keyword)
+);
+CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON keywords(keyword);
+CREATE TABLE IF NOT EXISTS signatures (
+    conv_id   TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    signature TEXT NOT NULL,
+    PRIMARY KEY (conv_id, signature)
+);
+CREATE INDEX IF NOT EXISTS idx_signatures_sig ON signatures(signature);
+CREATE TABLE IF NOT EXISTS code_blocks (
+    conv_id     TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    block_id    TEXT NOT NULL,
+    language    TEXT,
+    line_count  INTEGER,
+    description TEXT,
+    hash        TEXT,
+    full_code   TEXT,
+    PRIMARY KEY (conv_id, block_id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+ROLE_PREFIXES = {"User:": "user", "Kimi:": "assistant", "Assistant:": "assistant"}
+
+_conn = None
+_lock = threading.RLock()
+
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    """Shared connection (CoreCompile worker threads serialize on _lock)"""
+    global _conn
+    with _lock:
+        if _conn is None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            _conn = sqlite3.connect(path, check_same_thread=False)
+            _conn.row_factory = sqlite3.Row
+            _conn.execute("PRAGMA journal_mode=WAL")
+            _conn.execute("PRAGMA foreign_keys=ON")
+            _conn.executescript(SCHEMA)
+        return _conn
+
+
+def close() -> None:
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+# -------- Writes --------
+
+
+def _messages_from_raw(raw: str) -> list:
+    """CoreCompile entries only carry raw text: recover User:/Kimi: turns"""
+    messages = []
+    turn = 0
+    for line in raw.splitlines():
+        for prefix, role in ROLE_PREFIXES.items():
+            if line.startswith(prefix):
+                if role == "user":
+                    turn += 1
+                messages.append({"role": role, "content": line[len(prefix):].strip(), "turn_id": turn})
+                break
+    return messages
+
+
+def save_conversation(entry: dict) -> str:
+    """Insert or replace one conversation (CoreCompile or chat_processor_v2 entry)"""
+    conv_id = entry["id"]
+    known = {"id", "title", "timestamp", "relevance_score", "raw", "messages",
+             "topics", "keywords", "signatures", "code_blocks"}
+    extra = {k: v for k, v in entry.items() if k not in known}
+    messages = entry.get("messages") or _messages_from_raw(entry.get("raw", ""))
+
+    conn = connect()
+    with _lock, conn:
+        conn.execute("DELETE FROM conversations WHERE id = ?", (conv_id,))
+        conn.execute(
+            "INSERT INTO conversations (id, title, timestamp, relevance_score, raw, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (conv_id, entry.get("title"), entry.get("timestamp"), entry.get("relevance_score"),
+             entry.get("raw"), json.dumps(extra, default=str)))
+        conn.executemany(
+            "INSERT INTO messages (conv_id, seq, turn_id, role, content) VALUES (?, ?, ?, ?, ?)",
+            [(conv_id, seq, m.get("turn_id"), m.get("role"), m.get("content", ""))
+             for seq, m in enumerate(messages)])
+        conn.executemany("INSERT OR IGNORE INTO topics VALUES (?, ?)",
+                         [(conv_id, t) for t in entry.get("topics", [])])
+        conn.executemany("INSERT OR IGNORE INTO keywords VALUES (?, ?)",
+                         [(conv_id, k) for k in entry.get("keywords", [])])
+        conn.executemany("INSERT OR IGNORE INTO signatures VALUES (?, ?)",
+                         [(conv_id, s) for s in entry.get("signatures", [])])
+        conn.executemany(
+            "INSERT OR REPLACE INTO code_blocks VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(conv_id, block_id, b.get("language"), b.get("line_count"), b.get("description"),
+              b.get("hash"), b.get("full_code"))
+             for block_id, b in (entry.get("code_blocks") or {}).items()])
+    return f"sqlite:{conv_id}"
+
+
+def update_manifest(conv_id: str, metadata: dict) -> None:
+    conn = connect()
+    with _lock, conn:
+        conn.execute("INSERT OR REPLACE INTO manifest VALUES (?, ?)",
+                     (conv_id, json.dumps(metadata, default=str)))
+
+# -------- Reads --------
+
+
+def get_manifest(conv_id: str) -> dict | None:
+    with _lock:
+        row = connect().execute("SELECT meta FROM manifest WHERE conv_id = ?", (conv_id,)).fetchone()
+    return json.loads(row["meta"]) if row else None
+
+
+def load_conversation(conv_id: str) -> dict | None:
+    """Rebuild the entry dict that was saved"""
+    conn = connect()
+    with _lock:
+        row = conn.execute("SELECT * FROM conversations WHERE id = ?", (conv_id,)).fetchone()
+        if row is None:
+            return None
+        entry = json.loads(row["extra"] or "{}")
+        entry.update({"id": row["id"], "title": row["title"], "timestamp": row["timestamp"],
+                      "relevance_score": row["relevance_score"]})
+        if row["raw"] is not None:
+            entry["raw"] = row["raw"]
+        entry["messages"] = [dict(m) for m in conn.execute(
+            "SELECT role, content, turn_id FROM messages WHERE conv_id = ? ORDER BY seq", (conv_id,))]
+        entry["topics"] = [r[0] for r in conn.execute(
+            "SELECT topic FROM topics WHERE conv_id = ?", (conv_id,))]
+        entry["keywords"] = [r[0] for r in conn.execute(
+            "SELECT keyword FROM keywords WHERE conv_id = ?", (conv_id,))]
+        entry["signatures"] = [r[0] for r in conn.execute(
+            "SELECT signature FROM signatures WHERE conv_id = ?", (conv_id,))]
+        blocks = conn.execute(
+            "SELECT block_id, language, line_count, description, hash, full_code "
+            "FROM code_blocks WHERE conv_id = ?", (conv_id,)).fetchall()
+    if blocks:
+        entry["code_blocks"] = {b["block_id"]: {k: b[k] for k in b.keys() if k != "block_id"}
+                                for b in blocks}
+    return entry
+
+
+def _fts_query(query: str, operator: str = " ") -> str:
+    # Quote every term so user input never hits FTS5 query syntax
+    return operator.join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def search(query: str, limit: int = 30) -> list:
+    """
+    Full-text search over turn content plus id/title/keyword matches.
+    Returns [{"id", "title", "snippet"}] ranked by bm25.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    conn = connect()
+    like = f"%{query.lower()}%"
+    sql = ("SELECT m.conv_id AS id, c.title AS title, "
+           "       snippet(messages_fts, 0, '[', ']', '…', 12) AS snippet, "
+           "       bm25(messages_fts) AS score "
+           "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+           "JOIN conversations c ON c.id = m.conv_id "
+           "WHERE messages_fts MATCH ? ORDER BY score LIMIT ?")
+    with _lock:
+        # Turns containing every term rank first, then turns with any term
+        rows = conn.execute(sql, (_fts_query(query), limit * 5)).fetchall()
+        if len(rows) < limit and len(query.split()) > 1:
+            rows += conn.execute(sql, (_fts_query(query, " OR "), limit * 5)).fetchall()
+        direct = conn.execute(
+            "SELECT c.id AS id, c.title AS title FROM conversations c "
+            "WHERE lower(c.id) LIKE ? OR lower(c.title) LIKE ? "
+            "   OR c.id IN (SELECT conv_id FROM keywords WHERE keyword LIKE ?) LIMIT ?",
+            (like, like, like, limit)).fetchall()
+
+    results, seen = [], set()
+    for row in list(direct) + list(rows):
+        if row["id"] in seen:
+            continue
+        seen.add(row["id"])
+        results.append({"id": row["id"], "title": row["title"],
+                        "snippet": row["snippet"] if "snippet" in row.keys() else ""})
+        if len(results) >= limit:
+            break
+    return results
+
+# -------- Migration from the JSON archive --------
+
+
+def migrate(chatlogs: str = "Archive/ChatLogs", index: str = "conversations_index.json",
+            manifest: str = "CoreLink-Manifest") -> dict:
+    """Import conv_*.json files, the v2 conversations index and the manifest"""
+    counts = {"conversations": 0, "index_entries": 0, "manifest": 0, "errors": 0}
+
+    for path in sorted(Path(chatlogs).glob("conv_*.json")):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                save_conversation(json.load(f))
+            counts["conversations"] += 1
+        except (ValueError, KeyError) as e:
+            counts["errors"] += 1
+            print(f"skip {path}: {e}", file=sys.stderr)
+
+    entries = {}
+    if os.path.exists(index) and os.path.getsize(index) > 0:
+        with open(index, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    tail = os.path.splitext(index)[0] + ".tail.jsonl"  # v2 appends here between merges
+    if os.path.exists(tail):
+        with open(tail, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                entries[record["id"]] = record["meta"]
+    for conv_id, meta in entries.items():
+        if load_conversation(conv_id) is None:
+            save_conversation({"id": conv_id, **meta})
+            counts["index_entries"] += 1
+
+    if os.path.exists(f"{manifest}.jsonl") or os.path.exists(f"{manifest}.json"):
+        from manifest_store import ManifestStore
+        for conv_id, meta in ManifestStore(manifest).items():
+            update_manifest(conv_id, meta)
+            counts["manifest"] += 1
+
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CORE memory SQLite archive")
+    parser.add_argument("--db", default=DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    mig = sub.add_parser("migrate", help="import the existing JSON archive")
+    mig.add_argument("--chatlogs", default="Archive/ChatLogs")
+    mig.add_argument("--index", default="conversations_index.json")
+    mig.add_argument("--manifest", default="CoreLink-Manifest")
+    find = sub.add_parser("search", help="full-text search")
+    find.add_argument("query")
+    find.add_argument("--limit", type=int, default=30)
+    args = parser.parse_args()
+
+    connect(args.db)
+    if args.command == "migrate":
+        print(json.dumps(migrate(args.chatlogs, args.index, args.manifest)))
+    else:
+        for hit in search(args.query, args.limit):
+            print(f"{hit['id']} | {hit['title']} | {hit['snippet']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
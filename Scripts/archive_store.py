@@ -0,0 +1,409 @@
+"""
+Content-addressed archive for safe_write backups and Corelink self-updates.
+
+Archive/Store/objects/ab/cdef...   compressed blobs keyed by the sha256 of
+                                   what they hold, written once
+Archive/Store/versions/<key>.json  {"path", "versions": [{"version", "hash",
+                                   "size", "category", "timestamp", "kind",
+                                   "blob", "base"}]}
+
+"hash" is always the sha256 of the full content. A "full" version's blob is
+that content; a "delta" version's blob is a line delta against version
+"base" (the previous one). A full snapshot is taken every SNAPSHOT_EVERY
+versions, or when the delta would not save at least half the size, so disk
+use grows with the size of each change and reconstruction replays a
+bounded chain.
+
+Archiving content identical to the latest version of a path adds nothing;
+content already stored anywhere (another path, an older version) is
+referenced, not stored again. Versions are numbered per path, so two
+backups in the same second never collide.
+
+Blobs start with a one-byte codec tag: b"Z" zlib, b"S" zstd, b"R" raw.
+zstd is used when the `zstandard` package is installed and
+CORELINK_ARCHIVE_CODEC=zstd; any blob can be read by either setup that has
+its codec.
+
+Version-index updates, prune() and gc() hold Archive/Store/lock (an OS
+file lock), so Corelink and the CoreCompile worker can share one store:
+gc() never deletes a blob that a concurrent archive() is about to reference.
+Within a process, use archive_store() so every caller shares one instance.
+"""
+import os
+import sys
+import json
+import zlib
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+from pathlib import Path
+from datetime import datetime, timedelta
+
+try:
+    import zstandard  # optional, faster/smaller than zlib
+except ImportError:
+    zstandard = None
+
+try:
+    import msvcrt  # Windows
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+STORE_DIR = "Archive/Store"
+CODEC = os.environ.get("CORELINK_ARCHIVE_CODEC", "zlib")  # "zlib" | "zstd" | "raw"
+ZLIB_LEVEL = 6
+SNAPSHOT_EVERY = 16  # longest delta chain before a full snapshot
+DELTA_MAX_RATIO = 0.5  # keep a delta only if it is under half the content size
+PRUNE_KEEP_VERSIONS = 50  # prune() always keeps this many newest versions...
+PRUNE_KEEP_DAYS = 90  # ...and everything newer than this
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive OS lock on `path` (created if missing), across processes and handles"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if msvcrt:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after ~10 s; keep waiting
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if msvcrt:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def make_delta(base: bytes, data: bytes) -> bytes:
+    """
+    Line delta: a JSON list of [start, end] (copy base lines) and strings
+    (literal new bytes, latin-1 so any byte round-trips).
+    """
+    a = base.splitlines(keepends=True)
+    b = data.splitlines(keepends=True)
+    # Trim the shared head/tail first: typical rewrites change a few lines
+    head = 0
+    while head < len(a) and head < len(b) and a[head] == b[head]:
+        head += 1
+    tail = 0
+    while tail < len(a) - head and tail < len(b) - head and a[-1 - tail] == b[-1 - tail]:
+        tail += 1
+
+    ops = [[0, head]] if head else []
+    matcher = SequenceMatcher(None, a[head:len(a) - tail], b[head:len(b) - tail])
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([head + i1, head + i2])
+        elif j2 > j1:
+            ops.append(b"".join(b[head + j1:head + j2]).decode("latin-1"))
+    if tail:
+        ops.append([len(a) - tail, len(a)])
+    return json.dumps(ops, separators=(",", ":")).encode("utf-8")
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    lines = base.splitlines(keepends=True)
+    out = []
+    for op in json.loads(delta):
+        out.append(b"".join(lines[op[0]:op[1]]) if isinstance(op, list) else op.encode("latin-1"))
+    return b"".join(out)
+
+
+class ArchiveStore:
+    def __init__(self, root: str = STORE_DIR, base: str = None, codec: str = CODEC):
+        self.root = Path(os.path.abspath(root))
+        self.base = Path(base or os.getcwd()).resolve()  # version keys are relative to this
+        self.codec = "zstd" if codec == "zstd" and zstandard else ("raw" if codec == "raw" else "zlib")
+        self.objects = self.root / "objects"
+        self.versions_dir = self.root / "versions"
+        self.lock_path = self.root / "lock"
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """This thread and process are the only writer of the store until exit"""
+        with self._lock, file_lock(self.lock_path):
+            yield
+
+    # -------- Blobs --------
+
+    def _encode(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return b"S" + zstandard.ZstdCompressor().compress(data)
+        if self.codec == "raw":
+            return b"R" + data
+        return b"Z" + zlib.compress(data, ZLIB_LEVEL)
+
+    @staticmethod
+    def _decode(blob: bytes) -> bytes:
+        tag, body = blob[:1], blob[1:]
+        if tag == b"Z":
+            return zlib.decompress(body)
+        if tag == b"S":
+            if zstandard is None:
+                raise RuntimeError("Blob is zstd-compressed but zstandard is not installed")
+            return zstandard.ZstdDecompressor().decompress(body)
+        if tag == b"R":
+            return body
+        raise ValueError(f"Unknown blob codec: {tag!r}")
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest[2:]
+
+    def put_blob(self, data: bytes) -> str:
+        """Store data once; returns its sha256"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(self._encode(data))
+            os.replace(tmp, path)
+        return digest
+
+    def get_blob(self, digest: str) -> bytes:
+        with open(self._blob_path(digest), "rb") as f:
+            data = self._decode(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Archive blob {digest} is corrupt")
+        return data
+
+    # -------- Version index --------
+
+    def key(self, path) -> str:
+        """Stable name for path: relative to base when inside it, else absolute"""
+        full = Path(os.path.abspath(path))
+        try:
+            return full.relative_to(self.base).as_posix()
+        except ValueError:
+            return full.as_posix()
+
+    def _index_path(self, key: str) -> Path:
+        return self.versions_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]}.json"
+
+    def versions(self, path) -> list:
+        index_path = self._index_path(self.key(path))
+        if not index_path.exists():
+            return []
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)["versions"]
+
+    def _save_versions(self, key: str, versions: list) -> None:
+        index_path = self._index_path(key)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = index_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"path": key, "versions": versions}, f, indent=1)
+        os.replace(tmp, index_path)
+
+    # -------- Archive / restore --------
+
+    def archive(self, path, category: str = "Other", data: bytes = None) -> dict | None:
+        """
+        Record the current content of path (or `data`) as a new version.
+        Returns the version record, the existing one if unchanged,
+        or None when there is nothing to archive.
+        """
+        if data is None:
+            if not os.path.exists(path):
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        key = self.key(path)
+        with self._locked():
+            versions = self.versions(path)
+            if versions and versions[-1]["hash"] == digest:
+                return versions[-1]
+            record = {
+                "version": versions[-1]["version"] + 1 if versions else 1,
+                "hash": digest,
+                "size": len(data),
+                "category": category,
+                "timestamp": datetime.now().isoformat()
+            }
+            record.update(self._store_content(data, digest, versions))
+            versions.append(record)
+            self._save_versions(key, versions)
+        return record
+
+    def _store_content(self, data: bytes, digest: str, versions: list) -> dict:
+        """Pick full snapshot vs. delta against the previous version"""
+        if self._blob_path(digest).exists():
+            return {"kind": "full", "blob": digest}  # already stored somewhere
+        if versions and self._chain_length(versions, versions[-1]) < SNAPSHOT_EVERY:
+            delta = make_delta(self._reconstruct(versions, versions[-1]), data)
+            if len(delta) < len(data) * DELTA_MAX_RATIO:
+                return {"kind": "delta", "blob": self.put_blob(delta), "base": versions[-1]["version"]}
+        return {"kind": "full", "blob": self.put_blob(data)}
+
+    @staticmethod
+    def _by_version(versions: list, version: int) -> dict:
+        for record in versions:
+            if record["version"] == version:
+                return record
+        raise KeyError(f"Version {version} is missing from the history")
+
+    def _chain_length(self, versions: list, record: dict) -> int:
+        length = 0
+        while record.get("kind") == "delta":
+            record = self._by_version(versions, record["base"])
+            length += 1
+        return length
+
+    def _reconstruct(self, versions: list, record: dict) -> bytes:
+        chain = []
+        while record.get("kind") == "delta":
+            chain.append(record)
+            record = self._by_version(versions, record["base"])
+        data = self.get_blob(record.get("blob", record["hash"]))
+        for step in reversed(chain):
+            data = apply_delta(data, self.get_blob(step["blob"]))
+        if hashlib.sha256(data).hexdigest() != (chain[0] if chain else record)["hash"]:
+            raise ValueError("Reconstructed content does not match its recorded hash")
+        return data
+
+    def read(self, path, version: int = None) -> bytes:
+        """Content of any version (latest when version is None), rebuilt from its delta chain"""
+        versions = self.versions(path)
+        if not versions:
+            raise KeyError(f"No archived versions of {path}")
+        if version is None:
+            return self._reconstruct(versions, versions[-1])
+        try:
+            return self._reconstruct(versions, self._by_version(versions, version))
+        except KeyError:
+            raise KeyError(f"{path} has no version {version}") from None
+
+    def restore(self, path, version: int = None, dest=None) -> str:
+        """
+        Write an archived version back (to dest, default the original path).
+        The content being replaced is archived first, so a restore can be undone.
+        """
+        data = self.read(path, version)
+        target = Path(dest or path)
+        self.archive(target, "Restore")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".restore.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+        return str(target)
+
+
+    # -------- Pruning --------
+
+    def prune(self, path, keep_versions: int = PRUNE_KEEP_VERSIONS,
+              keep_days: float = PRUNE_KEEP_DAYS) -> int:
+        """
+        Drop versions that are neither among the newest keep_versions nor
+        younger than keep_days. The oldest survivor is re-based onto a full
+        snapshot so its chain no longer needs the dropped versions.
+        Returns the number of versions dropped (run gc() to free blobs).
+        """
+        key = self.key(path)
+        cutoff = (datetime.now() - timedelta(days=keep_days)).isoformat()
+        with self._locked():
+            versions = self.versions(path)
+            first = max(len(versions) - keep_versions, 0)
+            while first > 0 and versions[first - 1]["timestamp"] >= cutoff:
+                first -= 1
+            if first == 0:
+                return 0
+            oldest = versions[first]
+            if oldest.get("kind") == "delta":
+                data = self._reconstruct(versions, oldest)
+                oldest.update(kind="full", blob=self.put_blob(data))
+                oldest.pop("base")
+            self._save_versions(key, versions[first:])
+        return first
+
+    def _all_histories(self):
+        for index_path in sorted(self.versions_dir.glob("*.json")):
+            with open(index_path, "r", encoding="utf-8") as f:
+                yield json.load(f)
+
+    def prune_all(self, keep_versions: int = PRUNE_KEEP_VERSIONS,
+                  keep_days: float = PRUNE_KEEP_DAYS) -> int:
+        paths = [history["path"] for history in self._all_histories()]
+        return sum(self.prune(self.base / p if not os.path.isabs(p) else p, keep_versions, keep_days)
+                   for p in paths)
+
+    def gc(self) -> int:
+        """Delete blobs no version of any path refers to; returns bytes freed"""
+        with self._locked():
+            live = {record.get("blob", record["hash"])
+                    for history in self._all_histories() for record in history["versions"]}
+            freed = 0
+            for blob in self.objects.glob("*/*"):
+                if blob.name.endswith(".tmp"):
+                    continue
+                if blob.parent.name + blob.name not in live:
+                    freed += blob.stat().st_size
+                    blob.unlink()
+        return freed
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def archive_store(root: str = STORE_DIR, base: str = None) -> ArchiveStore:
+    """Shared store per (root, base); the defaults are relative to the current ROOT cwd"""
+    key = (os.path.abspath(root), str(Path(base or os.getcwd()).resolve()))
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ArchiveStore(root, base)
+        return _stores[key]
+
+
+def restore(path, version: int = None, dest=None) -> str:
+    return archive_store().restore(path, version, dest)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CoreLink content-addressed archive")
+    parser.add_argument("--store", default=STORE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    ver = sub.add_parser("versions", help="list archived versions of a file")
+    ver.add_argument("path")
+    res = sub.add_parser("restore", help="restore a file from the archive")
+    res.add_argument("path")
+    res.add_argument("--version", type=int, default=None, help="default: latest")
+    res.add_argument("--dest", default=None, help="write here instead of over the original")
+    prn = sub.add_parser("prune", help="apply the retention policy to every path, then gc")
+    prn.add_argument("--keep", type=int, default=PRUNE_KEEP_VERSIONS)
+    prn.add_argument("--days", type=float, default=PRUNE_KEEP_DAYS)
+    args = parser.parse_args()
+
+    store = ArchiveStore(args.store)
+    try:
+        if args.command == "versions":
+            print(json.dumps(store.versions(args.path), indent=2))
+        elif args.command == "prune":
+            dropped = store.prune_all(args.keep, args.days)
+            print(json.dumps({"versions_dropped": dropped, "bytes_freed": store.gc()}))
+        else:
+            print(store.restore(args.path, args.version, args.dest))
+    except (KeyError, ValueError, RuntimeError) as e:
+        print(f"{type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
-import os, json
+import os, json, atexit
 from pathlib import Path
 from datetime import datetime
 from hashlib import sha256
+from manifest_store import ManifestStore
 
 # --- Safe Write: archive → .tmp → verify → rename → log ---
 def safe_write(target_path: str, content: dict | str, category: str) -> bool:
@@ -61,16 +62,20 @@ def save_conversation(entry: dict) -> str:
     safe_write(str(file_path), entry, "ChatLogs")
     return str(file_path)
 
-# --- Update CoreLink-Manifest.json ---
+# --- Manifest: append-only CoreLink-Manifest.jsonl shared with CoreCompile ---
+_manifest = None
+
+def manifest_store() -> ManifestStore:
+    global _manifest
+    if _manifest is None:
+        _manifest = ManifestStore("CoreLink-Manifest",
+                                  snapshot_writer=lambda path, data: safe_write(path, data, "CoreLink"))
+        atexit.register(_manifest.flush)
+    return _manifest
+
+# --- Update CoreLink-Manifest ---
 def update_manifest(conv_id: str, metadata: dict) -> None:
-    path = "CoreLink-Manifest.json"
-    if os.path.exists(path):
-        with open(path, 'r', encoding='utf-8') as f:
-            manifest = json.load(f)
-    else:
-        manifest = {}
-    manifest[conv_id] = metadata
-    safe_write(path, manifest, "CoreLink")
+    manifest_store().put(conv_id, metadata)
 
 # --- Main File Processor ---
 def process_chat_file(raw_text: str, user_review_mode: bool = False) -> dict:
@@ -110,14 +115,10 @@ def process_chat_file(raw_text: str, user_review_mode: bool = False) -> dict:
 
 # --- Extract a Single Archived Conversation by ID ---
 def extract_from_manifest(conv_id: str) -> str | None:
-    path = "CoreLink-Manifest.json"
-    if not os.path.exists(path):
-        return None
-    with open(path, 'r') as f:
-        manifest = json.load(f)
-    if conv_id not in manifest:
+    meta = manifest_store().get(conv_id)
+    if meta is None:
         return None
-    with open(manifest[conv_id]['file_path'], 'r') as f:
+    with open(meta['file_path'], 'r') as f:
         return format_strict_human_readable(json.load(f))
 
 # --- Format as Human-Readable Output ---
@@ -11,6 +11,16 @@ from chat_processor_corelink import (
     process_chat_file,
     extract_from_manifest,
 )
+try:
+    import archive_db  # optional SQLite backend
+except ImportError:
+    archive_db = None
+try:
+    from chat_processor_v2 import check_strict_duplicate, load_index
+except ImportError:
+    check_strict_duplicate = None  # no duplicate warning without the v2 signature index
+    load_index = None
+from gui_jobs import Jobs, read_text
 
 class GUI:
     def __init__(self, root):
@@ -18,6 +28,8 @@ class GUI:
         self.root.title("CORE Memory Reconstructor")
         self.root.geometry("1000x800")
         self.create_widgets()
+        self.jobs = Jobs(root, self.show_progress, self.show_error, self.jobs_idle)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
     
     def create_widgets(self):
         # Mode selector
@@ -53,6 +65,10 @@ class GUI:
         self.status.pack(side=tk.LEFT)
         self.dupe_warn = tk.Label(status_frame, text="", fg="orange")
         self.dupe_warn.pack(side=tk.LEFT, padx=20)
+        self.progress = ttk.Progressbar(status_frame, length=200, mode="determinate")
+        self.progress.pack(side=tk.LEFT, padx=5)
+        self.cancel_btn = tk.Button(status_frame, text="Cancel", command=self.cancel_jobs, state=tk.DISABLED)
+        self.cancel_btn.pack(side=tk.LEFT)
         
         # Buttons
         btn_frame = tk.Frame(self.root)
@@ -86,26 +102,73 @@ class GUI:
             self.file_entry.insert(0, f)
             self.load_file()
     
+    # -------- Background jobs --------
+
+    def show_progress(self, job, done, total, text):
+        self.progress.config(maximum=total, value=done)
+        if text:
+            self.status.config(text=f"⏳ {text}…", fg="black")
+
+    def show_error(self, job, error):
+        self.status.config(text=f"❌ {job.name} failed", fg="red")
+        messagebox.showerror("Error", f"{job.name}: {error}")
+
+    def jobs_idle(self, cancelled):
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.progress.config(value=0)
+        if cancelled:
+            self.status.config(text="⏹ Cancelled", fg="orange")
+        elif self.status.cget("text").startswith("⏳"):
+            self.status.config(text="Ready", fg="green")
+
+    def run_job(self, name, fn, *args, on_done=None, status=None, writes=False):
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.progress.config(mode="determinate", value=0)
+        self.status.config(text=f"⏳ {status or name}…", fg="black")
+        return self.jobs.submit(name, fn, *args, on_done=on_done, writes=writes)
+
+    def cancel_jobs(self):
+        self.jobs.cancel()
+        if any(job.committed for job in self.jobs.live):
+            self.status.config(text="⏳ Archive write already started - finishing it", fg="black")
+
+    def close(self):
+        self.jobs.shutdown()
+        self.root.destroy()
+
+    def show_text(self, content, status=None):
+        self.text.delete('1.0', tk.END)
+        self.text.insert('1.0', content)
+        if status:
+            self.status.config(text=status, fg="green")
+
+    # -------- Handlers --------
+
     def load_file(self):
         path = self.file_entry.get()
         if not os.path.exists(path):
             return
-        
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        self.text.delete('1.0', tk.END)
-        self.text.insert('1.0', content)
-        
-        if self.mode.get() == "normalize":
-            self.check_duplicates(content)
-    
-    def check_duplicates(self, text):
-        is_dup, dup_id, matches = check_strict_duplicate(text)
+
+        def done(content):
+            self.show_text(content, f"✅ Loaded {os.path.basename(path)}")
+            if self.mode.get() == "normalize":
+                self.check_duplicates(content)
+
+        self.run_job("load", read_text, path, on_done=done, status="Loading")
+
+    def show_duplicate(self, is_dup, dup_id, matches):
         if is_dup:
             self.dupe_warn.config(text=f"⚠️ DUPLICATE ({matches} matches): {dup_id}", fg="red")
         else:
             self.dupe_warn.config(text="✅ No duplicates", fg="green")
-    
+
+    def check_duplicates(self, text):
+        if check_strict_duplicate is None:
+            self.dupe_warn.config(text="Duplicate check unavailable", fg="orange")
+            return
+        self.run_job("dedupe", lambda job: check_strict_duplicate(text),
+                     on_done=lambda result: self.show_duplicate(*result), status="Checking duplicates")
+
     # NEW: Format Check Handler
     def on_format_check(self):
         content = self.text.get('1.0', tk.END).strip()
@@ -124,34 +187,40 @@ class GUI:
     def process(self):
         if self.mode.get() == "normalize":
             text = self.text.get('1.0', tk.END)
-            
-            # Check for duplicates first
-            is_dup, dup_id, matches = check_strict_duplicate(text)
-            if is_dup:
-                if not messagebox.askyesno("Duplicate Detected", 
-                    f"This appears to be a duplicate of {dup_id} ({matches} matches).\nProceed anyway?"):
+
+            def checked(result):
+                # Check for duplicates first; the question is asked on the Tk thread
+                is_dup, dup_id, matches = result
+                if is_dup:
+                    if not messagebox.askyesno("Duplicate Detected",
+                        f"This appears to be a duplicate of {dup_id} ({matches} matches).\nProceed anyway?"):
+                        return
+                # Process with raw_text parameter
+                self.run_job("archive", lambda job: process_chat_file(raw_text=text, user_review_mode=True),
+                             on_done=processed, status="Processing", writes=True)
+
+            def processed(result):
+                if result.get("status") == "duplicate_skipped":
+                    messagebox.showwarning("Duplicate", f"Skipped: {result['duplicate_id']}")
                     return
-            
-            # Process with raw_text parameter
-            result = process_chat_file(raw_text=text, user_review_mode=True)
-            
-            if result.get("status") == "duplicate_skipped":
-                messagebox.showwarning("Duplicate", f"Skipped: {result['duplicate_id']}")
-                return
-            
-            if result.get("status") in ["keep", "flag"]:
-                self.text.delete('1.0', tk.END)
-                self.text.insert('1.0', result['formatted'])
-                self.status.config(text=f"✅ {result['status'].upper()}: {result['entry']['id']}")
-                
-                if result['classification']['needs_intervention']:
-                    messagebox.showinfo("Review Needed", "This conversation was flagged for your review.")
+
+                if result.get("status") in ["keep", "flag"]:
+                    self.show_text(result['formatted'], f"✅ {result['status'].upper()}: {result['entry']['id']}")
+
+                    if result['classification']['needs_intervention']:
+                        messagebox.showinfo("Review Needed", "This conversation was flagged for your review.")
+                else:
+                    messagebox.showinfo("Archived", "Low relevance - moved to discard log")
+
+            if check_strict_duplicate is None:
+                checked((False, None, 0))
             else:
-                messagebox.showinfo("Archived", "Low relevance - moved to discard log")
+                self.run_job("process", lambda job: check_strict_duplicate(text),
+                             on_done=checked, status="Checking duplicates")
         else:
             # Load JSON mode
             self.load_file()
-    
+
     # MODIFIED: Extract Handler
     def extract(self):
         if self.mode.get() == "extract":
@@ -159,54 +228,66 @@ class GUI:
             conv_id = self.search_entry.get().strip()
             if not conv_id:
                 return
-            
-            result = extract_from_manifest(conv_id)
-            if result:
-                self.text.delete('1.0', tk.END)
-                self.text.insert('1.0', result)
-                self.status.config(text=f"✅ Extracted: {conv_id}")
-            else:
-                messagebox.showerror("Not Found", "Conversation ID not in manifest")
+
+            def done(result):
+                if result:
+                    self.show_text(result, f"✅ Extracted: {conv_id}")
+                else:
+                    self.status.config(text="Ready", fg="green")
+                    messagebox.showerror("Not Found", "Conversation ID not in manifest")
+
+            self.run_job("extract", lambda job: extract_from_manifest(conv_id), on_done=done, status="Extracting")
         else:
             # NEW: Extract current text content
             text = self.text.get('1.0', tk.END)
             if not text.strip():
                 messagebox.showwarning("No Content", "Please enter some text to extract.")
                 return
-            
-            result = process_chat_file(raw_text=text, user_review_mode=False)
-            if result.get("entry"):
-                self.text.delete('1.0', tk.END)
-                self.text.insert('1.0', result['formatted'])
-                self.status.config(text=f"✅ Extracted: {result['entry']['id']}")
-            else:
-                messagebox.showerror("Extraction Failed", result.get("error", "Unknown error"))
-    
+
+            def done(result):
+                if result.get("entry"):
+                    self.show_text(result['formatted'], f"✅ Extracted: {result['entry']['id']}")
+                else:
+                    self.status.config(text="Ready", fg="green")
+                    messagebox.showerror("Extraction Failed", result.get("error", "Unknown error"))
+
+            self.run_job("archive", lambda job: process_chat_file(raw_text=text, user_review_mode=False),
+                         on_done=done, status="Extracting", writes=True)
+
     def search_index(self):
         query = self.search_entry.get().strip().lower()
-        if not query or not os.path.exists("conversations_index.json"):
+        if not query:
             return
-        
-        with open("conversations_index.json", 'r') as f:
-            index = json.load(f)
-        
-        matches = [f"{cid} | {meta['title']}" for cid, meta in index.items() 
-                  if query in cid or any(query in k for k in meta.get('keywords', []))]
-        
-        self.text.delete('1.0', tk.END)
-        self.text.insert('1.0', "\n".join(matches[:30]))
-    
+        if archive_db and os.path.exists(archive_db.DB_PATH):
+            # SQLite archive: FTS over turn content + id/title/keyword matches
+            def work(job):
+                hits = archive_db.search(query, limit=30)
+                return "\n".join(f"{h['id']} | {h['title']} | {h['snippet']}" for h in hits)
+        elif os.path.exists("conversations_index.json"):
+            def work(job):
+                if load_index:
+                    index = load_index("conversations_index.json")  # includes unmerged tail entries
+                else:
+                    with open("conversations_index.json", 'r') as f:
+                        index = json.load(f)
+                matches = []
+                for n, (cid, meta) in enumerate(index.items()):
+                    if n % 1000 == 0:
+                        job.progress(n, len(index), "Searching")
+                    if query in cid or any(query in k for k in meta.get('keywords', [])):
+                        matches.append(f"{cid} | {meta['title']}")
+                        if len(matches) == 30:
+                            break
+                return "\n".join(matches)
+        else:
+            return
+
+        self.run_job("search", work, on_done=lambda result: self.show_text(result, f"✅ Search: {query}"),
+                     status="Searching")
+
     def run_diagnostics(self):
         messagebox.showinfo("Diagnostics", "GUI functionality verified. All handlers connected properly.")
 
-    """Placeholder function - should be implemented in chat_processor_v2"""
-    if os.path.exists("conversations_index.json"):
-        with open("conversations_index.json", 'r') as f:
-            index = json.load(f)
-        if conv_id in index:
-            return f"Found conversation: {index[conv_id].get('title', 'No title')}"
-    return None
-
 if __name__ == "__main__":
     root = tk.Tk()
     GUI(root).root.mainloop()
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+Buffered JSONL logging shared by Corelink and CoreCompile.
+
+log.write(entry)      append to an in-memory ring + pending batch (no I/O)
+flusher thread        writes the batch in one open/write when FLUSH_EVERY
+                      entries are pending or FLUSH_INTERVAL seconds pass
+rotation              past ROTATE_BYTES the file becomes <name>.<stamp>.gz,
+                      keeping the newest ROTATE_KEEP archives
+log.tail(n)           recent entries straight from memory
+query(path, ...)      structured search over the live file and its archives
+
+Everything still pending is flushed at exit.
+"""
+import os
+import gzip
+import json
+import atexit
+import shutil
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+FLUSH_EVERY = 64  # pending entries that trigger an early flush
+FLUSH_INTERVAL = 1.0  # seconds an entry may sit in memory
+RING_SIZE = 2000  # entries kept for tail()
+ROTATE_BYTES = 5 * 1024 * 1024
+ROTATE_KEEP = 10
+
+
+class BufferedLog:
+    def __init__(self, path, flush_every: int = FLUSH_EVERY, flush_interval: float = FLUSH_INTERVAL,
+                 ring_size: int = RING_SIZE, rotate_bytes: int = ROTATE_BYTES, rotate_keep: int = ROTATE_KEEP):
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_keep = rotate_keep
+        self.ring = deque(maxlen=ring_size)
+        self._pending = []
+        self._lock = threading.Lock()  # guards ring + pending
+        self._io_lock = threading.Lock()  # one flush/rotation at a time
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"corelog:{self.path.name}", daemon=True)
+        self._thread.start()
+
+    # -------- Writes --------
+
+    def write(self, entry: dict) -> None:
+        with self._lock:
+            self.ring.append(entry)
+            self._pending.append(entry)
+            if len(self._pending) >= self.flush_every:
+                self._wake.set()
+        if self._closed:
+            self.flush()  # late writes during shutdown go straight to disk
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError:
+                pass  # disk hiccup: entries were put back, retried next round
+
+    def flush(self) -> None:
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            data = "".join(json.dumps(entry) + "\n" for entry in batch)
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(data)
+                    size = f.tell()
+            except OSError:
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+            if size >= self.rotate_bytes:
+                self._rotate()
+
+    def _rotate(self) -> None:
+        """Move the live file aside, gzip it, prune old archives"""
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        rolled = self.path.with_name(f"{self.path.name}.{stamp}")
+        os.replace(self.path, rolled)
+        with open(rolled, "rb") as src, gzip.open(f"{rolled}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        rolled.unlink()
+        for old in archives(self.path)[:-self.rotate_keep or None]:
+            old.unlink()
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=2)
+        self.flush()
+
+    # -------- Reads --------
+
+    def tail(self, n: int = 100, **filters) -> list:
+        """Newest n entries (oldest first) from memory, including unflushed ones"""
+        with self._lock:
+            entries = list(self.ring)
+        if filters:
+            entries = [e for e in entries if _matches(e, None, None, None, filters)]
+        return entries[-n:]
+
+    def query(self, **kwargs):
+        self.flush()
+        return query(self.path, **kwargs)
+
+
+def archives(path) -> list:
+    """Rotated .gz files for path, oldest first"""
+    path = Path(path)
+    return sorted(path.parent.glob(f"{path.name}.*.gz"))
+
+
+def _matches(entry: dict, since, until, contains, equals: dict) -> bool:
+    stamp = entry.get("timestamp", "")
+    if since and stamp < since:
+        return False
+    if until and stamp >= until:
+        return False
+    if contains and contains.lower() not in json.dumps(entry).lower():
+        return False
+    return all(entry.get(key) == value for key, value in equals.items())
+
+
+def query(path, since=None, until=None, contains: str = None, include_archives: bool = True,
+          limit: int = None, **equals):
+    """
+    Yield log entries oldest first.
+    since/until: datetime or ISO string bounds on "timestamp"
+    contains: case-insensitive substring of the serialized entry
+    equals: exact top-level field matches, e.g. action="safe_write"
+    limit: keep only the newest `limit` matches
+    """
+    since = since.isoformat() if isinstance(since, datetime) else since
+    until = until.isoformat() if isinstance(until, datetime) else until
+    path = Path(path)
+    sources = archives(path) if include_archives else []
+    if path.exists():
+        sources.append(path)
+
+    def scan():
+        for source in sources:
+            opener = gzip.open if source.suffix == ".gz" else open
+            with opener(source, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if _matches(entry, since, until, contains, equals):
+                        yield entry
+
+    if limit is None:
+        yield from scan()
+    else:
+        yield from deque(scan(), maxlen=limit)
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_log(path) -> BufferedLog:
+    """One BufferedLog per file per process"""
+    key = os.path.abspath(path)
+    with _logs_lock:
+        if key not in _logs:
+            _logs[key] = BufferedLog(key)
+        return _logs[key]
+
+
+@atexit.register
+def close_all() -> None:
+    with _logs_lock:
+        logs = list(_logs.values())
+    for log in logs:
+        log.close()
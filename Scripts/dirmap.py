@@ -0,0 +1,146 @@
+"""
+Incremental directory snapshot for dirmapper.
+
+WATCH_INDEX.snapshot.json  {"root", "index_stamp", "dirs": {rel_dir: {"mtime",
+                           "subdirs": [...], "files": {name: [size, mtime_ns, sha256]}}}}
+
+A directory whose mtime is unchanged since the snapshot is not listed again:
+its files and subdirectories are taken from the snapshot (adding, removing
+or renaming an entry always bumps the parent's mtime). Files are hashed only
+when new or when their size/mtime changed, and reported as modified only if
+the hash differs. In-place edits inside an unchanged directory are picked up
+by scan(verify=True), which lists every directory but still hashes only
+files whose size/mtime moved (the watcher reports them as they happen).
+"""
+import os
+import json
+import hashlib
+from pathlib import Path
+
+HASH_CHUNK = 1024 * 1024
+
+
+def file_hash(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _join(rel_dir: str, name: str) -> str:
+    return f"{rel_dir}/{name}" if rel_dir else name
+
+
+class DirSnapshot:
+    def __init__(self, root, snapshot_path, exclude=()):
+        self.root = Path(root)
+        self.snapshot_path = Path(snapshot_path)
+        # Files (and their .tmp siblings) or whole directories left out of the map
+        self.exclude = set()
+        for path in exclude:
+            self.exclude.add(os.path.normcase(os.path.abspath(path)))
+            self.exclude.add(os.path.normcase(os.path.abspath(Path(path).with_suffix('.tmp'))))
+        self.dirs = {}
+        self.index_stamp = None
+        self.loaded = False
+        if self.snapshot_path.exists():
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                if saved.get("root") == os.path.abspath(self.root):
+                    self.dirs = saved["dirs"]
+                    self.index_stamp = saved.get("index_stamp")
+                    self.loaded = True
+            except (ValueError, KeyError):
+                pass  # unreadable snapshot: next scan is a full one
+
+    def excluded(self, path: str) -> bool:
+        return os.path.normcase(os.path.abspath(path)) in self.exclude
+
+    def scan(self, verify: bool = False) -> dict:
+        """
+        Refresh the snapshot in memory and return the change set:
+        {"added", "removed", "modified"}: rel file paths (posix), plus
+        "dirs_scanned" / "dirs_total" for reporting.
+        """
+        diff = {"added": [], "removed": [], "modified": []}
+        new_dirs = {}
+        scanned = 0
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            full = self.root / rel if rel else self.root
+            try:
+                mtime = os.stat(full).st_mtime_ns
+            except OSError:
+                continue  # vanished between listing and visit; parent rescan catches it
+            old = self.dirs.get(rel)
+            if old is not None and old["mtime"] == mtime and not verify:
+                entry = old
+            else:
+                entry = self._list(full, rel, mtime, old, diff)
+                scanned += 1
+            new_dirs[rel] = entry
+            stack.extend(_join(rel, name) for name in entry["subdirs"])
+
+        # Whole subtrees that disappeared
+        for rel in self.dirs.keys() - new_dirs.keys():
+            diff["removed"].extend(_join(rel, name) for name in self.dirs[rel]["files"])
+
+        self.dirs = new_dirs
+        for key in diff:
+            diff[key].sort()
+        diff["dirs_scanned"] = scanned
+        diff["dirs_total"] = len(new_dirs)
+        return diff
+
+    def _list(self, full: Path, rel: str, mtime: int, old: dict | None, diff: dict) -> dict:
+        previous = old["files"] if old else {}
+        files = {}
+        subdirs = []
+        try:
+            entries = list(os.scandir(full))
+        except OSError:
+            entries = []
+        for item in entries:
+            if item.is_dir(follow_symlinks=False):
+                if not self.excluded(item.path):
+                    subdirs.append(item.name)
+                continue
+            if not item.is_file() or self.excluded(item.path):
+                continue
+            try:
+                st = item.stat()
+            except OSError:
+                continue
+            prev = previous.get(item.name)
+            if prev and prev[0] == st.st_size and prev[1] == st.st_mtime_ns:
+                files[item.name] = prev
+                continue
+            try:
+                digest = file_hash(item.path)
+            except OSError:
+                continue  # locked/unreadable: retried next scan
+            files[item.name] = [st.st_size, st.st_mtime_ns, digest]
+            if prev is None:
+                diff["added"].append(_join(rel, item.name))
+            elif prev[2] != digest:
+                diff["modified"].append(_join(rel, item.name))
+        for name in previous.keys() - files.keys():
+            diff["removed"].append(_join(rel, name))
+        return {"mtime": mtime, "subdirs": sorted(subdirs), "files": files}
+
+    def files(self):
+        """Every mapped file as a rel posix path, in walk order (dirs then names sorted)"""
+        for rel in sorted(self.dirs):
+            for name in sorted(self.dirs[rel]["files"]):
+                yield _join(rel, name)
+
+    def save(self) -> None:
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshot_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"root": os.path.abspath(self.root), "index_stamp": self.index_stamp,
+                       "dirs": self.dirs}, f, separators=(",", ":"))
+        os.replace(tmp, self.snapshot_path)
@@ -0,0 +1,157 @@
+"""
+Background jobs for the Tk GUIs (chat_processord, OK Computer/chat_processor_gui).
+
+jobs.submit(name, fn, *args, on_done=...)
+                    fn(job, *args) runs on a pool thread and must not touch
+                    widgets; its result is handed to on_done on the Tk thread
+                    by an after() poller. Submitting a name that is still
+                    running cancels the old job and drops its result.
+writes=True         archive writers run one at a time on their own thread,
+                    in submission order, and are never superseded. Once one
+                    has started, cancel() no longer applies to it and its
+                    result is always delivered.
+job.progress(...)   report progress; raises Cancelled if the job was cancelled
+
+Cancellation is cooperative: it takes effect at the next progress()/check().
+"""
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_MS = 100  # UI refresh interval while jobs run
+MAX_WORKERS = 2
+READ_CHUNK = 64 * 1024  # file reads report progress (and can be cancelled) per chunk
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Job:
+    """Handle a worker uses to report progress and notice cancellation"""
+    def __init__(self, name, events, writes=False):
+        self.name = name
+        self.events = events
+        self.writes = writes
+        self.committed = False  # a writer that has started; cancel() is ignored from then on
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            if not self.committed:
+                self.cancel_event.set()
+
+    def commit(self):
+        """Point of no return: raises Cancelled if already cancelled, else makes cancel() a no-op"""
+        with self._lock:
+            self.check()
+            self.committed = True
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled()
+
+    def progress(self, done, total, text=None):
+        self.check()
+        self.events.put(("progress", self, (done, total, text), None))
+
+
+class Jobs:
+    """Worker pool behind the Tk loop (see module docstring)"""
+    def __init__(self, root, on_progress, on_error, on_idle):
+        self.root = root
+        self.pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="gui-job")
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gui-write")
+        self.events = queue.Queue()  # worker threads → Tk thread
+        self.live = set()  # submitted, result not yet applied
+        self.latest = {}  # name → newest non-writing Job
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.on_idle = on_idle
+        self.polling = False
+
+    def submit(self, name, fn, *args, on_done=None, writes=False):
+        job = Job(name, self.events, writes)
+        if not writes:
+            if name in self.latest:
+                self.latest[name].cancel()
+            self.latest[name] = job
+        self.live.add(job)
+        (self.writer if writes else self.pool).submit(self._run, job, fn, args, on_done)
+        if not self.polling:
+            self.polling = True
+            self.root.after(POLL_MS, self.poll)
+        return job
+
+    def _run(self, job, fn, args, on_done):
+        try:
+            if job.writes:
+                job.commit()
+            result = fn(job, *args)
+            job.check()
+        except Cancelled:
+            self.events.put(("cancelled", job, None, None))
+        except Exception as e:
+            self.events.put(("error", job, e, None))
+        else:
+            self.events.put(("done", job, result, on_done))
+
+    def _current(self, job):
+        return job.writes or self.latest.get(job.name) is job
+
+    def cancel(self):
+        for job in self.live:
+            job.cancel()
+
+    def poll(self):
+        """Apply worker events on the Tk thread, reschedule while jobs run"""
+        while True:
+            try:
+                kind, job, value, on_done = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                if self._current(job) and not job.cancelled:
+                    self.on_progress(job, *value)
+                continue
+            self.live.discard(job)
+            if self._current(job):
+                if not job.writes:
+                    del self.latest[job.name]
+                if kind == "done" and not job.cancelled and on_done:
+                    on_done(value)
+                elif kind == "error":
+                    self.on_error(job, value)
+            if not self.live:
+                self.on_idle(job.cancelled)
+
+        if self.live:
+            self.root.after(POLL_MS, self.poll)
+        else:
+            self.polling = False
+
+    def shutdown(self):
+        """Cancel what can be cancelled; a started archive write still runs to completion"""
+        self.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.writer.shutdown(wait=False)
+
+
+def read_text(job, path):
+    """Read a file in chunks so a large transcript reports progress"""
+    total = os.path.getsize(path) or 1
+    parts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            parts.append(chunk)
+            job.progress(f.buffer.tell(), total, "Loading")
+    return "".join(parts)
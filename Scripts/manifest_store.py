@@ -0,0 +1,190 @@
+"""
+Append-only conversation manifest for CoreCompile and chat_processor.
+
+CoreLink-Manifest.jsonl   one {"id", "meta"} record per line, latest wins
+CoreLink-Manifest.idx     {"log_size", "records", "offsets": {id: [offset, length]}}
+CoreLink-Manifest.json    legacy dict snapshot, rewritten every SNAPSHOT_EVERY
+                          appends, on compaction and on flush() when stale
+
+An import appends one line; lookups seek straight to the record.
+The index is saved every INDEX_FLUSH_EVERY appends and any log tail
+written after it is replayed on open.
+"""
+import os
+import json
+import threading
+from pathlib import Path
+
+INDEX_FLUSH_EVERY = 50
+SNAPSHOT_EVERY = 200  # appends between refreshes of the legacy JSON snapshot
+COMPACT_MIN_RECORDS = 1000
+COMPACT_RATIO = 2.0  # compact when records > live ids * ratio
+
+
+class ManifestStore:
+    def __init__(self, base: str = "CoreLink-Manifest", snapshot_writer=None):
+        self.log_path = Path(f"{base}.jsonl")
+        self.index_path = Path(f"{base}.idx")
+        self.snapshot_path = Path(f"{base}.json")
+        self.snapshot_writer = snapshot_writer  # (path, dict) -> None, e.g. safe_write
+        self.offsets = {}
+        self.records = 0
+        self.log_size = 0
+        self._unsaved = 0
+        self._unsnapshotted = 0  # appends not yet in the legacy snapshot
+        self._lock = threading.Lock()
+        self._open()
+
+    # -------- Loading --------
+
+    def _open(self) -> None:
+        if not self.log_path.exists() and self.snapshot_path.exists():
+            self._migrate_snapshot()
+
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                self.offsets = {k: tuple(v) for k, v in saved["offsets"].items()}
+                self.records = saved["records"]
+                self.log_size = saved["log_size"]
+            except (ValueError, KeyError):
+                self.offsets, self.records, self.log_size = {}, 0, 0
+
+        actual = self.log_path.stat().st_size if self.log_path.exists() else 0
+        if actual < self.log_size:
+            # Log was replaced underneath the index - rebuild from scratch
+            self.offsets, self.records, self.log_size = {}, 0, 0
+        self._replay_tail()
+
+    def _replay_tail(self) -> None:
+        """Index records appended after the last saved index (or by another process)"""
+        if not self.log_path.exists() or self.log_path.stat().st_size <= self.log_size:
+            return
+        with open(self.log_path, 'rb') as f:
+            f.seek(self.log_size)
+            offset = self.log_size
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn final write; ignored until completed
+                try:
+                    conv_id = json.loads(line)["id"]
+                except (ValueError, KeyError):
+                    offset += len(line)
+                    continue
+                self.offsets[conv_id] = (offset, len(line))
+                self.records += 1
+                offset += len(line)
+                self._unsaved += 1
+            self.log_size = offset
+
+    def _migrate_snapshot(self) -> None:
+        with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        with open(self.log_path, 'wb') as f:
+            for conv_id, meta in manifest.items():
+                f.write(self._encode(conv_id, meta))
+
+    @staticmethod
+    def _encode(conv_id: str, meta: dict) -> bytes:
+        return (json.dumps({"id": conv_id, "meta": meta}) + "\n").encode('utf-8')
+
+    # -------- Reads --------
+
+    def get(self, conv_id: str) -> dict | None:
+        with self._lock:
+            if conv_id not in self.offsets:
+                self._replay_tail()
+            if conv_id not in self.offsets:
+                return None
+            offset, length = self.offsets[conv_id]
+            with open(self.log_path, 'rb') as f:
+                f.seek(offset)
+                return json.loads(f.read(length))["meta"]
+
+    def __contains__(self, conv_id: str) -> bool:
+        return self.get(conv_id) is not None
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def items(self):
+        """Yield (id, meta) for every live record, in log order"""
+        with self._lock:
+            live = sorted(self.offsets.values())
+        with open(self.log_path, 'rb') as f:
+            for offset, length in live:
+                f.seek(offset)
+                record = json.loads(f.read(length))
+                yield record["id"], record["meta"]
+
+    # -------- Writes --------
+
+    def put(self, conv_id: str, meta: dict) -> None:
+        """Append one record: O(1) regardless of manifest size"""
+        line = self._encode(conv_id, meta)
+        with self._lock:
+            self._replay_tail()
+            with open(self.log_path, 'ab') as f:
+                f.write(line)
+            self.offsets[conv_id] = (self.log_size, len(line))
+            self.log_size += len(line)
+            self.records += 1
+            self._unsaved += 1
+            self._unsnapshotted += 1
+            if self._unsaved >= INDEX_FLUSH_EVERY:
+                self._save_index()
+            needs_compaction = (self.records >= COMPACT_MIN_RECORDS
+                                and self.records > len(self.offsets) * COMPACT_RATIO)
+            needs_snapshot = self._unsnapshotted >= SNAPSHOT_EVERY
+        if needs_compaction:
+            self.compact()  # refreshes the snapshot too
+        elif needs_snapshot:
+            self.snapshot()
+
+    def _save_index(self) -> None:
+        tmp = self.index_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"log_size": self.log_size, "records": self.records,
+                       "offsets": self.offsets}, f)
+        os.replace(tmp, self.index_path)
+        self._unsaved = 0
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._unsaved:
+                self._save_index()
+            stale = self._unsnapshotted > 0
+        if stale:
+            self.snapshot()
+
+    def compact(self) -> None:
+        """Rewrite the log with live records only, then refresh the snapshot"""
+        with self._lock:
+            self._replay_tail()
+            tmp = self.log_path.with_suffix('.jsonl.tmp')
+            offsets = {}
+            size = 0
+            with open(self.log_path, 'rb') as src, open(tmp, 'wb') as dst:
+                for conv_id, (offset, length) in sorted(self.offsets.items(), key=lambda kv: kv[1]):
+                    src.seek(offset)
+                    dst.write(src.read(length))
+                    offsets[conv_id] = (size, length)
+                    size += length
+            os.replace(tmp, self.log_path)
+            self.offsets, self.records, self.log_size = offsets, len(offsets), size
+            self._save_index()
+        self.snapshot()
+
+    def snapshot(self) -> None:
+        """Write the legacy CoreLink-Manifest.json dict for older readers"""
+        with self._lock:
+            self._unsnapshotted = 0
+        manifest = dict(self.items())
+        if self.snapshot_writer:
+            self.snapshot_writer(str(self.snapshot_path), manifest)
+        else:
+            tmp = self.snapshot_path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp, self.snapshot_path)
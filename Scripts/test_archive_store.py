@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Offline tests for archive_store.py delta chains: every version of a file
+edited more than SNAPSHOT_EVERY times reads and restores back byte for byte.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import archive_store
+from archive_store import ArchiveStore, SNAPSHOT_EVERY
+
+BODY = "".join(f"line {i}: the canvas notes stay the same between saves\n" for i in range(400))
+
+def edit(n):
+    """Version n: the shared body with a small edit, so each save is a delta"""
+    return (BODY + "".join(f"edit {i}\n" for i in range(n))).encode("utf-8")
+
+@pytest.fixture
+def history(tmp_path):
+    store = ArchiveStore(root=str(tmp_path / "Store"), base=str(tmp_path))
+    path = tmp_path / "notes.md"
+    count = SNAPSHOT_EVERY * 2 + 3
+    for n in range(1, count + 1):
+        path.write_bytes(edit(n))
+        store.archive(path, "Notes")
+    return store, path, count
+
+def test_delta_chain_is_capped(history):
+    print("=== Testing delta chains ===")
+    store, path, count = history
+    versions = store.versions(path)
+    kinds = [record["kind"] for record in versions]
+    print(f"Kinds: {''.join(kind[0] for kind in kinds)}")
+    assert len(versions) == count
+    assert kinds.count("delta") > SNAPSHOT_EVERY
+    assert kinds == (["full"] + ["delta"] * SNAPSHOT_EVERY) * 2 + ["full"]
+    assert max(store._chain_length(versions, record) for record in versions) == SNAPSHOT_EVERY
+    print("✓ Delta chain test passed\n")
+
+def test_every_version_reads_back(history):
+    store, path, count = history
+    for n in range(1, count + 1):
+        assert store.read(path, n) == edit(n), f"Version {n} reconstructed wrongly"
+    assert store.read(path) == edit(count)
+
+def test_restore_across_snapshots(history, tmp_path):
+    """Restore the longest chain (snapshot + SNAPSHOT_EVERY deltas) and a version past the next snapshot"""
+    store, path, count = history
+    longest = SNAPSHOT_EVERY + 1
+    dest = tmp_path / "restored.md"
+    store.restore(path, longest, dest)
+    assert dest.read_bytes() == edit(longest)
+
+    store.restore(path, longest + 2)
+    assert path.read_bytes() == edit(longest + 2)
+    assert store.read(path, count) == edit(count), "Restore did not archive the content it replaced"
+    assert len(store.versions(path)) == count
+
+def test_corrupt_delta_is_detected(history):
+    store, path, count = history
+    record = store.versions(path)[5]
+    blob = store._blob_path(record["blob"])
+    blob.write_bytes(store._encode(b"garbage"))
+    with pytest.raises(ValueError):
+        store.read(path, 6)
+    assert store.read(path, 1) == edit(1)
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Offline tests for manifest_store.py compaction: after the log is rewritten
+the saved index, lookups and the legacy snapshot all agree with the latest
+record for every id, including in a freshly opened store.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import pytest
+
+import manifest_store
+from manifest_store import ManifestStore
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest_store, "COMPACT_MIN_RECORDS", 40)
+    monkeypatch.setattr(manifest_store, "INDEX_FLUSH_EVERY", 7)
+    return ManifestStore(str(tmp_path / "CoreLink-Manifest"))
+
+def rewrite(store, rounds, ids=10):
+    """Update the same ids over and over; returns the latest meta per id"""
+    latest = {}
+    for n in range(rounds):
+        for i in range(ids):
+            latest[f"conv_{i}"] = {"title": f"chat {i}", "rev": n}
+            store.put(f"conv_{i}", latest[f"conv_{i}"])
+    return latest
+
+def assert_matches(store, latest):
+    assert len(store) == len(latest)
+    for conv_id, meta in latest.items():
+        assert store.get(conv_id) == meta, f"{conv_id} looked up the wrong record"
+    assert dict(store.items()) == latest
+
+def test_compaction_keeps_index_and_lookups(store):
+    print("=== Testing manifest compaction ===")
+    latest = rewrite(store, 5)
+    print(f"Records: {store.records}, live: {len(store)}, log: {store.log_size} bytes")
+    assert store.records < 40, "Log was never compacted"
+    assert store.log_size == store.log_path.stat().st_size
+    with open(store.log_path, "rb") as f:
+        assert len(f.readlines()) == store.records
+    assert_matches(store, latest)
+
+    with open(store.index_path, "r", encoding="utf-8") as f:
+        saved = json.load(f)
+    with open(store.log_path, "rb") as f:
+        for conv_id, (offset, length) in saved["offsets"].items():
+            f.seek(offset)
+            assert json.loads(f.read(length))["id"] == conv_id
+    print("✓ Compaction test passed\n")
+
+def test_reopen_after_compaction(store):
+    """A new store reads the compacted index and replays puts made after it"""
+    latest = rewrite(store, 5)
+    latest["conv_new"] = {"title": "after compaction"}
+    store.put("conv_new", latest["conv_new"])  # not in the saved index yet
+
+    reopened = ManifestStore(str(store.log_path.with_suffix("")))
+    assert_matches(reopened, latest)
+    latest.update(rewrite(reopened, 4))
+    assert_matches(reopened, latest)
+    assert_matches(ManifestStore(str(store.log_path.with_suffix(""))), latest)
+
+def test_snapshot_matches_after_compaction(store):
+    latest = rewrite(store, 5)
+    store.compact()
+    with open(store.snapshot_path, "r", encoding="utf-8") as f:
+        assert json.load(f) == latest
+    assert store.records == len(latest)
+    assert_matches(store, latest)
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the streaming VAD in vtt_processor.py
+Synthetic numpy audio only: no microphone, WAV fixtures or WhisperX model
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+np = pytest.importorskip("numpy")
+
+import vtt_processor
+from vtt_processor import EnergyVAD, segment, SAMPLE_RATE, FRAME_SAMPLES, BLOCK_FRAMES
+
+rng = np.random.default_rng(0)
+
+def silence(seconds, level=0.002):
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * level).astype(np.float32)
+
+def tone(seconds, amplitude=0.3, freq=220.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+def as_blocks(audio, consumed=None):
+    """Mic-sized blocks; `consumed` counts how many the segmenter pulled"""
+    size = FRAME_SAMPLES * BLOCK_FRAMES
+    for start in range(0, len(audio), size):
+        if consumed is not None:
+            consumed[0] += 1
+        yield audio[start:start + size]
+
+def test_energy_vad():
+    """Speech is energy above both MIN_RMS and a multiple of the noise floor"""
+    print("=== Testing EnergyVAD ===")
+    vad = EnergyVAD()
+    frame = FRAME_SAMPLES
+    assert not vad.is_speech(silence(1)[:frame]), "Background noise detected as speech"
+    assert vad.is_speech(tone(1)[:frame]), "Tone not detected as speech"
+
+    # Floor settles near 0.005 RMS; 0.012 clears MIN_RMS but not SPEECH_RATIO x floor
+    vad = EnergyVAD()
+    for _ in range(100):
+        vad.is_speech(silence(frame / SAMPLE_RATE, level=0.005))
+    print(f"Noise floor: {vad.noise:.4f}")
+    assert 0.004 < vad.noise < 0.006
+    assert not vad.is_speech(silence(frame / SAMPLE_RATE, level=0.012)), "Floor ratio ignored"
+    assert vad.is_speech(silence(frame / SAMPLE_RATE, level=0.05))
+
+    # Speech frames do not raise the floor
+    before = vad.noise
+    for _ in range(20):
+        vad.is_speech(tone(frame / SAMPLE_RATE))
+    assert vad.noise == before
+    print("✓ All EnergyVAD tests passed\n")
+
+def test_segment_chunks_and_stop():
+    """Pauses close chunks (with pre-roll), trailing silence ends capture"""
+    print("=== Testing segment() ===")
+    audio = np.concatenate([silence(1), tone(1), silence(1), tone(1), silence(10)])
+    consumed = [0]
+    chunks = list(segment(as_blocks(audio, consumed)))
+    starts = [round(start, 2) for start, _ in chunks]
+    lengths = [round(len(chunk) / SAMPLE_RATE, 2) for _, chunk in chunks]
+    print(f"Chunks: starts={starts} lengths={lengths}")
+
+    preroll = vtt_processor.PREROLL_MS / 1000
+    assert len(chunks) == 2, f"Expected 2 chunks, got {len(chunks)}"
+    for (start, chunk), onset in zip(chunks, (1.0, 3.0)):
+        assert abs(start - (onset - preroll)) <= 0.03, f"Chunk start {start} vs onset {onset}"
+        seconds = len(chunk) / SAMPLE_RATE
+        assert 1.0 + preroll <= seconds <= 1.0 + preroll + vtt_processor.CHUNK_SILENCE + 0.06
+        assert chunk.dtype == np.float32
+
+    # Capture stopped STOP_SILENCE after the last speech, not at the end of the audio
+    block_sec = FRAME_SAMPLES * BLOCK_FRAMES / SAMPLE_RATE
+    heard_until = consumed[0] * block_sec
+    print(f"Consumed {heard_until:.2f}s of {len(audio) / SAMPLE_RATE:.0f}s")
+    assert heard_until <= 4.0 + vtt_processor.STOP_SILENCE + block_sec + 0.01
+    print("✓ All segment() tests passed\n")
+
+def test_segment_limits():
+    """No speech gives up after NO_SPEECH_TIMEOUT; long speech is cut at MAX_CHUNK"""
+    consumed = [0]
+    assert list(segment(as_blocks(silence(30), consumed))) == []
+    block_sec = FRAME_SAMPLES * BLOCK_FRAMES / SAMPLE_RATE
+    assert consumed[0] * block_sec <= vtt_processor.NO_SPEECH_TIMEOUT + block_sec + 0.01
+
+    chunks = list(segment(as_blocks(np.concatenate([tone(20), silence(3)]))))
+    lengths = [len(chunk) / SAMPLE_RATE for _, chunk in chunks]
+    print(f"Long speech chunk lengths: {[round(x, 2) for x in lengths]}")
+    assert len(chunks) == 2
+    assert abs(lengths[0] - vtt_processor.MAX_CHUNK) <= 0.03
+    assert abs(chunks[1][0] - chunks[0][0] - lengths[0]) <= 0.03, "Second chunk does not follow the first"
+
+def test_segment_closes_source():
+    """Stopping early closes the block source (the mic stream)"""
+    closed = []
+
+    def blocks():
+        try:
+            yield from as_blocks(np.concatenate([tone(1), silence(10)]))
+        finally:
+            closed.append(True)
+
+    list(segment(blocks()))
+    assert closed == [True]
+
+def test_stream_error_skips_clipboard(monkeypatch):
+    """A failed stream returns its own error instead of a KeyError on "text" """
+    copied = []
+    monkeypatch.setattr(vtt_processor, "mic_blocks", lambda: iter(()))
+    monkeypatch.setattr(vtt_processor, "stream_transcribe",
+                        lambda blocks: {"status": "error", "error": "RuntimeError: no model", "chunks": []})
+    monkeypatch.setattr(vtt_processor, "copy_to_clipboard", copied.append)
+    result = vtt_processor.handle_request({"action": "stream", "clipboard": True})
+    assert result["error"] == "RuntimeError: no model"
+    assert copied == []
+
+if __name__ == "__main__":
+    test_energy_vad()
+    test_segment_chunks_and_stop()
+    test_segment_limits()
+    test_segment_closes_source()
+    print("🎉 All VTT tests passed!")
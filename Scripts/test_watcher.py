@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Offline tests for watcher.py: PollSource on a scratch tree, Debouncer driven
+with fake times, Watcher.step()/offer() called directly. The chat import is
+replaced by a stub, so nothing is archived.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import time
+import threading
+from pathlib import Path
+import pytest
+
+import watcher
+from watcher import Watcher, Debouncer, PollSource
+from CoreCompile import read_index, set_index_status
+
+TRANSCRIPT = "User: how do I archive the canvas\nKimi: snapshot it first\n"
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    """Scratch ROOT as cwd (CoreCompile's Archive/ paths are relative to it)"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "exports").mkdir()
+    return tmp_path
+
+@pytest.fixture
+def imports(monkeypatch):
+    """Stub handle_import_chat; set `gate` to hold imports until released"""
+    calls = {"paths": [], "gate": None}
+
+    def fake_import(params):
+        if calls["gate"] is not None:
+            calls["gate"].wait(5)
+        calls["paths"].append(Path(params["path"]).name)
+        return {"status": "keep", "id": "conv_1"}
+
+    monkeypatch.setattr(watcher, "handle_import_chat", fake_import)
+    return calls
+
+def make_watcher(root, **kwargs):
+    kwargs.setdefault("debounce", 0.2)
+    return Watcher(root, "WATCH_INDEX.csv", poll=True, interval=0.05, report=lambda _: None, **kwargs)
+
+def status(rel):
+    return read_index("WATCH_INDEX.csv").get(rel.replace("/", "\\"))
+
+def run_until(w, condition, seconds=5.0):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        w.step(0.05)
+        if condition():
+            return True
+    return False
+
+def test_debouncer_waits_for_quiet(tree):
+    """A file still growing is not ready; it is ready once unchanged for `delay`"""
+    path = tree / "exports" / "a.txt"
+    path.write_text("User: hi\n")
+    debouncer = Debouncer(tree, delay=2.0)
+    debouncer.touch("exports/a.txt", now=0.0)
+    assert debouncer.ready(0.5) == []  # first look records the size/mtime
+    with open(path, "a") as f:
+        f.write("Kimi: still writing\n")
+    assert debouncer.ready(2.4) == []  # changed since: the quiet window restarts
+    assert debouncer.ready(4.3) == []
+    settled = debouncer.ready(4.5)
+    assert [rel for rel, _ in settled] == ["exports/a.txt"]
+    assert debouncer.ready(10.0) == []  # handed out once
+
+    debouncer.touch("exports/gone.txt", now=0.0)
+    assert debouncer.ready(5.0) == [] and debouncer.paths == {}
+
+def test_poll_source_scans_and_verifies():
+    source = PollSource(interval=0.0)
+    modes = [source.wait(0)[1] for _ in range(watcher.VERIFY_EVERY)]
+    assert modes[:-1] == ["scan"] * (watcher.VERIFY_EVERY - 1) and modes[-1] == "verify"
+
+def test_growing_file_imported_once_after_it_settles(tree, imports):
+    """pending → queued → imported; no import while the export is still being written"""
+    print("=== Testing Watcher import flow ===")
+    w = make_watcher(tree)
+    imports["gate"] = threading.Event()
+    try:
+        w.start()
+        path = tree / "exports" / "chat.txt"
+        path.write_text(TRANSCRIPT)
+        assert run_until(w, lambda: status("exports/chat.txt") == "pending")
+
+        # Keep appending faster than the debounce window: nothing is queued
+        for i in range(6):
+            with open(path, "a") as f:
+                f.write(f"User: more {i}\nKimi: ok\n")
+            w.step(0.05)
+            assert "exports/chat.txt" not in w.offered, "Queued while still being written"
+
+        assert run_until(w, lambda: status("exports/chat.txt") == "queued")
+        assert imports["paths"] == []
+        imports["gate"].set()
+        assert run_until(w, lambda: status("exports/chat.txt") == "imported")
+        run_until(w, lambda: False, seconds=0.6)  # another quiet window: not imported again
+    finally:
+        imports["gate"].set()
+        w.close()
+    print(f"Imports: {imports['paths']}")
+    assert imports["paths"] == ["chat.txt"]
+    print("✓ Watcher import flow passed\n")
+
+def test_full_queue_leaves_file_pending(tree, imports):
+    """When the import queue is full the file is not marked queued and is offered again"""
+    for name in ("a.txt", "b.txt"):
+        (tree / "exports" / name).write_text(TRANSCRIPT)
+    w = make_watcher(tree, queue_size=1)
+    w.refresh_index()  # importer not started: the queue never drains
+
+    def settle(now):
+        w.pending.ready(now)  # first look records the stamp
+        for rel, stamp in sorted(w.pending.ready(now + 1)):
+            w.offer(rel, stamp)
+
+    settle(time.monotonic() + 10)
+    assert list(w.offered) == ["exports/a.txt"]
+    assert "exports/b.txt" in w.pending.paths, "Rejected file was dropped instead of kept pending"
+    w.flush_statuses()
+    assert status("exports/a.txt") == "queued"
+    assert status("exports/b.txt") == "pending"
+
+    assert w.imports.get_nowait() == "exports/a.txt"  # room again
+    settle(time.monotonic() + 20)
+    assert list(w.offered) == ["exports/a.txt", "exports/b.txt"]
+    w.flush_statuses()
+    assert status("exports/b.txt") == "queued"
+    w.source.close()
+
+def test_restart_picks_up_pending_and_queued(tree, imports):
+    """Rows a previous run left pending/queued are imported; imported rows are not"""
+    for name in ("left_pending.txt", "left_queued.txt", "done.txt"):
+        (tree / "exports" / name).write_text(TRANSCRIPT)
+    first = make_watcher(tree)
+    first.refresh_index()
+    set_index_status("WATCH_INDEX.csv", {"exports\\left_queued.txt": "queued",
+                                         "exports\\done.txt": "imported"})
+    first.source.close()
+
+    w = make_watcher(tree)
+    try:
+        w.start()
+        assert set(w.pending.paths) == {"exports/left_pending.txt", "exports/left_queued.txt"}
+        assert run_until(w, lambda: len(imports["paths"]) == 2 and not w.statuses
+                         and status("exports/left_queued.txt") == "imported")
+    finally:
+        w.close()
+    assert sorted(imports["paths"]) == ["left_pending.txt", "left_queued.txt"]
+    assert status("exports/left_pending.txt") == "imported"
+    assert status("exports/done.txt") == "imported"
+
+def test_non_transcripts_are_not_imported(tree, imports):
+    (tree / "exports" / "notes.txt").write_text("just some notes\n")
+    w = make_watcher(tree)
+    w.refresh_index()
+    w.offer("exports/notes.txt", (1, 1))
+    assert w.offered == {} and w.imports.empty()
+    w.source.close()
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Offline tests for CoreCompile's WriteBatch journal: a crash before the
+journal is durable leaves every target untouched, a crash after it is rolled
+forward by recover_write_journal, and a failed apply is rolled back.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+from pathlib import Path
+import pytest
+
+import CoreCompile
+from CoreCompile import WriteBatch, recover_write_journal
+
+class Crash(BaseException):
+    """Process death: not an Exception, so commit() has no chance to clean up"""
+
+@pytest.fixture
+def targets(tmp_path, monkeypatch):
+    """cwd = scratch ROOT; one existing target and one new one"""
+    monkeypatch.chdir(tmp_path)
+    Path("Data").mkdir()
+    Path("Data/existing.json").write_text('{"v": "old"}', encoding="utf-8")
+    return Path("Data/existing.json"), Path("Data/created.json")
+
+def stage_both(batch, existing, created):
+    batch.stage(str(existing), {"v": "new"})
+    batch.stage(str(created), {"v": "created"})
+
+def journals():
+    return sorted(p.name for p in Path(CoreCompile.JOURNAL_DIR).glob("batch_*"))
+
+def test_crash_before_commit_rolls_back(targets, monkeypatch):
+    """Dying while the journal is still a .tmp: nothing applied, recovery discards it"""
+    print("=== Testing crash before the commit point ===")
+    existing, created = targets
+    real_replace = os.replace
+
+    def crash_on_journal(src, dst):
+        if Path(dst).parent.name == "Journal":
+            raise Crash()
+        real_replace(src, dst)
+
+    monkeypatch.setattr(CoreCompile.os, "replace", crash_on_journal)
+    batch = WriteBatch()
+    stage_both(batch, existing, created)
+    with pytest.raises(Crash):
+        batch.commit()
+    monkeypatch.setattr(CoreCompile.os, "replace", real_replace)
+
+    assert [name.endswith(".tmp") for name in journals()] == [True]
+    assert recover_write_journal() == 0
+    assert journals() == []
+    assert json.loads(existing.read_text()) == {"v": "old"}
+    assert not created.exists()
+    print("✓ Uncommitted batch discarded\n")
+
+def test_crash_after_commit_rolls_forward(targets, monkeypatch):
+    """Dying half-way through applying a durable journal: recovery finishes the batch"""
+    print("=== Testing crash after the commit point ===")
+    existing, created = targets
+    real_apply = CoreCompile._apply_write
+    applied = []
+
+    def crash_on_second(write):
+        if applied:
+            raise Crash()
+        real_apply(write)
+        applied.append(write["target"])
+
+    monkeypatch.setattr(CoreCompile, "_apply_write", crash_on_second)
+    batch = WriteBatch()
+    stage_both(batch, existing, created)
+    with pytest.raises(Crash):
+        batch.commit()
+    monkeypatch.setattr(CoreCompile, "_apply_write", real_apply)
+
+    assert len(journals()) == 1 and journals()[0].endswith(".json")
+    assert json.loads(existing.read_text()) == {"v": "new"}
+    assert not created.exists(), "Second write landed before the crash"
+    assert recover_write_journal() == 1
+    assert journals() == []
+    assert json.loads(existing.read_text()) == {"v": "new"}
+    assert json.loads(created.read_text()) == {"v": "created"}
+    assert recover_write_journal() == 0
+    print("✓ Committed batch rolled forward\n")
+
+def test_failed_apply_rolls_back(targets, monkeypatch):
+    """An error part-way through restores the targets already replaced, from the archive"""
+    existing, created = targets
+    real_apply = CoreCompile._apply_write
+
+    def fail_on_created(write):
+        if write["target"] == str(created):
+            raise OSError("disk full")
+        real_apply(write)
+
+    monkeypatch.setattr(CoreCompile, "_apply_write", fail_on_created)
+    batch = WriteBatch()
+    stage_both(batch, existing, created)
+    with pytest.raises(OSError):
+        batch.commit()
+
+    assert journals() == []
+    assert json.loads(existing.read_text()) == {"v": "old"}
+    assert not created.exists()
+    assert recover_write_journal() == 0
+
+def test_rollback_writes_restores_archived_versions(targets):
+    existing, created = targets
+    batch = WriteBatch()
+    stage_both(batch, existing, created)
+    batch.commit()
+    assert json.loads(existing.read_text()) == {"v": "new"}
+
+    CoreCompile._rollback_writes(batch.writes)
+    assert json.loads(existing.read_text()) == {"v": "old"}
+    assert not created.exists()
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -1,46 +1,483 @@
 #!/usr/bin/env python3
-"""VTT Processor for CoreLink"""
-import sys, json, pyperclip, argparse
-import sounddevice as sd
-import wavio
-import whisperx
+"""VTT Processor for CoreLink
+
+One-shot:  vtt_processor.py --duration 8 --clipboard
+Streaming: vtt_processor.py --stream --clipboard   (stops on silence)
+Replay:    vtt_processor.py --replay a.wav b.wav [--realtime]   (offline harness)
+Batch:     vtt_processor.py --batch DIR [--jobs 4]   (→ DIR/transcripts.jsonl + transcripts_manifest.json)
+Server:    vtt_processor.py --serve   (model loaded once, JSON lines on 127.0.0.1:SERVER_PORT)
+  {"action": "stream", "clipboard": true}                 → {"status", "text", "length", "seconds", "chunks"}
+  {"action": "record", "duration": 8, "clipboard": true}  → {"status", "text", "length", "seconds"}
+  {"action": "transcribe", "path": "clip.wav"}             → same
+  {"action": "ping"} / {"action": "shutdown"}
+Requests are queued and run one at a time on the loaded model.
+
+Streaming keeps audio in memory as float32: an energy VAD cuts it into speech
+chunks at short pauses, each chunk is transcribed while capture continues, and
+capture stops after STOP_SILENCE seconds of silence following speech.
+"""
+import os, sys, json, time, queue, argparse, tempfile, threading, socketserver
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
+# sounddevice, wavio, whisperx and pyperclip are imported where they are used,
+# so the VAD/segmenter can be imported (and tested) without audio or model stacks
 
 # --- Config ---
 MODEL_NAME = "base"
 SAMPLE_RATE = 16000
+SERVER_HOST = "127.0.0.1"  # local only
+SERVER_PORT = 47821
+
+# --- Streaming / VAD ---
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+BLOCK_FRAMES = 5  # mic callback size, in VAD frames
+MIN_RMS = 0.01  # below this a frame is silence whatever the noise floor (~ -40 dBFS)
+SPEECH_RATIO = 3.0  # speech = RMS this far above the running noise floor
+PREROLL_MS = 240  # audio kept ahead of a speech onset
+CHUNK_SILENCE = 0.5  # pause (s) that closes a chunk
+MAX_CHUNK = 15.0  # force a chunk boundary (s)
+STOP_SILENCE = 1.5  # silence (s) after speech that ends capture
+NO_SPEECH_TIMEOUT = 10.0  # give up if nobody speaks (s)
+MAX_DURATION = 60.0  # hard capture limit (s)
+
+# --- Batch ---
+AUDIO_SUFFIXES = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm")
+BATCH_OUTPUT = "transcripts.jsonl"  # one line per file, also the resume checkpoint
+BATCH_MANIFEST = "transcripts_manifest.json"
+BATCH_SIZE = 8  # VAD segments of one file per forward pass (whisperx batch_size)
+
+_model = None
 
 def record_audio(filepath: Path, duration: int):
+    import sounddevice as sd
+    import wavio
     print(f"🎤 Recording {duration}s... (Speak now)")
-    audio = sd.rec(int(duration * SAMPLE_RATE), samplerate=SAMPLE_RATE, 
+    audio = sd.rec(int(duration * SAMPLE_RATE), samplerate=SAMPLE_RATE,
                    channels=1, dtype='float32')
     sd.wait()
     wavio.write(str(filepath), audio, SAMPLE_RATE, sampwidth=2)
     print("✅ Recording saved")
 
+def get_model():
+    """Load WhisperX once per process"""
+    global _model
+    if _model is None:
+        import whisperx
+        print(f"🤖 Loading WhisperX '{MODEL_NAME}'...")
+        _model = whisperx.load_model(MODEL_NAME, device="cpu", compute_type="int8")
+    return _model
+
+def copy_to_clipboard(text: str):
+    import pyperclip
+    pyperclip.copy(text)
+
+def _result_text(result: dict) -> str:
+    if "text" in result:
+        return result["text"].strip()
+    return " ".join(seg["text"].strip() for seg in result.get("segments", [])).strip()
+
 def transcribe(filepath: Path) -> str:
-    print(f"🤖 Loading WhisperX '{MODEL_NAME}'...")
-    model = whisperx.load_model(MODEL_NAME, device="cpu", compute_type="int8")
-    result = model.transcribe(str(filepath))
-    return result["text"].strip()
+    return _result_text(get_model().transcribe(str(filepath)))
+
+def transcribe_array(audio: np.ndarray) -> str:
+    """16 kHz mono float32 straight to the model, no WAV round trip"""
+    return _result_text(get_model().transcribe(audio))
+
+# --- Batch ---
+def decode_audio(filepath: Path) -> np.ndarray:
+    """Decode + resample on a pool thread (ffmpeg runs outside the GIL)"""
+    if filepath.suffix.lower() == ".wav":
+        return load_wav(filepath)
+    import whisperx
+    return whisperx.load_audio(str(filepath))
+
+def _file_stamp(filepath: Path) -> list:
+    st = filepath.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+def load_batch_output(output: Path) -> dict:
+    """file → stamp for files already transcribed (changed files are redone)"""
+    done = {}
+    if not output.exists():
+        return done
+    with open(output, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn line from an interrupted run
+            if record.get("status") == "success":
+                done[record["file"]] = record["stamp"]
+    return done
+
+def write_batch_manifest(directory: Path, output: Path, totals: dict):
+    """Summary of the whole output file, rewritten atomically after each run"""
+    files = {}
+    with open(output, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            files[record["file"]] = {"status": record["status"], "line": number,
+                                     "duration": record.get("duration"), "length": record.get("length")}
+    manifest = {"model": MODEL_NAME, "directory": str(directory), "output": output.name,
+                "updated": datetime.now().isoformat(), "last_run": totals, "files": files}
+    path = directory / BATCH_MANIFEST
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+def batch_transcribe(directory, jobs: int = 4, resume: bool = True, report=print) -> dict:
+    """
+    Transcribe every audio file under `directory` with one loaded model.
+    Only decoding is parallel: `jobs` threads decode ahead (at most 2 * jobs
+    decoded clips in memory) while the model transcribes one file at a time,
+    feature extraction included; within a file whisperx batches its VAD
+    segments BATCH_SIZE per forward pass.
+    Each result is appended to transcripts.jsonl as soon as it exists, so an
+    interrupted run resumes at the first file without a successful line.
+    """
+    directory = Path(directory)
+    output = directory / BATCH_OUTPUT
+    files = sorted(p for p in directory.rglob("*") if p.suffix.lower() in AUDIO_SUFFIXES and p.is_file())
+    done = load_batch_output(output) if resume else {}
+    todo = [p for p in files if done.get(p.relative_to(directory).as_posix()) != _file_stamp(p)]
+    totals = {"files": 0, "skipped": len(files) - len(todo), "errors": 0, "audio_seconds": 0.0}
+    if totals["skipped"]:
+        report(f"Resuming: {totals['skipped']} file(s) already transcribed")
+
+    get_model()
+    started = time.perf_counter()
+    if output.exists() and output.stat().st_size:
+        with open(output, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b"\n"
+        if torn:
+            with open(output, 'a', encoding='utf-8') as f:
+                f.write("\n")  # keep the next record off the interrupted line
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool, open(output, 'a', encoding='utf-8') as out:
+        in_flight = deque()
+        pending = iter(todo)
+        for filepath in pending:
+            in_flight.append((filepath, pool.submit(decode_audio, filepath)))
+            if len(in_flight) >= jobs * 2:
+                break
+
+        while in_flight:
+            filepath, future = in_flight.popleft()
+            next_path = next(pending, None)
+            if next_path:
+                in_flight.append((next_path, pool.submit(decode_audio, next_path)))
+
+            rel = filepath.relative_to(directory).as_posix()
+            clip_started = time.perf_counter()
+            record = {"file": rel, "stamp": _file_stamp(filepath)}
+            try:
+                audio = future.result()
+                result = get_model().transcribe(audio, batch_size=BATCH_SIZE)
+                text = _result_text(result)
+                duration = len(audio) / SAMPLE_RATE
+                record.update({"status": "success", "duration": round(duration, 2), "text": text,
+                               "length": len(text), "language": result.get("language"),
+                               "segments": [{"start": seg.get("start"), "end": seg.get("end"),
+                                             "text": seg["text"].strip()} for seg in result.get("segments", [])]})
+                totals["audio_seconds"] += duration
+            except Exception as e:
+                record.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+                totals["errors"] += 1
+            record["seconds"] = round(time.perf_counter() - clip_started, 3)
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+
+            totals["files"] += 1
+            report(f"[{totals['files']}/{len(todo)}] {record['status']:7} {rel} ({record['seconds']:.2f}s)"
+                   + (f" - {record['error']}" if "error" in record else ""))
+
+    elapsed = time.perf_counter() - started
+    totals["seconds"] = round(elapsed, 3)
+    totals["audio_seconds"] = round(totals["audio_seconds"], 2)
+    totals["realtime_factor"] = round(totals["audio_seconds"] / elapsed, 1) if elapsed else 0.0
+    if output.exists():
+        write_batch_manifest(directory, output, totals)
+    return totals
+
+# --- Streaming ---
+def mic_blocks():
+    """Yield float32 blocks from the default input until the consumer stops"""
+    import sounddevice as sd
+    blocks = queue.Queue()
+
+    def callback(indata, frames, time_info, status):
+        blocks.put(indata[:, 0].copy())
+
+    with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype='float32',
+                        blocksize=FRAME_SAMPLES * BLOCK_FRAMES, callback=callback):
+        print("🎤 Listening... (stops when you stop talking)")
+        while True:
+            yield blocks.get()
+
+def load_wav(filepath) -> np.ndarray:
+    """WAV fixture → 16 kHz mono float32 in [-1, 1]"""
+    import wavio
+    wav = wavio.read(str(filepath))
+    data = wav.data.astype(np.float32)
+    if wav.sampwidth == 1:
+        data = (data - 128) / 128  # 8-bit WAV is unsigned
+    else:
+        data /= float(2 ** (8 * wav.sampwidth - 1))
+    audio = data.mean(axis=1) if data.ndim > 1 else data
+    if wav.rate != SAMPLE_RATE:
+        positions = np.arange(0, len(audio), wav.rate / SAMPLE_RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio)
+    return audio.astype(np.float32)
+
+def wav_blocks(filepath, realtime: bool = False):
+    """Replay a WAV as mic-sized blocks (optionally paced like a live mic)"""
+    audio = load_wav(filepath)
+    size = FRAME_SAMPLES * BLOCK_FRAMES
+    for start in range(0, len(audio), size):
+        if realtime:
+            time.sleep(size / SAMPLE_RATE)
+        yield audio[start:start + size]
+
+class EnergyVAD:
+    """Frame-level speech/silence from RMS energy against a running noise floor"""
+
+    def __init__(self, min_rms: float = MIN_RMS, ratio: float = SPEECH_RATIO):
+        self.min_rms = min_rms
+        self.ratio = ratio
+        self.noise = None
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.mean(frame * frame)))
+        speech = rms > max(self.min_rms, (self.noise or 0.0) * self.ratio)
+        if not speech:
+            self.noise = rms if self.noise is None else 0.95 * self.noise + 0.05 * rms
+        return speech
+
+def segment(blocks, vad: EnergyVAD = None):
+    """
+    Yield (start_seconds, float32 chunk) for each stretch of speech in `blocks`.
+    Returns (closing `blocks`) on STOP_SILENCE after speech, NO_SPEECH_TIMEOUT
+    without any, or MAX_DURATION.
+    """
+    vad = vad or EnergyVAD()
+    frame_sec = FRAME_SAMPLES / SAMPLE_RATE
+    preroll = deque(maxlen=max(1, PREROLL_MS // FRAME_MS))
+    chunk, chunk_start = [], 0.0
+    pause = quiet = elapsed = 0.0
+    heard = stop = False
+    pending = np.zeros(0, dtype=np.float32)
+    try:
+        for block in blocks:
+            pending = np.concatenate((pending, block))
+            while len(pending) >= FRAME_SAMPLES:
+                frame, pending = pending[:FRAME_SAMPLES], pending[FRAME_SAMPLES:]
+                speech = vad.is_speech(frame)
+                if chunk:
+                    chunk.append(frame)
+                    pause = 0.0 if speech else pause + frame_sec
+                    if pause >= CHUNK_SILENCE or len(chunk) * frame_sec >= MAX_CHUNK:
+                        yield chunk_start, np.concatenate(chunk)
+                        chunk = []
+                elif speech:
+                    chunk_start = elapsed - len(preroll) * frame_sec
+                    chunk = list(preroll) + [frame]
+                    preroll.clear()
+                    pause = 0.0
+                    heard = True
+                else:
+                    preroll.append(frame)
+                elapsed += frame_sec
+                quiet = 0.0 if speech else quiet + frame_sec
+                if (heard and quiet >= STOP_SILENCE) or (not heard and elapsed >= NO_SPEECH_TIMEOUT) \
+                        or elapsed >= MAX_DURATION:
+                    stop = True
+                    break
+            if stop:
+                break
+        if chunk:
+            yield chunk_start, np.concatenate(chunk)
+    finally:
+        if hasattr(blocks, "close"):
+            blocks.close()  # stops the mic stream
+
+def stream_transcribe(blocks, on_chunk=None) -> dict:
+    """Capture and transcribe at once: chunks are transcribed on a second thread as they close"""
+    started = time.perf_counter()
+    chunks = queue.Queue()
+    results = []
+    errors = []
+
+    def worker():
+        while True:
+            item = chunks.get()
+            if item is None:
+                break
+            start, audio, closed_at = item
+            try:
+                text = transcribe_array(audio)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            entry = {"start": round(start, 2), "end": round(start + len(audio) / SAMPLE_RATE, 2),
+                     "text": text, "latency": round(time.perf_counter() - closed_at, 3)}
+            results.append(entry)
+            if on_chunk:
+                on_chunk(entry)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    audio_seconds = 0.0
+    for start, audio in segment(blocks):
+        audio_seconds = start + len(audio) / SAMPLE_RATE
+        chunks.put((start, audio, time.perf_counter()))
+    captured = time.perf_counter()
+    chunks.put(None)
+    thread.join()
+    if errors:
+        return {"status": "error", "error": errors[0], "chunks": results}
+
+    text = " ".join(entry["text"] for entry in results if entry["text"])
+    return {"status": "success", "text": text, "length": len(text), "chunks": results,
+            "audio_seconds": round(audio_seconds, 2),
+            "tail_seconds": round(time.perf_counter() - captured, 3),  # stop → final text
+            "seconds": round(time.perf_counter() - started, 3)}
+
+# --- Server ---
+def handle_request(request: dict) -> dict:
+    """Run one record/transcribe request on the loaded model"""
+    started = time.perf_counter()
+    temp_file = None
+    try:
+        if request.get("action") == "stream":
+            result = stream_transcribe(mic_blocks())
+            if request.get("clipboard") and result["status"] == "success":
+                copy_to_clipboard(result["text"])
+            return result
+        if request.get("action") == "record":
+            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+                temp_file = Path(f.name)
+            record_audio(temp_file, request.get("duration", 5))
+            audio_path = temp_file
+        elif request.get("action") == "transcribe":
+            audio_path = Path(request["path"])
+        else:
+            return {"status": "error", "error": f"Unknown action: {request.get('action')}"}
+
+        text = transcribe(audio_path)
+        if request.get("clipboard"):
+            copy_to_clipboard(text)
+        return {"status": "success", "text": text, "length": len(text),
+                "seconds": round(time.perf_counter() - started, 3)}
+    except Exception as e:
+        return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    finally:
+        if temp_file and temp_file.exists():
+            temp_file.unlink()
+
+def serve(host: str = SERVER_HOST, port: int = SERVER_PORT):
+    get_model()  # pay the load before accepting work
+    jobs = queue.Queue()
+
+    def model_loop():
+        while True:
+            request, slot = jobs.get()
+            slot.put(handle_request(request))
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                action = request.get("action")
+                if action == "ping":
+                    response = {"status": "ok", "model": MODEL_NAME, "queued": jobs.qsize()}
+                elif action == "shutdown":
+                    response = {"status": "ok"}
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+                else:
+                    slot = queue.Queue(maxsize=1)
+                    jobs.put((request, slot))
+                    response = slot.get()
+                self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    socketserver.ThreadingTCPServer.daemon_threads = True
+    with socketserver.ThreadingTCPServer((host, port), Handler) as server:
+        threading.Thread(target=model_loop, daemon=True).start()
+        print(json.dumps({"status": "ready", "host": host, "port": port}), flush=True)
+        server.serve_forever()
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--duration", type=int, default=5)
     parser.add_argument("--clipboard", action="store_true")
+    parser.add_argument("--stream", action="store_true", help="record until silence, transcribing as you speak")
+    parser.add_argument("--replay", nargs="+", metavar="WAV", help="run the streaming path over WAV fixtures")
+    parser.add_argument("--realtime", action="store_true", help="pace --replay like a live mic")
+    parser.add_argument("--batch", metavar="DIR", help="transcribe every audio file under DIR")
+    parser.add_argument("--jobs", type=int, default=4, help="--batch decode threads")
+    parser.add_argument("--restart", action="store_true", help="--batch: ignore earlier results")
+    parser.add_argument("--serve", action="store_true", help="keep the model loaded and serve requests")
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
     args = parser.parse_args()
-    
+
+    if args.serve:
+        serve(port=args.port)
+        return 0
+
+    if args.batch:
+        totals = batch_transcribe(args.batch, args.jobs, resume=not args.restart)
+        print(json.dumps(totals, indent=2))
+        return 1 if totals["errors"] else 0
+
+    if args.replay:
+        get_model()  # keep the load out of the timings
+        report = lambda c: print(f"  [{c['start']:6.2f}-{c['end']:6.2f}s +{c['latency']:.2f}s] {c['text']}")
+        for wav in args.replay:
+            print(f"▶ {wav}")
+            result = stream_transcribe(wav_blocks(wav, args.realtime), on_chunk=report)
+            print(json.dumps({"file": str(wav), **{k: v for k, v in result.items() if k != "chunks"},
+                              "chunk_count": len(result["chunks"])}))
+        return 0
+
+    if args.stream:
+        try:
+            result = stream_transcribe(mic_blocks())
+            if result["status"] != "success":
+                print(json.dumps({k: v for k, v in result.items() if k != "chunks"}), file=sys.stderr)
+                return 1
+            if args.clipboard:
+                copy_to_clipboard(result["text"])
+                print(f"\n📋 Copied to clipboard: {result['text'][:60]}...")
+            print(json.dumps({k: v for k, v in result.items() if k != "chunks"}))
+            return 0
+        except Exception as e:
+            print(json.dumps({"status": "error", "error": str(e)}), file=sys.stderr)
+            return 1
+
     temp_file = Path.home() / "temp_vtt.wav"
     try:
         record_audio(temp_file, args.duration)
         text = transcribe(temp_file)
-        
+
         if args.clipboard:
-            pyperclip.copy(text)
+            copy_to_clipboard(text)
             print(f"\n📋 Copied to clipboard: {text[:60]}...")
-        
+
         # Return JSON for CoreLink logging
-        print(json.dumps({"status": "success", "text": text}))
+        print(json.dumps({"status": "success", "text": text, "length": len(text)}))
         return 0
     except Exception as e:
         print(json.dumps({"status": "error", "error": str(e)}), file=sys.stderr)
@@ -50,4 +487,4 @@ def main():
             temp_file.unlink()
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
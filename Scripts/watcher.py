@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Watch service: keeps WATCH_INDEX.csv current and auto-queues chat imports.
+
+    python watcher.py [--root .] [--index WATCH_INDEX.csv] [--poll] [--debounce 2]
+
+events        inotify watches on every mapped directory (Linux, via ctypes);
+              elsewhere, or past the watch limit, the dirmapper is polled
+index         change events trigger the incremental dirmapper (only directories
+              whose mtime moved are listed), at most once per debounce window;
+              the description column carries the status:
+              pending → queued → imported | format_error | error
+debounce      a file is acted on once it has been quiet (no event, same
+              size/mtime) for DEBOUNCE seconds, so an export still being
+              written is imported once, complete
+import queue  settled transcripts go into a bounded queue drained by one import
+              thread; when it is full they stay pending and are offered again
+
+Rows left pending/queued by a previous run are picked up at start.
+"""
+import os
+import sys
+import stat
+import time
+import errno
+import queue
+import select
+import struct
+import ctypes
+import ctypes.util
+import argparse
+import threading
+from pathlib import Path
+import corelog
+from CoreCompile import (handle_dirmapper, handle_import_chat, read_index, set_index_status,
+                         dirmapper_snapshot, iter_turn_lines, log_event, recover_write_journal)
+
+DEBOUNCE = 2.0  # seconds a file must stay unchanged before it is acted on
+TICK = 0.5  # event wait / debounce check granularity
+POLL_INTERVAL = 5.0  # seconds between dirmapper polls without inotify
+VERIFY_EVERY = 12  # polls between full verify scans (catches in-place edits)
+IMPORT_QUEUE_SIZE = 32
+TRANSCRIPT_SUFFIXES = (".txt",)
+TRANSCRIPT_SNIFF = 64 * 1024  # bytes read to recognise a User:/Kimi: transcript
+RETRY_STATUSES = ("pending", "queued")  # rows re-offered at start
+
+# inotify(7)
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def is_transcript(path) -> bool:
+    """A .txt whose head has both a User: and a Kimi: turn"""
+    if not str(path).endswith(TRANSCRIPT_SUFFIXES):
+        return False
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            head = f.read(TRANSCRIPT_SNIFF)
+    except OSError:
+        return False
+    speakers = set()
+    for speaker, _ in iter_turn_lines(head):
+        speakers.add(speaker)
+        if len(speakers) == 2:
+            return True
+    return False
+
+
+def _rel(root: Path, path) -> str:
+    rel = Path(path).relative_to(root).as_posix()
+    return "" if rel == "." else rel
+
+
+# ──────────────────────────────────────────────────────────────
+# EVENT SOURCES: wait(timeout) → (changed rel paths, None | "scan" | "verify")
+# ──────────────────────────────────────────────────────────────
+class InotifySource:
+    """Recursive inotify watches over the mapped tree"""
+
+    def __init__(self, root: Path, snapshot):
+        self.root = root
+        self.snapshot = snapshot  # only for excluded()
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1: {os.strerror(err)}")
+        self.watches = {}  # wd → rel dir
+        try:
+            self.add_tree("")
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def add_tree(self, rel: str) -> list:
+        """Watch rel and every directory below it; returns the files already inside"""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(self.root / rel):
+            dirnames[:] = [d for d in dirnames if not self.snapshot.excluded(os.path.join(dirpath, d))]
+            wd = self._add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+                continue  # removed while walking
+            dir_rel = _rel(self.root, dirpath)
+            self.watches[wd] = dir_rel
+            found.extend(f"{dir_rel}/{name}" if dir_rel else name for name in filenames)
+        return found
+
+    def drop_tree(self, rel: str) -> None:
+        """A directory moved away: its watches would report under the old path"""
+        for wd, dir_rel in list(self.watches.items()):
+            if dir_rel == rel or dir_rel.startswith(rel + "/"):
+                self._rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+    def wait(self, timeout: float):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set(), None
+        data = os.read(self.fd, 64 * 1024)
+        paths = set()
+        mode = "scan"
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                mode = "verify"  # events were lost
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            dir_rel = self.watches.get(wd)
+            if dir_rel is None or not name:
+                continue
+            rel = f"{dir_rel}/{name}" if dir_rel else name
+            if self.snapshot.excluded(self.root / rel):
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        paths.update(self.add_tree(rel))
+                    except OSError:
+                        mode = "verify"  # out of watches: the dirmapper still sees the new files
+                elif mask & IN_MOVED_FROM:
+                    self.drop_tree(rel)
+            else:
+                paths.add(rel)
+        return paths, mode
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollSource:
+    """No inotify: the incremental dirmapper every `interval` seconds, verifying every VERIFY_EVERY"""
+
+    def __init__(self, interval: float = POLL_INTERVAL):
+        self.interval = interval
+        self.polls = 0
+        self.next_poll = time.monotonic()
+
+    def wait(self, timeout: float):
+        time.sleep(max(0.0, min(timeout, self.next_poll - time.monotonic())))
+        if time.monotonic() < self.next_poll:
+            return set(), None
+        self.next_poll = time.monotonic() + self.interval
+        self.polls += 1
+        return set(), "verify" if self.polls % VERIFY_EVERY == 0 else "scan"
+
+    def close(self) -> None:
+        pass
+
+
+def open_source(root: Path, snapshot, poll: bool = False, interval: float = POLL_INTERVAL):
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifySource(root, snapshot)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify unavailable ({e}), polling every {interval}s")
+    return PollSource(interval)
+
+
+# ──────────────────────────────────────────────────────────────
+# DEBOUNCE
+# ──────────────────────────────────────────────────────────────
+class Debouncer:
+    """Hold paths until they have been quiet (no event, same size/mtime) for `delay` seconds"""
+
+    def __init__(self, root: Path, delay: float = DEBOUNCE):
+        self.root = root
+        self.delay = delay
+        self.paths = {}  # rel → [(size, mtime_ns) | None, last change]
+
+    def touch(self, rel: str, now: float = None) -> None:
+        self.paths[rel] = [None, now if now is not None else time.monotonic()]
+
+    def ready(self, now: float) -> list:
+        settled = []
+        for rel, state in list(self.paths.items()):
+            try:
+                st = os.stat(self.root / rel)
+            except OSError:
+                del self.paths[rel]  # deleted before it settled
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                del self.paths[rel]
+                continue
+            stamp = (st.st_size, st.st_mtime_ns)
+            if stamp != state[0]:
+                state[0], state[1] = stamp, now
+            elif now - state[1] >= self.delay:
+                del self.paths[rel]
+                settled.append((rel, stamp))
+        return settled
+
+
+# ──────────────────────────────────────────────────────────────
+# WATCHER
+# ──────────────────────────────────────────────────────────────
+class Watcher:
+    def __init__(self, root, index_path: str = "WATCH_INDEX.csv", poll: bool = False,
+                 interval: float = POLL_INTERVAL, debounce: float = DEBOUNCE,
+                 queue_size: int = IMPORT_QUEUE_SIZE, report=print):
+        self.root = Path(root)
+        self.index_path = index_path
+        self.debounce = debounce
+        self.report = report
+        self.source = open_source(self.root, dirmapper_snapshot(self.root, index_path), poll, interval)
+        self.pending = Debouncer(self.root, debounce)
+        self.imports = queue.Queue(maxsize=queue_size)
+        self.results = queue.SimpleQueue()  # (rel, status) from the import thread
+        self.statuses = {}  # rel → status not yet written to the index
+        self.offered = {}  # rel → stamp last queued, so one version is imported once
+        self.scan_due = None
+        self.last_scan = float("-inf")
+        self.stop_event = threading.Event()
+        self._importer = threading.Thread(target=self._import_loop, name="watch-import", daemon=True)
+
+    # -------- Index --------
+
+    def refresh_index(self, verify: bool = False) -> None:
+        result = handle_dirmapper({"target": str(self.root), "index": self.index_path, "verify": verify})
+        self.last_scan = time.monotonic()
+        self.scan_due = None
+        for rel in result["added"] + result["modified"]:
+            self.pending.touch(rel)
+        for rel in result["removed"]:
+            self.offered.pop(rel, None)
+        if result["added"] or result["removed"]:
+            self.report(f"🗺️ index: +{len(result['added'])} -{len(result['removed'])} "
+                        f"({result['dirs_scanned']}/{result['dirs_total']} dirs listed)")
+
+    def flush_statuses(self) -> None:
+        while True:
+            try:
+                rel, status = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.statuses[rel] = status
+        if self.statuses and self.scan_due is None:  # rows exist once the index is current
+            set_index_status(self.index_path, {rel.replace("/", "\\"): status
+                                               for rel, status in self.statuses.items()})
+            self.statuses.clear()
+
+    # -------- Imports --------
+
+    def offer(self, rel: str, stamp: tuple) -> None:
+        if self.offered.get(rel) == stamp or not is_transcript(self.root / rel):
+            return
+        try:
+            self.imports.put_nowait(rel)
+        except queue.Full:
+            self.pending.touch(rel)  # stays pending; offered again after another quiet window
+            return
+        self.offered[rel] = stamp
+        self.statuses[rel] = "queued"
+        self.report(f"📥 queued {rel}")
+
+    def _import_loop(self) -> None:
+        while True:
+            rel = self.imports.get()
+            if rel is None:
+                break
+            started = time.perf_counter()
+            try:
+                result = handle_import_chat({"path": str(self.root / rel)})
+                status = "imported" if result["status"] == "keep" else result["status"]
+            except Exception as e:
+                status = "error"
+                log_event("watch_import_error", {"file": rel, "error": f"{type(e).__name__}: {e}"})
+            log_event("watch_import", {"file": rel, "status": status,
+                                       "seconds": round(time.perf_counter() - started, 3)})
+            self.report(f"{'✅' if status == 'imported' else '⚠️'} {status} {rel}")
+            self.results.put((rel, status))
+
+    # -------- Loop --------
+
+    def start(self) -> None:
+        """Catch up on changes made while nothing was watching"""
+        self.refresh_index()
+        for rel, status in read_index(self.index_path).items():
+            if status in RETRY_STATUSES:
+                self.pending.touch(rel.replace("\\", "/"))
+        self._importer.start()
+
+    def step(self, timeout: float = TICK) -> None:
+        paths, mode = self.source.wait(timeout)
+        now = time.monotonic()
+        for rel in paths:
+            self.pending.touch(rel, now)
+        if mode and self.scan_due != "verify":
+            self.scan_due = mode
+        if self.scan_due and now - self.last_scan >= self.debounce:
+            self.refresh_index(verify=self.scan_due == "verify")
+        for rel, stamp in self.pending.ready(now):
+            self.offer(rel, stamp)
+        self.flush_statuses()
+
+    def run(self) -> None:
+        self.start()
+        self.report(f"👀 watching {self.root.resolve()} ({type(self.source).__name__})")
+        try:
+            while not self.stop_event.is_set():
+                self.step()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Let queued imports finish, record their statuses, release the source"""
+        if self._importer.is_alive():
+            self.imports.put(None)
+            self._importer.join()
+        self.scan_due = None
+        self.flush_statuses()
+        self.source.close()
+        corelog.close_all()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Watch the tree, keep WATCH_INDEX.csv current, auto-import chats")
+    parser.add_argument("--root", default=".", help="Corelink ROOT (Archive/ lives here)")
+    parser.add_argument("--index", default="WATCH_INDEX.csv")
+    parser.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="poll interval (s)")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE, help="quiet time before acting (s)")
+    parser.add_argument("--queue-size", type=int, default=IMPORT_QUEUE_SIZE)
+    args = parser.parse_args()
+
+    os.chdir(args.root)  # CoreCompile paths (Archive/...) are relative to ROOT
+    recover_write_journal()
+    watcher = Watcher(".", args.index, args.poll, args.interval, args.debounce, args.queue_size)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\n🛑 stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())